@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # third-party packages
     'rest_framework',
@@ -57,6 +58,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.instrumentation.InstrumentationMiddleware',
+    'core.db.replicas.ReplicaMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -89,18 +93,93 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# Share a pool of connections between the threads of a process instead of
+# keeping one per thread, on under ASGI where requests run on new threads.
+# Read here rather than in app/asgi.py so management commands run next to
+# the ASGI server use the pool too.
+DB_POOL = bool(int(os.environ.get(
+    'DB_POOL', int(os.environ.get('APP_SERVER') == 'asgi'))))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': ('core.db.backends.postgresql' if DB_POOL
+                   else 'django.db.backends.postgresql'),
         'HOST': os.environ.get("DB_HOST"),
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASS"),
         'PORT': os.environ.get("DB_PORT"),
+        # Seconds a connection is reused across requests, pooled ones go
+        # back to the pool after every request.
+        'CONN_MAX_AGE': (0 if DB_POOL
+                         else int(os.environ.get('DB_CONN_MAX_AGE', 60))),
+        # Check reused connections still work before handing them out.
+        'CONN_HEALTH_CHECKS': bool(
+            int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))),
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            # Seconds idle after which pooled connections are health checked.
+            'HEALTH_CHECK_IDLE': float(
+                os.environ.get('DB_POOL_HEALTH_CHECK_IDLE', 30)),
+        },
+    }
+}
 
+# Read replicas of the default database, comma separated hosts.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.environ.get(
+        'DB_REPLICA_HOSTS', '').split(','))):
+    DATABASE_REPLICAS.append(f'replica_{index}')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db.replicas.ReplicaRouter']
+
+REPLICA_PIN_CACHE_ALIAS = 'default'
+# Seconds reads of a user who wrote go to the primary.
+REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+# Seconds of lag after which a replica is skipped.
+REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 2))
+# Seconds between replica lag checks in every process.
+REPLICA_LAG_CHECK_INTERVAL = float(
+    os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 1))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+        },
     }
 }
 
+# Cached responses, shared token lookups and replica pins must be seen by
+# every worker process, which needs a cache shared between processes such as
+# Redis or Memcached (CACHE_BACKEND and CACHE_LOCATION). With a process-local
+# cache responses and shared token lookups are not cached, and read replicas
+# fail the system checks.
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
+AUTH_TOKEN_CACHE_ALIAS = 'default'
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+AUTH_TOKEN_LOCAL_CACHE_TTL = int(
+    os.environ.get('AUTH_TOKEN_LOCAL_CACHE_TTL', 5))
+AUTH_TOKEN_LOCAL_CACHE_SIZE = int(
+    os.environ.get('AUTH_TOKEN_LOCAL_CACHE_SIZE', 1024))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -142,6 +221,79 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Resized recipe image variants, longest side in pixels.
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': 320,
+    'medium': 1024,
+}
+RECIPE_IMAGE_QUALITY = 80
+# Limits checked while an upload streams in, before it is fully received.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40_000_000))
+# Threads generating image variants, 0 processes them inline.
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+# Seconds after which an image still processing is assumed abandoned by a
+# crashed worker and queued again.
+IMAGE_PROCESSING_TIMEOUT = int(
+    os.environ.get('IMAGE_PROCESSING_TIMEOUT', 600))
+# Text search configuration of the recipe search vectors.
+RECIPE_SEARCH_CONFIG = os.environ.get('RECIPE_SEARCH_CONFIG', 'english')
+# Render list endpoints from values() rows instead of model instances.
+FAST_LIST_SERIALIZATION = bool(
+    int(os.environ.get('FAST_LIST_SERIALIZATION', 1)))
+# Rows fetched per database round trip by streamed (?stream=1) lists.
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', 500))
+# Serve recipe, tag and ingredient reads as coroutines, on under ASGI.
+ASYNC_VIEWS = bool(int(os.environ.get('ASYNC_VIEWS', 0)))
+# Send the time spent in each request phase in Server-Timing headers.
+SERVER_TIMING = bool(int(os.environ.get('SERVER_TIMING', 1)))
+# Directory the workers write their metrics to for /metrics, which is only
+# served when set.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+# Bearer token Prometheus sends to scrape /metrics, which is not served
+# without one.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Seconds between the metrics snapshots of a worker.
+METRICS_WRITE_INTERVAL = float(os.environ.get('METRICS_WRITE_INTERVAL', 5))
+# Log requests running the same query QUERY_REPEAT_THRESHOLD times or
+# queries slower than SLOW_QUERY_MS, for staging.
+QUERY_DETECTOR = bool(int(os.environ.get('QUERY_DETECTOR', 0)))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+if QUERY_DETECTOR:
+    MIDDLEWARE.append('core.db.detector.QueryDetectorMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # INFO logs the measurements of every request as JSON.
+        'core.instrumentation': {
+            'handlers': ['console'],
+            'level': os.environ.get('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+# Records validated and inserted together by library imports.
+RECIPE_IMPORT_BATCH_SIZE = int(
+    os.environ.get('RECIPE_IMPORT_BATCH_SIZE', 500))
+# Responses smaller than this many bytes are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('COMPRESSION_BROTLI_QUALITY', 5))
+# Most tags or ingredients returned by an autocomplete (q) request.
+AUTOCOMPLETE_MAX_RESULTS = int(os.environ.get('AUTOCOMPLETE_MAX_RESULTS', 20))
+# Largest number of operations accepted by one bulk recipe request.
+RECIPE_BULK_MAX_OPERATIONS = int(
+    os.environ.get('RECIPE_BULK_MAX_OPERATIONS', 1000))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
@@ -151,6 +303,17 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.RecipePagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -0,0 +1,8 @@
+"""
+Performance benchmarks.
+
+Benchmarks are Django test cases that are kept out of the default test run.
+Run them against the development database with:
+
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
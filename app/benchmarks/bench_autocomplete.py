@@ -0,0 +1,67 @@
+"""
+Latency of tag autocomplete requests at 100k tags per user.
+
+The single-digit millisecond target applies to PostgreSQL, where a btree
+on the user and the upper cased name serves prefix matches and the
+``gin_trgm_ops`` index similarity matches. Another user holds as many tags,
+so indexes not scoped to the user show. Other databases scan the user's
+tags.
+"""
+import random
+import string
+
+from django.db import connection
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Tag
+
+from benchmarks.utils import create_user, timed
+
+TAG_URL = reverse('recipe:tag-list')
+
+
+def random_name(rng):
+    """Return a random name of two words."""
+    return ' '.join(
+        ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9)))
+        for _ in range(2)
+    ).capitalize()
+
+
+@tag('benchmark')
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class AutocompleteBenchmark(TestCase):
+    """Time q requests against a user with many tags."""
+    tag_count = 100_000
+    terms = ['a', 'veg', 'tomat', 'vegatarian', 'zzzz']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        other = create_user(email='other@example.com')
+        rng = random.Random(0)
+        for user in (cls.user, other):
+            names = {random_name(rng) for _ in range(cls.tag_count)}
+            names.update(['Vegetarian', 'Vegan', 'Tomato', 'Tomatillo'])
+            Tag.objects.bulk_create(
+                (Tag(user=user, name=name) for name in names),
+                batch_size=5000,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_autocomplete(self):
+        """Print the best latency of each autocomplete term."""
+        print(f'\n{connection.vendor}, {self.tag_count} tags')
+        print(f'{"q":>12} {"matches":>8} {"ms":>8}')
+        for term in self.terms:
+            res = self.client.get(TAG_URL, {'q': term})
+            elapsed = timed(
+                lambda: self.client.get(TAG_URL, {'q': term}), repeat=10)
+            print(f'{term:>12} {len(res.data):>8} {elapsed:>8.2f}')
@@ -0,0 +1,69 @@
+"""
+Time to create recipes through the bulk endpoint or one request each.
+"""
+import time
+
+from django.test import TestCase, tag
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+
+from benchmarks.utils import create_user
+
+RECIPES_URL = reverse('recipe:recipe-list')
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def recipe_payload(i):
+    """Return the data of the i-th recipe to create."""
+    return {
+        'title': f'Recipe {i}',
+        'time_minutes': 5 + i % 120,
+        'price': f'{i % 5000 / 100:.2f}',
+        'tags': [{'name': f'Tag {i % 50}'}, {'name': 'Weekly'}],
+        'ingredients': [{'name': f'Ingredient {i % 100}'}],
+    }
+
+
+@tag('benchmark')
+class BulkCreateBenchmark(TestCase):
+    """Compare creating 500 recipes in one request or in 500 requests."""
+    recipes = 500
+
+    def setUp(self):
+        self.user = create_user()
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def _run(self, send):
+        """Return the milliseconds taken by send and reset the recipes."""
+        start = time.perf_counter()
+        send()
+        elapsed = (time.perf_counter() - start) * 1000
+        self.assertEqual(
+            Recipe.objects.filter(user=self.user).count(), self.recipes)
+        Recipe.objects.filter(user=self.user).delete()
+
+        return elapsed
+
+    def test_bulk_create(self):
+        """Print the time of both ways of creating the recipes."""
+        def individual():
+            for i in range(self.recipes):
+                self.client.post(
+                    RECIPES_URL, recipe_payload(i), format='json')
+
+        def bulk():
+            payload = [
+                {'action': 'create', 'data': recipe_payload(i)}
+                for i in range(self.recipes)
+            ]
+            self.client.post(BULK_URL, payload, format='json')
+
+        print(f'\n{"mode":>12} {"recipes":>8} {"ms":>10}')
+        for name, send in [('individual', individual), ('bulk', bulk)]:
+            elapsed = self._run(send)
+            print(f'{name:>12} {self.recipes:>8} {elapsed:>10.1f}')
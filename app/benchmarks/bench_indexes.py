@@ -0,0 +1,95 @@
+"""
+Query plans for the per-user recipe, tag and ingredient lookups.
+
+Requires PostgreSQL: SQLite rebuilds tables from the model definitions when
+constraints are dropped, which fails on the GIN indexes and would keep the
+unique indexes in the "without" plans anyway.
+"""
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TransactionTestCase, tag
+
+from core.models import Recipe, Tag, Ingredient
+from benchmarks.utils import create_user, seed_recipes, timed
+
+
+@tag('benchmark')
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class IndexQueryPlanBenchmark(TransactionTestCase):
+    """Compare query plans with and without the composite indexes."""
+    users = 10
+    recipes_per_user = 2000
+    tags_per_user = 500
+
+    def setUp(self):
+        for i in range(self.users):
+            user = create_user(email=f'bench{i}@example.com')
+            seed_recipes(user, recipes=self.recipes_per_user,
+                         tags=self.tags_per_user,
+                         ingredients=self.tags_per_user)
+        self.user = user
+
+    def _queries(self):
+        """Return the benchmarked querysets keyed by label."""
+        middle_id = Recipe.objects.filter(user=self.user).order_by(
+            '-id').values_list('id', flat=True)[self.recipes_per_user // 2]
+        names = [f'Tag {i}' for i in range(0, self.tags_per_user, 25)]
+
+        return {
+            'recipe first page': Recipe.objects.filter(
+                user=self.user).order_by('-id')[:50],
+            'recipe deep page': Recipe.objects.filter(
+                user=self.user, id__lt=middle_id).order_by('-id')[:50],
+            'recipe quick and cheap by time': Recipe.objects.filter(
+                user=self.user, time_minutes__lte=30, price__lte=10,
+            ).order_by('time_minutes', 'id')[:50],
+            'recipe by price desc': Recipe.objects.filter(
+                user=self.user).order_by('-price', '-id')[:50],
+            'tag page': Tag.objects.filter(
+                user=self.user).order_by('-name')[:50],
+            'tag name lookup': Tag.objects.filter(
+                user=self.user, name__in=names),
+            'ingredient name lookup': Ingredient.objects.filter(
+                user=self.user, name__in=names),
+        }
+
+    def _report(self, heading):
+        print(f'\n=== {heading} ===')
+        for label, queryset in self._queries().items():
+            elapsed = timed(lambda: list(queryset.all()))
+            print(f'\n-- {label}: {elapsed:.3f} ms')
+            print(queryset.explain())
+
+    def _existing_names(self, model):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(
+                cursor, model._meta.db_table)
+
+    def test_query_plans(self):
+        """Print query plans before and after adding the indexes."""
+        models = [Recipe, Tag, Ingredient]
+
+        with connection.schema_editor() as editor:
+            for model in models:
+                for constraint in model._meta.constraints:
+                    editor.remove_constraint(model, constraint)
+                existing = self._existing_names(model)
+                for index in model._meta.indexes:
+                    if index.name in existing:
+                        editor.remove_index(model, index)
+
+        self._report('without composite indexes')
+
+        with connection.schema_editor() as editor:
+            for model in models:
+                for constraint in model._meta.constraints:
+                    editor.add_constraint(model, constraint)
+                existing = self._existing_names(model)
+                for index in model._meta.indexes:
+                    if index.name not in existing:
+                        editor.add_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self._report('with composite indexes')
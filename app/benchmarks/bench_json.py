@@ -0,0 +1,48 @@
+"""
+Throughput of the JSON renderers and parsers on recipe payloads.
+"""
+from io import BytesIO
+
+from django.test import TestCase, tag
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Recipe
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from recipe.serializers import RecipeDetailSerializer
+
+from benchmarks.utils import create_user, seed_recipes, timed
+
+
+@tag('benchmark')
+class JSONThroughputBenchmark(TestCase):
+    """Compare DRF's stdlib JSON classes with the fast ones."""
+    recipes = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        seed_recipes(cls.user, recipes=cls.recipes)
+
+    def test_throughput(self):
+        """Print MB/s for rendering and parsing 1k detailed recipes."""
+        recipes = Recipe.objects.filter(user=self.user).prefetch_related(
+            'tags', 'ingredients')
+        data = RecipeDetailSerializer(recipes, many=True).data
+        body = JSONRenderer().render(data)
+        size = len(body) / 1024 / 1024
+
+        cases = {
+            'render stdlib': lambda: JSONRenderer().render(data),
+            'render fast': lambda: FastJSONRenderer().render(data),
+            'parse stdlib': lambda: JSONParser().parse(BytesIO(body)),
+            'parse fast': lambda: FastJSONParser().parse(BytesIO(body)),
+        }
+
+        print(f'\npayload: {len(body)} bytes')
+        print(f'{"case":>14} {"ms":>8} {"MB/s":>8}')
+        for label, func in cases.items():
+            elapsed = timed(func)
+            print(f'{label:>14} {elapsed:>8.2f} '
+                  f'{size / (elapsed / 1000):>8.1f}')
@@ -0,0 +1,45 @@
+"""
+Throughput of recipe library exports and imports.
+"""
+import time
+
+from django.test import TestCase, tag
+
+from core.models import Recipe
+from recipe.library import EXPORT_FORMATS, EXPORTERS, import_records
+from recipe.library import CSVParser, NDJSONParser
+
+from benchmarks.utils import create_user, seed_recipes
+
+PARSERS = {
+    'ndjson': NDJSONParser,
+    'csv': CSVParser,
+}
+
+
+@tag('benchmark')
+class LibraryThroughputBenchmark(TestCase):
+    """Measure rows/sec for exporting and importing a library."""
+    recipes = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        cls.other = create_user(email='other@example.com')
+        seed_recipes(cls.user, recipes=cls.recipes)
+
+    def test_throughput(self):
+        """Print rows/sec for each format and direction."""
+        print(f'\n{"format":>8} {"export/s":>10} {"import/s":>10}')
+        for export_format in EXPORT_FORMATS:
+            start = time.perf_counter()
+            body = b''.join(EXPORTERS[export_format](self.user))
+            exported = time.perf_counter() - start
+
+            records = PARSERS[export_format]().parse(body.splitlines(True))
+            imported, seconds = import_records(self.other, records)
+            self.assertEqual(imported, self.recipes)
+            Recipe.objects.filter(user=self.other).delete()
+
+            print(f'{export_format:>8} {self.recipes / exported:>10.0f} '
+                  f'{imported / seconds:>10.0f}')
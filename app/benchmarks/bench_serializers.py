@@ -0,0 +1,48 @@
+"""
+CPU time of the recipe list endpoint with and without the fast read path.
+"""
+from django.test import TestCase, override_settings, tag
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from benchmarks.utils import create_user, seed_recipes, timed
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@tag('benchmark')
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastListBenchmark(TestCase):
+    """Compare ModelSerializer rendering with the values() reader."""
+    recipes = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user()
+        seed_recipes(cls.user, recipes=cls.recipes, tags=200,
+                     ingredients=1000)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list(self):
+        """Print the best time of each list request on both paths."""
+        requests = {
+            'recipes': (RECIPES_URL, {}),
+            'recipes id,title': (RECIPES_URL, {'fields': 'id,title'}),
+            'tags': (TAGS_URL, {}),
+        }
+
+        print(f'\n{"request":>18} {"serializer ms":>14} {"values ms":>10} '
+              f'{"speedup":>8}')
+        for label, (url, params) in requests.items():
+            results = {}
+            for fast in (False, True):
+                with override_settings(FAST_LIST_SERIALIZATION=fast):
+                    results[fast] = timed(
+                        lambda: self.client.get(url, params), repeat=10)
+            print(f'{label:>18} {results[False]:>14.1f} '
+                  f'{results[True]:>10.1f} '
+                  f'{results[False] / results[True]:>7.1f}x')
@@ -0,0 +1,67 @@
+"""
+Memory and time spent parsing large recipe image uploads.
+"""
+import os
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http.multipartparser import MultiPartParser
+from django.test import RequestFactory, SimpleTestCase, tag
+from PIL import Image
+
+from recipe.uploads import StreamingImageUploadHandler
+
+
+def make_png(width, height):
+    """Return an incompressible PNG of the given size."""
+    image = Image.frombytes('RGB', (width, height),
+                            os.urandom(width * height * 3))
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@tag('benchmark')
+class UploadMemoryBenchmark(SimpleTestCase):
+    """Compare Django's default upload handlers with the streaming one."""
+    sizes = [(640, 480), (1600, 1200), (2000, 1600)]
+
+    def _parse(self, content, handlers):
+        """Parse an upload and return (peak KiB, milliseconds)."""
+        request = RequestFactory().post('/upload/', {
+            'image': SimpleUploadedFile('image.png', content, 'image/png'),
+        })
+        handlers = [handler(request) for handler in handlers]
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        parser = MultiPartParser(request.META, request, handlers)
+        _, files = parser.parse()
+        elapsed = (time.perf_counter() - start) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        files['image'].close()
+        return peak / 1024, elapsed
+
+    def test_upload_memory(self):
+        """Print the peak traced memory and time per upload."""
+        handlers = {
+            'default': [MemoryFileUploadHandler, TemporaryFileUploadHandler],
+            'streaming': [StreamingImageUploadHandler],
+        }
+
+        print(f'\n{"size":>10} {"bytes":>10} {"handler":>10} '
+              f'{"peak KiB":>10} {"ms":>8}')
+        for width, height in self.sizes:
+            content = make_png(width, height)
+            for name, classes in handlers.items():
+                peak, elapsed = self._parse(content, classes)
+                print(f'{width}x{height:<5} {len(content):>10} {name:>10} '
+                      f'{peak:>10.0f} {elapsed:>8.1f}')
@@ -0,0 +1,161 @@
+"""
+Closed loop HTTP load test comparing the uWSGI and ASGI deployments.
+
+Start the stack once with ``APP_SERVER=uwsgi`` and once with
+``APP_SERVER=asgi`` and point the script at the same endpoint::
+
+    python benchmarks/loadtest.py http://localhost/api/recipe/recipes/ \\
+        --token <token> --concurrency 4,16,64,256 --duration 10
+
+Each level keeps that many keep-alive connections busy for the duration and
+reports requests/sec, latency percentiles and errors. The concurrency
+ceiling is the highest level whose p99 latency stays under ``--max-p99``
+milliseconds without errors. Only the standard library is used, so the
+script runs anywhere Python does.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response, return its status and keep-alive flag."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by the server.')
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+
+    return status, headers.get('connection') != 'close'
+
+
+async def client(url, request, deadline, latencies, errors):
+    """Send requests on one connection until the deadline."""
+    connection = None
+    while time.perf_counter() < deadline:
+        reused = connection is not None
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(
+                    url.hostname, url.port or 80)
+            reader, writer = connection
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as exc:
+            if connection is not None:
+                connection[1].close()
+                connection = None
+            # Like HTTP clients do, retry on a new connection when the
+            # server closed an idle keep-alive one.
+            if not (reused and isinstance(exc, ConnectionError)):
+                errors.append(type(exc).__name__)
+                await asyncio.sleep(0.01)
+            continue
+
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            errors.append(status)
+        if not keep_alive:
+            writer.close()
+            connection = None
+
+    if connection is not None:
+        connection[1].close()
+
+
+def percentile(values, fraction):
+    """Return the value below which fraction of the sorted values fall."""
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run_level(url, request, concurrency, duration):
+    """Load the server with concurrency clients and return the results."""
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        client(url, request, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    latencies.sort()
+
+    return {
+        'rps': len(latencies) / duration,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'errors': len(errors),
+    }
+
+
+def build_request(url, token):
+    """Return the raw bytes of the GET request sent by every client."""
+    target = url.path or '/'
+    if url.query:
+        target += f'?{url.query}'
+    lines = [
+        f'GET {target} HTTP/1.1',
+        f'Host: {url.netloc}',
+        'Accept: application/json',
+        'Connection: keep-alive',
+    ]
+    if token:
+        lines.append(f'Authorization: Token {token}')
+
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('url', help='Endpoint to load, e.g. a list URL.')
+    parser.add_argument('--token', help='API token sent with requests.')
+    parser.add_argument(
+        '--concurrency', default='1,4,16,64,256',
+        help='Comma separated numbers of concurrent connections.')
+    parser.add_argument(
+        '--duration', type=float, default=10,
+        help='Seconds to run every concurrency level.')
+    parser.add_argument(
+        '--max-p99', type=float, default=500,
+        help='p99 latency in ms above which a level is saturated.')
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    request = build_request(url, args.token)
+    ceiling = None
+    print(f'{"clients":>8} {"req/s":>9} {"p50 ms":>8} {"p99 ms":>8} '
+          f'{"errors":>7}')
+    for concurrency in map(int, args.concurrency.split(',')):
+        result = asyncio.run(
+            run_level(url, request, concurrency, args.duration))
+        print(f'{concurrency:>8} {result["rps"]:>9.1f} '
+              f'{result["p50"]:>8.1f} {result["p99"]:>8.1f} '
+              f'{result["errors"]:>7}')
+        if not result['errors'] and result['p99'] <= args.max_p99:
+            ceiling = concurrency
+
+    print(f'Concurrency ceiling: {ceiling or "none"} '
+          f'(p99 <= {args.max_p99:g} ms, no errors)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Helpers for seeding and timing benchmarks.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from core.models import Recipe, Tag, Ingredient
+
+
+def create_user(email='bench@example.com', password='benchpass123'):
+    """Create and return a benchmark user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def seed_recipes(user, recipes=1000, tags=50, ingredients=100,
+                 per_recipe=3):
+    """Bulk create recipes for user with tags and ingredients attached."""
+    tag_objs = Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(tags)
+    )
+    ingredient_objs = Ingredient.objects.bulk_create(
+        Ingredient(user=user, name=f'Ingredient {i}')
+        for i in range(ingredients)
+    )
+    recipe_objs = Recipe.objects.bulk_create(
+        Recipe(
+            user=user,
+            title=f'Recipe {i}',
+            description=f'Description of recipe {i}',
+            time_minutes=5 + i % 120,
+            price=Decimal(i % 5000) / 100,
+        )
+        for i in range(recipes)
+    )
+
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(
+            recipe_id=recipe.id,
+            tag_id=tag_objs[(i + n) % tags].id,
+        )
+        for i, recipe in enumerate(recipe_objs)
+        for n in range(min(per_recipe, tags))
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        Recipe.ingredients.through(
+            recipe_id=recipe.id,
+            ingredient_id=ingredient_objs[(i + n) % ingredients].id,
+        )
+        for i, recipe in enumerate(recipe_objs)
+        for n in range(min(per_recipe, ingredients))
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return recipe_objs
+
+
+def timed(func, repeat=20):
+    """Return the best wall time of func in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from core import checks, signals  # noqa: F401
+        from core.db.detector import install_query_detector
+        from core.instrumentation import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+        connection_created.connect(install_query_detector)
@@ -0,0 +1,20 @@
+"""
+Caches seen by every worker process.
+
+uWSGI and uvicorn serve requests from several processes. Invalidations,
+revocations and replica pins written to a process-local cache only reach
+the process that wrote them, so features relying on them check
+``is_shared_cache`` and stay off, or refuse to start, without a cache such
+as Redis or Memcached shared between processes.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries no other process sees.
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias):
+    """Return whether every worker process sees the entries of a cache."""
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -0,0 +1,24 @@
+"""
+System checks of the core settings.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+from core.cache import is_shared_cache
+
+
+@register(Tags.caches, Tags.database)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Refuse read replicas whose pins other workers would not see."""
+    if (not settings.DATABASE_REPLICAS or
+            not settings.REPLICA_STICKY_SECONDS or
+            is_shared_cache(settings.REPLICA_PIN_CACHE_ALIAS)):
+        return []
+
+    return [Error(
+        'Read replicas need REPLICA_PIN_CACHE_ALIAS to be shared between '
+        'worker processes.',
+        hint=('Set CACHE_BACKEND to a cache such as Redis or Memcached, so '
+              'reads following a write on another worker see it.'),
+        id='core.E001',
+    )]
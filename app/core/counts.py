@@ -0,0 +1,43 @@
+"""
+Denormalized recipe counts of tags and ingredients.
+
+``Tag.recipe_count`` and ``Ingredient.recipe_count`` hold the number of
+recipes linked to each object. The signal handlers in ``core.signals``
+recount the objects whose links change, writers bypassing ``m2m_changed``
+call ``update_recipe_counts`` themselves, and the
+``reconcile_recipe_counts`` command repairs any drift.
+"""
+from django.db.models import (
+    Count,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce
+
+
+def recipe_count(model):
+    """Return an expression counting the recipes linked to each object."""
+    field_name = model._meta.model_name
+    links = model.recipe_set.through.objects.filter(
+        **{field_name: OuterRef('pk')}
+    ).order_by().values(field_name).annotate(total=Count('*'))
+
+    return Coalesce(
+        Subquery(links.values('total'), output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def update_recipe_counts(queryset):
+    """Recount the recipes of the objects in queryset in one statement."""
+    return queryset.update(recipe_count=recipe_count(queryset.model))
+
+
+def stale_recipe_counts(queryset):
+    """Return the objects of queryset whose recipe count is wrong."""
+    return queryset.alias(
+        actual_recipe_count=recipe_count(queryset.model),
+    ).exclude(recipe_count=F('actual_recipe_count'))
@@ -0,0 +1,72 @@
+"""
+PostgreSQL backend taking its connections from an in-process pool.
+"""
+from django.db.backends.postgresql import base
+
+from core.db.pool import PoolTimeout, get_pool
+
+Database = base.Database
+
+
+def reset_connection(connection):
+    """Roll back a connection to reuse it, return whether it can be."""
+    if connection.closed:
+        return False
+    try:
+        if (connection.info.transaction_status !=
+                Database.extensions.TRANSACTION_STATUS_IDLE):
+            connection.rollback()
+    except Database.Error:
+        return False
+
+    return True
+
+
+def check_connection(connection):
+    """Return whether an idle connection still answers queries."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except Database.Error:
+        return False
+
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL connections checked out of a ``core.db.pool`` pool.
+
+    The ``POOL`` entry of the database settings holds the pool's
+    ``MAX_SIZE`` and the ``TIMEOUT`` in seconds to wait for a connection.
+    Closing the connection, which Django does at the end of every request
+    with ``CONN_MAX_AGE`` 0, returns it to the pool. With
+    ``CONN_HEALTH_CHECKS`` connections idle for ``HEALTH_CHECK_IDLE``
+    seconds or more are checked before reuse.
+    """
+
+    @property
+    def connection_pool(self):
+        options = self.settings_dict.get('POOL', {})
+        return get_pool(
+            self.alias,
+            max_size=options.get('MAX_SIZE', 10),
+            timeout=options.get('TIMEOUT', 10),
+            check_idle=options.get('HEALTH_CHECK_IDLE', 0),
+            check=(check_connection
+                   if self.settings_dict['CONN_HEALTH_CHECKS'] else None),
+        )
+
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        try:
+            return self.connection_pool.checkout(lambda: parent(conn_params))
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        if self.connection is None:
+            return
+
+        with self.wrap_database_errors:
+            self.connection_pool.checkin(
+                self.connection, reset_connection(self.connection))
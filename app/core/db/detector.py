@@ -0,0 +1,215 @@
+"""
+N+1 and slow query detection.
+
+``QueryDetectorMiddleware`` watches the SQL of every request and reports
+structurally identical queries repeated ``QUERY_REPEAT_THRESHOLD`` times or
+more, the usual sign of a query run once per row, and queries slower than
+``SLOW_QUERY_MS`` milliseconds, each with the application stack that ran
+it. Stacks are only captured for the query reaching the repeat threshold
+and for slow ones, so watching a request costs little more than
+fingerprinting its queries. It is turned on with ``QUERY_DETECTOR``, for
+staging, and by ``core.tests.mixins.QueryDetectorMixin`` in tests.
+"""
+import logging
+import re
+import time
+import traceback
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+_active = ContextVar('query_detector', default=None)
+
+# Sent with the detector of every request the middleware watched.
+request_queries = Signal()
+
+_NORMALIZERS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    # IN lists and multi-row VALUES differ in length only.
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def fingerprint(sql):
+    """Return sql with its values replaced, equal for the same structure."""
+    for pattern, replacement in _NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+
+    return sql.strip()
+
+
+# Application files every request goes through, left out of stacks.
+INFRASTRUCTURE = (
+    'manage.py',
+    'core/middleware.py',
+    'core/instrumentation.py',
+    'core/db/',
+)
+STACK_LIMIT = 12
+
+
+def _is_app_frame(frame, base_dir):
+    if (not frame.filename.startswith(base_dir) or
+            'site-packages' in frame.filename):
+        return False
+
+    path = frame.filename[len(base_dir):].lstrip('/')
+    return not path.startswith(INFRASTRUCTURE)
+
+
+def app_stack():
+    """Return the innermost frames of the stack in the application code."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [frame for frame in traceback.extract_stack()
+              if _is_app_frame(frame, base_dir)]
+    return traceback.StackSummary.from_list(frames[-STACK_LIMIT:])
+
+
+class Query:
+    """One query seen by a detector, with its stack if it was captured."""
+
+    def __init__(self, sql, seconds, stack=None):
+        self.sql = sql
+        self.seconds = seconds
+        self.stack = stack
+        self.fingerprint = fingerprint(sql)
+
+
+class QueryDetector:
+    """Collect the queries run while active and find the suspicious ones.
+
+    Detectors are activated with ``with``; queries run in threads started
+    with ``sync_to_async`` from within count too. An outer active detector
+    sees the queries of inner ones.
+    """
+
+    def __init__(self, repeat_threshold=None, slow_ms=None):
+        self.repeat_threshold = (repeat_threshold or
+                                 settings.QUERY_REPEAT_THRESHOLD)
+        self.slow_seconds = (slow_ms if slow_ms is not None
+                             else settings.SLOW_QUERY_MS) / 1000
+        self.queries = []
+        self._counts = {}
+        self._parent = None
+        self._token = None
+
+    def __enter__(self):
+        self._parent = _active.get()
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active.reset(self._token)
+
+    def _needs_stack(self, query):
+        """Count a query, return whether it will be reported."""
+        count = self._counts.get(query.fingerprint, 0) + 1
+        self._counts[query.fingerprint] = count
+        return (count == self.repeat_threshold or
+                query.seconds >= self.slow_seconds)
+
+    def add(self, sql, seconds):
+        query = Query(sql, seconds)
+        detector = self
+        while detector is not None:
+            detector.queries.append(query)
+            if detector._needs_stack(query) and query.stack is None:
+                query.stack = app_stack()
+            detector = detector._parent
+
+    def repeated(self):
+        """Return the lists of queries repeated at least the threshold."""
+        groups = {}
+        for query in self.queries:
+            groups.setdefault(query.fingerprint, []).append(query)
+
+        return [queries for queries in groups.values()
+                if len(queries) >= self.repeat_threshold]
+
+    def slow(self):
+        """Return the queries slower than the threshold."""
+        return [query for query in self.queries
+                if query.seconds >= self.slow_seconds]
+
+    def has_problems(self):
+        """Return whether any query is repeated or slow."""
+        return bool(self.repeated() or self.slow())
+
+    def report(self):
+        """Return a description of the suspicious queries."""
+        sections = []
+        for queries in self.repeated():
+            stack = next(query.stack for query in queries
+                         if query.stack is not None)
+            sections.append(
+                f'Repeated {len(queries)} times: {queries[0].fingerprint}\n'
+                + ''.join(stack.format()))
+        for query in self.slow():
+            sections.append(
+                f'Slow query ({query.seconds * 1000:.1f} ms): {query.sql}\n'
+                + ''.join(query.stack.format()))
+
+        return '\n'.join(sections)
+
+
+def detect_query(execute, sql, params, many, context):
+    """Database execute wrapper passing queries to the active detector."""
+    detector = _active.get()
+    if detector is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        detector.add(sql, time.perf_counter() - start)
+
+
+def install_query_detector(sender, connection, **kwargs):
+    """Let detectors see the queries of every new database connection."""
+    if detect_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(detect_query)
+
+
+class QueryDetectorMiddleware:
+    """Log a warning for requests with repeated or slow queries.
+
+    Queries run while a streamed response is sent are not watched.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with QueryDetector() as detector:
+            response = self.get_response(request)
+        self.check(request, detector)
+        return response
+
+    async def __acall__(self, request):
+        with QueryDetector() as detector:
+            response = await self.get_response(request)
+        self.check(request, detector)
+        return response
+
+    def check(self, request, detector):
+        if detector.has_problems():
+            logger.warning('Suspicious queries in %s %s:\n%s',
+                           request.method, request.path, detector.report())
+        request_queries.send(
+            sender=self.__class__, request=request, detector=detector)
@@ -0,0 +1,70 @@
+"""
+Migration operations that are safe to run against a live database.
+
+Plain indexes are added with
+``django.contrib.postgres.operations.AddIndexConcurrently``. Unique
+constraints have no such operation: ``AddUniqueConstraintConcurrently``
+builds their index with ``CONCURRENTLY`` so reads and writes keep flowing
+while it is created. Like the rest of the schema, which uses GIN indexes
+and search vectors, these operations need PostgreSQL.
+"""
+from django.db.migrations.operations import AddConstraint
+from django.db.utils import NotSupportedError
+
+
+class ConcurrentOperationMixin:
+    """Refuse to build indexes concurrently inside a transaction."""
+    atomic = False
+
+    def _ensure_not_in_transaction(self, schema_editor):
+        if schema_editor.connection.in_atomic_block:
+            raise NotSupportedError(
+                'The %s operation cannot be executed inside a transaction '
+                '(set atomic = False on the migration).'
+                % self.__class__.__name__
+            )
+
+
+class AddUniqueConstraintConcurrently(ConcurrentOperationMixin,
+                                      AddConstraint):
+    """
+    Add a field based unique constraint without blocking writes.
+
+    On PostgreSQL the backing unique index is built concurrently first and
+    then attached to the table with ``ADD CONSTRAINT ... USING INDEX``,
+    which only takes a brief lock.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote = schema_editor.quote_name
+        name = quote(self.constraint.name)
+        table = quote(model._meta.db_table)
+        columns = ', '.join(
+            quote(model._meta.get_field(field).column)
+            for field in self.constraint.fields
+        )
+        schema_editor.execute(
+            f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} ({columns})'
+        )
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX '
+            f'{name}'
+        )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        self._ensure_not_in_transaction(schema_editor)
+        super().database_backwards(
+            app_label, schema_editor, from_state, to_state)
+
+    def describe(self):
+        return 'Concurrently create constraint %s on model %s' % (
+            self.constraint.name,
+            self.model_name,
+        )
@@ -0,0 +1,155 @@
+"""
+In-process database connection pool.
+
+Opening a PostgreSQL connection costs a TCP handshake, authentication and
+a backend process. Django keeps at most one connection per thread, which
+under ASGI, where every request runs its database work on a new thread,
+means a new connection per request. The pool is shared by the threads of
+a process: connections are checked out when Django opens one and checked
+back in when Django closes it, so a bounded set of them is reused.
+"""
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    """No connection was returned to a full pool in time."""
+
+
+def _close(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """Thread safe pool of at most ``max_size`` open connections.
+
+    ``checkout`` waits up to ``timeout`` seconds for a connection when all
+    of them are in use. When ``check`` is given, connections idle for
+    ``check_idle`` seconds or more are passed to it before being handed out
+    and discarded if it returns false. Connections returned moments ago are
+    handed out unchecked, sparing busy pools a round trip per checkout.
+    """
+
+    def __init__(self, max_size, timeout, check=None, check_idle=0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check = check
+        self.check_idle = check_idle
+        self._idle = []
+        self._size = 0
+        self._condition = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+
+    def checkout(self, connect):
+        """Return an idle connection, or one opened by calling connect."""
+        start = time.monotonic()
+        with self._condition:
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                remaining = start + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No database connection available within '
+                        f'{self.timeout:g} seconds ({self.max_size} in use).')
+                waited = True
+                self._condition.wait(remaining)
+
+            self.checkouts += 1
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.monotonic() - start
+            if self._idle:
+                connection, idle_since = self._idle.pop()
+            else:
+                connection = None
+                self._size += 1
+
+        if connection is not None:
+            if (self.check is None or
+                    time.monotonic() - idle_since < self.check_idle or
+                    self.check(connection)):
+                return connection
+            # Reuse the broken connection's slot for a new one.
+            _close(connection)
+
+        try:
+            return connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def checkin(self, connection, reusable=True):
+        """Return a connection, closing it unless it is reusable."""
+        if reusable:
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+        else:
+            self._discard(connection)
+
+    def _discard(self, connection):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        _close(connection)
+
+    def close(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            _close(connection)
+
+    def stats(self):
+        """Return the pool size and usage counters."""
+        with self._condition:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': self.wait_seconds,
+                'timeouts': self.timeouts,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, **options):
+    """Return this process's pool for a database alias, creating it.
+
+    Pools are keyed by process too, so workers forked after the pool was
+    created never share its connections.
+    """
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(**options)
+
+        return _pools[key]
+
+
+def pool_stats():
+    """Return the stats of this process's pools by database alias."""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = [(key[0], pool) for key, pool in _pools.items()
+                 if key[1] == pid]
+
+    return {alias: pool.stats() for alias, pool in pools}
@@ -0,0 +1,184 @@
+"""
+Read replica routing.
+
+Views using ``ReplicaReadMixin`` send the queries of safe requests to the
+aliases in ``DATABASE_REPLICAS``. Everything else reads from and writes to
+``default``, the primary: other views, management commands, queries inside
+transactions and, for ``REPLICA_STICKY_SECONDS`` after they sent a write,
+the reads of the same user, so they see their own changes. Replicas lagging
+more than ``REPLICA_MAX_LAG`` seconds are skipped until they catch up.
+Pins are kept in ``REPLICA_PIN_CACHE_ALIAS``, which the system checks
+require to be shared between worker processes.
+"""
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+_use_replicas = ContextVar('use_replicas', default=False)
+
+# Replica alias -> (monotonic time of the check, lag in seconds).
+_lags = {}
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def read_from_replicas(enabled=True):
+    """Send the reads of the current request or task to the replicas."""
+    _use_replicas.set(enabled)
+
+
+def _pin_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """Read from the primary for the user for the sticky window."""
+    if user.is_authenticated and settings.REPLICA_STICKY_SECONDS:
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].set(
+            _pin_key(user.pk), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    """Return whether the user wrote within the sticky window."""
+    if not user.is_authenticated:
+        return False
+
+    cache = caches[settings.REPLICA_PIN_CACHE_ALIAS]
+    return cache.get(_pin_key(user.pk), False)
+
+
+def replica_lag(alias):
+    """Return how many seconds a replica is behind the primary.
+
+    Only PostgreSQL streaming replicas report lag, others count as up to
+    date. Replicas that cannot be reached lag infinitely.
+    """
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        return float('inf')
+
+
+def _in_event_loop():
+    """Return whether the current thread runs an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    return True
+
+
+def _lag(alias):
+    """Return the lag of a replica, checked at most every interval.
+
+    Async views read ``QuerySet.db`` on the event loop, where the check
+    cannot query the replica. There the last known lag is used, an unknown
+    one counting as infinite, until a query run in a thread checks again.
+    """
+    now = time.monotonic()
+    checked_at, lag = _lags.get(alias, (None, float('inf')))
+    if ((checked_at is None or
+            now - checked_at >= settings.REPLICA_LAG_CHECK_INTERVAL) and
+            not _in_event_loop()):
+        lag = replica_lag(alias)
+        _lags[alias] = (now, lag)
+
+    return lag
+
+
+def available_replicas():
+    """Return the replicas lagging no more than ``REPLICA_MAX_LAG``."""
+    return [alias for alias in settings.DATABASE_REPLICAS
+            if _lag(alias) <= settings.REPLICA_MAX_LAG]
+
+
+class ReplicaRouter:
+    """Route reads to replicas when enabled and writes to the primary."""
+
+    def db_for_read(self, model, **hints):
+        if (not _use_replicas.get() or
+                connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+
+        replicas = available_replicas()
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+
+        return None
+
+
+class ReplicaMiddleware:
+    """Start every request reading from the primary.
+
+    Threads serve many requests, so the choice of a previous request must
+    not carry over. Views opt in with ``ReplicaReadMixin``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        read_from_replicas(False)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        read_from_replicas(False)
+        return await self.get_response(request)
+
+
+class ReplicaReadMixin:
+    """Serve safe requests from the replicas once the user is known.
+
+    Unsafe requests pin their user to the primary, so reads following a
+    write see it even while the replicas catch up.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not settings.DATABASE_REPLICAS:
+            return
+
+        if request.method in SAFE_METHODS:
+            read_from_replicas(not is_pinned(request.user))
+        else:
+            read_from_replicas(False)
+            pin_to_primary(request.user)
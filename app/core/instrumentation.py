@@ -0,0 +1,234 @@
+"""
+Request performance instrumentation.
+
+``InstrumentationMiddleware`` measures every request: its total time, the
+SQL queries it ran and their duration, recorded by a database execute
+wrapper, and the bytes it sent. Views using ``InstrumentedViewMixin`` also
+split their time into phases:
+
+- ``auth``: authentication, permission and throttling checks.
+- ``queryset``: SQL run by the view's handler.
+- ``serializer``: the rest of the handler, building and serializing objects.
+- ``render``: rendering the response data.
+
+The numbers are sent in a ``Server-Timing`` header, logged as JSON by the
+``core.instrumentation`` logger at INFO level and added to the process's
+metrics, see ``core.metrics``.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+PHASES = ('auth', 'queryset', 'serializer', 'render')
+# Methods kept as metric labels, any other is counted as "other" so clients
+# cannot add label values at will.
+METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE',
+    'CONNECT',
+))
+
+
+def _method_label(method):
+    """Return the metric label of a request method."""
+    return method if method in METHODS else 'other'
+
+
+class RequestMetrics:
+    """Measurements of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.bytes = 0
+        # Time and SQL duration when the view's handler started.
+        self.handler_started = None
+        self.handler_sql_seconds = 0.0
+        self.handler_finished = None
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Return the ``Server-Timing`` header value."""
+        entries = [f'{phase};dur={self.phases[phase] * 1000:.1f}'
+                   for phase in PHASES if phase in self.phases]
+        entries.append(f'db;dur={self.sql_seconds * 1000:.1f};'
+                       f'desc="{self.sql_count} queries"')
+        entries.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def current_metrics():
+    """Return the metrics of the request being served, if any."""
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing queries."""
+    request_metrics = _current.get()
+    if request_metrics is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        request_metrics.sql_count += 1
+        request_metrics.sql_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Record the queries of every new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentationMiddleware:
+    """Measure requests and report them when their response is sent.
+
+    The measurements stay current until the next request starts, so the
+    queries of streamed responses count too. Those are reported once their
+    content is exhausted, their ``Server-Timing`` header only covers the
+    time until streaming started.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        request_metrics = RequestMetrics()
+        _current.set(request_metrics)
+        response = self.get_response(request)
+        return self.process_response(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics = RequestMetrics()
+        _current.set(request_metrics)
+        response = await self.get_response(request)
+        return self.process_response(request, response, request_metrics)
+
+    def process_response(self, request, response, request_metrics):
+        if settings.SERVER_TIMING:
+            response.headers['Server-Timing'] = (
+                request_metrics.server_timing())
+
+        if not response.streaming:
+            request_metrics.bytes = len(response.content)
+            self.report(request, response, request_metrics)
+        elif response.is_async:
+            response.streaming_content = self._count_async_stream(
+                request, response, request_metrics, response.streaming_content)
+        else:
+            response.streaming_content = self._count_stream(
+                request, response, request_metrics, response.streaming_content)
+
+        return response
+
+    def _count_stream(self, request, response, request_metrics, content):
+        try:
+            for chunk in content:
+                request_metrics.bytes += len(chunk)
+                yield chunk
+        finally:
+            self.report(request, response, request_metrics)
+
+    async def _count_async_stream(self, request, response, request_metrics,
+                                  content):
+        try:
+            async for chunk in content:
+                request_metrics.bytes += len(chunk)
+                yield chunk
+        finally:
+            self.report(request, response, request_metrics)
+
+    def report(self, request, response, request_metrics):
+        """Log the request's measurements and add them to the metrics."""
+        match = request.resolver_match
+        endpoint = match.view_name if match else 'unmatched'
+        seconds = request_metrics.elapsed()
+        metrics.record(
+            (endpoint, _method_label(request.method),
+             str(response.status_code)),
+            seconds=seconds,
+            sql_count=request_metrics.sql_count,
+            sql_seconds=request_metrics.sql_seconds,
+            response_bytes=request_metrics.bytes,
+            phases=request_metrics.phases,
+        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'endpoint': endpoint,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'ms': round(seconds * 1000, 2),
+                'phases_ms': {
+                    phase: round(value * 1000, 2)
+                    for phase, value in request_metrics.phases.items()
+                },
+                'sql_count': request_metrics.sql_count,
+                'sql_ms': round(request_metrics.sql_seconds * 1000, 2),
+                'bytes': request_metrics.bytes,
+            }, separators=(',', ':')))
+
+
+class InstrumentedViewMixin:
+    """Time the phases of DRF views, see the module docstring."""
+
+    def initial(self, request, *args, **kwargs):
+        request_metrics = _current.get()
+        if request_metrics is None:
+            return super().initial(request, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            super().initial(request, *args, **kwargs)
+        finally:
+            request_metrics.handler_started = time.perf_counter()
+            request_metrics.handler_sql_seconds = request_metrics.sql_seconds
+            request_metrics.add(
+                'auth', request_metrics.handler_started - start)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        request_metrics = _current.get()
+        if (request_metrics is not None and
+                request_metrics.handler_started is not None):
+            handler = time.perf_counter() - request_metrics.handler_started
+            sql = (request_metrics.sql_seconds -
+                   request_metrics.handler_sql_seconds)
+            request_metrics.add('queryset', sql)
+            request_metrics.add('serializer', max(handler - sql, 0.0))
+
+        response = super().finalize_response(
+            request, response, *args, **kwargs)
+        if (request_metrics is not None and
+                hasattr(response, 'add_post_render_callback')):
+            request_metrics.handler_finished = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: request_metrics.add(
+                    'render',
+                    time.perf_counter() - request_metrics.handler_finished))
+
+        return response
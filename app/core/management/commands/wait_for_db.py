@@ -30,3 +30,12 @@ class Command(BaseCommand):
                     Waiting for 1 second...')
                 time.sleep(1)
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+        pool = getattr(connection, 'connection_pool', None)
+        if pool is not None:
+            # The connection came from the pool, closing returns it.
+            connection.close()
+            stats = pool.stats()
+            self.stdout.write(self.style.SUCCESS(
+                f"Connection pool ready: {stats['idle']} of "
+                f"{stats['max_size']} connections idle."))
@@ -0,0 +1,272 @@
+"""
+Request metrics aggregated across worker processes.
+
+Every process adds its requests to in-memory counters by endpoint, method
+and status. With ``METRICS_DIR`` set, a background thread of each process
+writes them with its connection pool stats to ``<pid>.json`` in that
+directory every ``METRICS_WRITE_INTERVAL`` seconds, and ``/metrics`` merges
+the files of all uWSGI or uvicorn workers into the Prometheus text format.
+It is only served to requests bearing ``METRICS_TOKEN``.
+"""
+import atexit
+import hmac
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+from core.db.pool import pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the request duration histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LABELS = ('endpoint', 'method', 'status')
+# Pool stats describing the current state rather than counting events.
+POOL_GAUGES = ('max_size', 'size', 'idle', 'in_use')
+POOL_HELP = {
+    'max_size': 'Connections the pools may open.',
+    'size': 'Connections open in the pools.',
+    'idle': 'Idle connections in the pools.',
+    'in_use': 'Connections checked out of the pools.',
+    'checkouts': 'Connections checked out.',
+    'waits': 'Checkouts that waited for a connection.',
+    'wait_seconds': 'Time spent waiting for connections.',
+    'timeouts': 'Checkouts that timed out.',
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_requests = {}
+_lock = threading.Lock()
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+def _empty():
+    return {
+        'count': 0,
+        'seconds': 0.0,
+        'buckets': [0] * len(BUCKETS),
+        'sql_count': 0,
+        'sql_seconds': 0.0,
+        'response_bytes': 0,
+        'phases': {},
+    }
+
+
+def record(labels, seconds, sql_count, sql_seconds, response_bytes,
+           phases):
+    """Add a request to this process's metrics."""
+    with _lock:
+        stats = _requests.setdefault(labels, _empty())
+        stats['count'] += 1
+        stats['seconds'] += seconds
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats['buckets'][index] += 1
+        stats['sql_count'] += sql_count
+        stats['sql_seconds'] += sql_seconds
+        stats['response_bytes'] += response_bytes
+        for phase, value in phases.items():
+            stats['phases'][phase] = stats['phases'].get(phase, 0.0) + value
+
+    _start_writer()
+
+
+def snapshot():
+    """Return this process's metrics."""
+    with _lock:
+        requests = [
+            {'labels': list(labels), **stats,
+             'buckets': list(stats['buckets']),
+             'phases': dict(stats['phases'])}
+            for labels, stats in _requests.items()
+        ]
+
+    return {'pid': os.getpid(), 'requests': requests, 'pools': pool_stats()}
+
+
+def write_snapshot():
+    """Write this process's metrics to ``METRICS_DIR``."""
+    if not settings.METRICS_DIR:
+        return
+
+    directory = Path(settings.METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    data = snapshot()
+    # Write then rename, so readers never see a partial file.
+    with tempfile.NamedTemporaryFile(
+            'w', dir=directory, suffix='.tmp', delete=False) as file:
+        json.dump(data, file)
+    os.replace(file.name, directory / f"{data['pid']}.json")
+
+
+def _write_periodically():
+    while True:
+        time.sleep(settings.METRICS_WRITE_INTERVAL)
+        try:
+            write_snapshot()
+        except OSError:
+            logger.exception('Could not write the metrics snapshot.')
+
+
+def _start_writer():
+    """Start the thread writing this process's metrics, once per process.
+
+    Threads do not survive forks, so workers forked from a process that
+    already started one start their own.
+    """
+    global _writer_pid
+    if not settings.METRICS_DIR or _writer_pid == os.getpid():
+        return
+
+    with _writer_lock:
+        if _writer_pid == os.getpid():
+            return
+        _writer_pid = os.getpid()
+        threading.Thread(
+            target=_write_periodically, name='metrics-writer', daemon=True,
+        ).start()
+        # Keep the requests served since the last write of exiting workers.
+        atexit.register(write_snapshot)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+def collect():
+    """Return the metrics of all processes merged.
+
+    Counters include processes that exited, pool gauges only the running
+    ones.
+    """
+    write_snapshot()
+    requests = {}
+    pools = {}
+    for path in Path(settings.METRICS_DIR).glob('*.json'):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+
+        for item in data['requests']:
+            stats = requests.setdefault(tuple(item['labels']), _empty())
+            for key in ('count', 'seconds', 'sql_count', 'sql_seconds',
+                        'response_bytes'):
+                stats[key] += item[key]
+            stats['buckets'] = [
+                total + count
+                for total, count in zip(stats['buckets'], item['buckets'])
+            ]
+            for phase, value in item['phases'].items():
+                stats['phases'][phase] = (
+                    stats['phases'].get(phase, 0.0) + value)
+
+        running = _is_running(data['pid'])
+        for alias, item in data['pools'].items():
+            merged = pools.setdefault(alias, {})
+            for key, value in item.items():
+                if running or key not in POOL_GAUGES:
+                    merged[key] = merged.get(key, 0) + value
+
+    return requests, pools
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _labels(labels):
+    items = ','.join(f'{name}="{_escape(value)}"'
+                     for name, value in labels.items())
+    return '{' + items + '}'
+
+
+def render(requests, pools):
+    """Return merged metrics in the Prometheus text format."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for suffix, labels, value in samples:
+            lines.append(f'{name}{suffix}{_labels(labels)} {value}')
+
+    by_labels = sorted(requests.items())
+    labelled = [(dict(zip(LABELS, labels)), stats)
+                for labels, stats in by_labels]
+
+    histogram = []
+    for labels, stats in labelled:
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            histogram.append(('_bucket', {**labels, 'le': bound}, count))
+        histogram.append(('_bucket', {**labels, 'le': '+Inf'},
+                          stats['count']))
+        histogram.append(('_sum', labels, stats['seconds']))
+        histogram.append(('_count', labels, stats['count']))
+    metric('app_http_request_duration_seconds', 'histogram',
+           'Time spent serving requests.', histogram)
+    metric('app_http_request_phase_seconds_total', 'counter',
+           'Time spent in each phase of DRF views.', [
+               ('', {**labels, 'phase': phase}, value)
+               for labels, stats in labelled
+               for phase, value in sorted(stats['phases'].items())
+           ])
+    metric('app_db_queries_total', 'counter',
+           'SQL queries run by requests.',
+           [('', labels, stats['sql_count']) for labels, stats in labelled])
+    metric('app_db_query_duration_seconds_total', 'counter',
+           'Time spent running the SQL queries of requests.',
+           [('', labels, stats['sql_seconds'])
+            for labels, stats in labelled])
+    metric('app_http_response_bytes_total', 'counter',
+           'Response body bytes sent.',
+           [('', labels, stats['response_bytes'])
+            for labels, stats in labelled])
+
+    for key, help_text in POOL_HELP.items():
+        if key in POOL_GAUGES:
+            name, kind = f'app_db_pool_{key}', 'gauge'
+        else:
+            name, kind = f'app_db_pool_{key}_total', 'counter'
+        metric(name, kind, help_text, [
+            ('', {'alias': alias}, stats.get(key, 0))
+            for alias, stats in sorted(pools.items())
+        ])
+
+    return '\n'.join(lines) + '\n'
+
+
+def _is_authorized(request):
+    """Return whether the request bears the metrics token."""
+    return hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(),
+        f'Bearer {settings.METRICS_TOKEN}'.encode(),
+    )
+
+
+def metrics_view(request):
+    """Serve the metrics of all processes to Prometheus."""
+    if not settings.METRICS_DIR or not settings.METRICS_TOKEN:
+        raise Http404
+    if not _is_authorized(request):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+
+    return HttpResponse(render(*collect()), content_type=CONTENT_TYPE)
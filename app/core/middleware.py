@@ -0,0 +1,170 @@
+"""
+Response compression middleware.
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/vnd.oai.openapi',
+    'application/javascript',
+    'text/',
+)
+
+
+class GzipCompressor:
+    """Incremental gzip compression."""
+    encoding = 'gzip'
+
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        """Return the compressed data, flushed so it can be sent now."""
+        return (self._compressor.compress(data) +
+                self._compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        """Return the end of the compressed stream."""
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    """Incremental brotli compression."""
+    encoding = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(
+            quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    def compress(self, data):
+        """Return the compressed data, flushed so it can be sent now."""
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        """Return the end of the compressed stream."""
+        return self._compressor.finish()
+
+
+COMPRESSORS = [GzipCompressor]
+if brotli is not None:
+    COMPRESSORS.insert(0, BrotliCompressor)
+
+
+def accepted_encodings(request):
+    """Return the content codings the client accepts."""
+    accepted = set()
+    for item in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip, whichever the client prefers.
+
+    Brotli is used when the ``brotli`` package is installed. Responses
+    smaller than ``COMPRESSION_MIN_SIZE`` bytes, already encoded or not
+    text-like are sent as they are. Streaming responses are compressed
+    chunk by chunk, so they keep streaming.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _select_compressor(self, request, response):
+        """Return the compressor class to use, or None."""
+        if response.has_header('Content-Encoding'):
+            return None
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return None
+        if (not response.streaming and
+                len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return None
+
+        accepted = accepted_encodings(request)
+        for compressor in COMPRESSORS:
+            if compressor.encoding in accepted:
+                return compressor
+
+        return None
+
+    def _compress_stream(self, compressor, content):
+        for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    async def _compress_async_stream(self, compressor, content):
+        async for chunk in content:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        """Return the response compressed for the client, if worth it."""
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressor_class = self._select_compressor(request, response)
+        if compressor_class is None:
+            return response
+
+        compressor = compressor_class()
+        if not response.streaming:
+            compressed = compressor.compress(response.content)
+            compressed += compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        elif response.is_async:
+            response.streaming_content = self._compress_async_stream(
+                compressor, response.streaming_content)
+        else:
+            response.streaming_content = self._compress_stream(
+                compressor, response.streaming_content)
+            del response.headers['Content-Length']
+
+        # The encoded body differs from the identity one, keep the ETag
+        # usable for conditional requests but make it weak.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = compressor.encoding
+
+        return response
@@ -0,0 +1,35 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_recipe_image'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(
+                fields=['user', '-name', '-id'],
+                name='ingredient_user_name_id_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=models.Index(
+                fields=['user', '-id'],
+                name='recipe_user_id_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(
+                fields=['user', '-name', '-id'],
+                name='tag_user_name_id_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, model_name, related_name):
+    """Merge rows sharing a (user, name) pair into the oldest one."""
+    model = apps.get_model('core', model_name)
+    recipe = apps.get_model('core', 'Recipe')
+    through = getattr(recipe, related_name).through
+    column = f'{model_name.lower()}_id'
+
+    duplicates = model.objects.values('user', 'name').annotate(
+        keep_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+
+    for group in duplicates.iterator():
+        keep_id = group['keep_id']
+        extra_ids = list(model.objects.filter(
+            user=group['user'], name=group['name'],
+        ).exclude(id=keep_id).values_list('id', flat=True))
+
+        for extra_id in extra_ids:
+            linked = through.objects.filter(**{column: keep_id}).values(
+                'recipe_id')
+            through.objects.filter(
+                **{column: extra_id}, recipe_id__in=linked,
+            ).delete()
+            through.objects.filter(**{column: extra_id}).update(
+                **{column: keep_id})
+        model.objects.filter(id__in=extra_ids).delete()
+
+
+def merge_duplicate_names(apps, schema_editor):
+    merge_duplicates(apps, 'Tag', 'tags')
+    merge_duplicates(apps, 'Ingredient', 'ingredients')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recipe_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_names,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+from core.db.operations import AddUniqueConstraintConcurrently
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_dedupe_tag_ingredient_names'),
+    ]
+
+    operations = [
+        AddUniqueConstraintConcurrently(
+            model_name='tag',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'name'),
+                name='unique_tag_user_name',
+            ),
+        ),
+        AddUniqueConstraintConcurrently(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'name'),
+                name='unique_ingredient_user_name',
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    """Queue variants for images uploaded before processing existed."""
+    recipe = apps.get_model('core', 'Recipe')
+    recipe.objects.exclude(image__isnull=True).exclude(image='').update(
+        image_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_user_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(blank=True, choices=[('', 'No image'), ('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(
+            queue_existing_images,
+            migrations.RunPython.noop,
+        ),
+    ]
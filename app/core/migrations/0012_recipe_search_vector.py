@@ -0,0 +1,58 @@
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField
+
+
+def fill_search_vectors(apps, schema_editor):
+    """Compute the search vectors of existing recipes."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    recipe = apps.get_model('core', 'Recipe')
+    config = settings.RECIPE_SEARCH_CONFIG
+
+    def linked_names(field_name, target):
+        names = getattr(recipe, field_name).through.objects.filter(
+            recipe_id=OuterRef('pk'),
+        ).values('recipe_id').annotate(
+            names=StringAgg(f'{target}__name', delimiter=' '),
+        ).values('names')
+        return Subquery(names, output_field=TextField())
+
+    recipe.objects.using(schema_editor.connection.alias).update(
+        search_vector=(
+            SearchVector('title', weight='A', config=config) +
+            SearchVector(
+                linked_names('tags', 'tag'),
+                linked_names('ingredients', 'ingredient'),
+                weight='B',
+                config=config,
+            ) +
+            SearchVector('description', weight='C', config=config)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(
+            fill_search_vectors,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_recipe_counts(apps, schema_editor):
+    """Count the recipes of existing tags and ingredients."""
+    recipe = apps.get_model('core', 'Recipe')
+    for field_name, target in (('tags', 'tag'), ('ingredients', 'ingredient')):
+        through = getattr(recipe, field_name).through
+        model = apps.get_model('core', target)
+        links = through.objects.filter(
+            **{target: models.OuterRef('pk')}
+        ).order_by().values(target).annotate(total=models.Count('*'))
+        model.objects.using(schema_editor.connection.alias).update(
+            recipe_count=Coalesce(
+                models.Subquery(
+                    links.values('total'),
+                    output_field=models.IntegerField(),
+                ),
+                models.Value(0),
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_recipe_time_price_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            fill_recipe_counts,
+            migrations.RunPython.noop,
+        ),
+    ]
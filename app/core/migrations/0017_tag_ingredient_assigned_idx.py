@@ -0,0 +1,30 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0016_tag_ingredient_recipe_count'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(
+                condition=models.Q(recipe_count__gt=0),
+                fields=['user', '-name', '-id'],
+                name='tag_user_assigned_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=models.Index(
+                condition=models.Q(recipe_count__gt=0),
+                fields=['user', '-name', '-id'],
+                name='ingredient_user_assigned_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0017_tag_ingredient_assigned_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.BTreeIndex(
+                models.F('user'),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'),
+                    name='text_pattern_ops',
+                ),
+                name='tag_name_prefix_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='ingredient',
+            index=django.contrib.postgres.indexes.BTreeIndex(
+                models.F('user'),
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper('name'),
+                    name='text_pattern_ops',
+                ),
+                name='ingredient_name_prefix_idx',
+            ),
+        ),
+    ]
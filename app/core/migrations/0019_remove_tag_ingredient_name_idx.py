@@ -0,0 +1,32 @@
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0018_tag_ingredient_name_prefix_idx'),
+    ]
+
+    operations = [
+        # The unique (user, name) index serves the same lookups and pages.
+        RemoveIndexConcurrently(
+            model_name='tag',
+            name='tag_user_name_id_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ingredient',
+            name='ingredient_user_name_id_idx',
+        ),
+        # Indexing recipe_count made every recount a non-HOT update.
+        RemoveIndexConcurrently(
+            model_name='tag',
+            name='tag_user_assigned_idx',
+        ),
+        RemoveIndexConcurrently(
+            model_name='ingredient',
+            name='ingredient_user_assigned_idx',
+        ),
+    ]
@@ -5,7 +5,10 @@ import uuid
 import os
 
 from django.conf import settings
+from django.contrib.postgres.indexes import BTreeIndex, GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -59,6 +62,14 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 class Recipe(models.Model):
     """Recipe object."""
+
+    class ImageStatus(models.TextChoices):
+        NONE = '', 'No image'
+        PENDING = 'pending', 'Pending'
+        PROCESSING = 'processing', 'Processing'
+        READY = 'ready', 'Ready'
+        FAILED = 'failed', 'Failed'
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -71,6 +82,30 @@ class Recipe(models.Model):
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image_status = models.CharField(
+        max_length=20,
+        choices=ImageStatus.choices,
+        default=ImageStatus.NONE,
+        blank=True,
+    )
+    image_variants = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'], name='recipe_user_id_idx'),
+            models.Index(fields=['user', '-updated_at'],
+                         name='recipe_user_updated_idx'),
+            models.Index(fields=['user', 'time_minutes', 'id'],
+                         name='recipe_user_time_idx'),
+            models.Index(fields=['user', 'price', 'id'],
+                         name='recipe_user_price_idx'),
+            # GIN indexes, like the search vector, need PostgreSQL.
+            GinIndex(fields=['search_vector'],
+                     name='recipe_search_vector_idx'),
+        ]
 
     def __str__(self):
         return str(self.title)
@@ -83,6 +118,20 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'),
+                     name='tag_name_trgm_idx'),
+            BTreeIndex(models.F('user'),
+                       OpClass(Upper('name'), name='text_pattern_ops'),
+                       name='tag_name_prefix_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_tag_user_name'),
+        ]
 
     def __str__(self):
         return self.name
@@ -95,6 +144,20 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         models.CASCADE,
     )
+    recipe_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'),
+                     name='ingredient_name_trgm_idx'),
+            BTreeIndex(models.F('user'),
+                       OpClass(Upper('name'), name='text_pattern_ops'),
+                       name='ingredient_name_prefix_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_ingredient_user_name'),
+        ]
 
     def __str__(self):
         return self.name
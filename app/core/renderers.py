@@ -0,0 +1,88 @@
+"""
+Fast JSON renderer for the APIs.
+
+Uses orjson when it is installed and produces the same bytes as DRF's
+``JSONRenderer``: values orjson has no native, identical encoding for
+(datetimes, dates, times, Decimals, lazy strings...) go through DRF's own
+encoder. Requests for indented output, non default JSON settings or values
+orjson rejects fall back to ``JSONRenderer``, and so does data holding floats
+orjson writes differently: non-finite ones, which it turns into ``null``
+where strict JSON raises, and those Python writes with an exponent
+(``1e+20``, ``1e-05``).
+"""
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Python writes floats outside of this range with an exponent.
+FIXED_FLOAT_RANGE = (1e-4, 1e16)
+
+
+def _orjson_float(value):
+    """Return whether orjson writes the float like ``json.dumps``."""
+    if not math.isfinite(value):
+        return False
+    value = abs(value)
+    return value == 0 or FIXED_FLOAT_RANGE[0] <= value < FIXED_FLOAT_RANGE[1]
+
+
+def _has_foreign_floats(data):
+    """Return whether the data holds floats orjson writes differently."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not _orjson_float(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding with orjson when available."""
+
+    def _can_use_orjson(self, accepted_media_type, renderer_context):
+        """Return whether orjson's output matches the requested output."""
+        return (
+            orjson is not None and
+            self.compact and
+            not self.ensure_ascii and
+            self.strict and
+            self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if data is None:
+            return b''
+        if (not self._can_use_orjson(accepted_media_type, renderer_context) or
+                _has_foreign_floats(data)):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # Integers over 64 bits, non string keys and the like.
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        # Escape the separators JSONRenderer escapes for JavaScript.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028',
+        ).replace(
+            b'\xe2\x80\xa9', b'\\u2029',
+        )
@@ -0,0 +1,142 @@
+"""
+Full-text search over recipes and autocomplete of tags and ingredients.
+
+On PostgreSQL every recipe stores a ``tsvector`` of its title, the names of
+its tags and ingredients and its description, weighted in that order. It
+is kept up to date by the signal handlers in ``core.signals`` and matched
+through a GIN index. The vectors and the GIN indexes below need
+PostgreSQL, which the project runs on; the schema cannot be built on other
+databases. Queries through connections to other databases fall back to
+case insensitive substring matching.
+
+Tag and ingredient names are autocompleted by prefix or, on PostgreSQL, by
+trigram word similarity. Prefixes are looked up in a ``text_pattern_ops``
+btree on the user and the upper cased name, similar words in a
+``gin_trgm_ops`` index on the upper cased name.
+"""
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import (
+    BooleanField,
+    Case,
+    Exists,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Upper
+
+
+def search_supported(using=DEFAULT_DB_ALIAS):
+    """Return whether the database stores recipe search vectors."""
+    return connections[using].vendor == 'postgresql'
+
+
+def _linked_names(model, field_name):
+    """Return a subquery of the names linked to a recipe through a field."""
+    relation = getattr(model, field_name)
+    target = relation.rel.model._meta.model_name
+    names = relation.through.objects.filter(
+        recipe_id=OuterRef('pk'),
+    ).values('recipe_id').annotate(
+        names=StringAgg(f'{target}__name', delimiter=' '),
+    ).values('names')
+
+    return Subquery(names, output_field=TextField())
+
+
+def search_vector(model):
+    """Return the expression computing the search vector of recipes."""
+    config = settings.RECIPE_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector(
+            _linked_names(model, 'tags'),
+            _linked_names(model, 'ingredients'),
+            weight='B',
+            config=config,
+        ) +
+        SearchVector('description', weight='C', config=config)
+    )
+
+
+def search_vector_update(queryset):
+    """Return the update() kwargs refreshing the search vector, if any."""
+    if not search_supported(queryset.db):
+        return {}
+
+    return {'search_vector': search_vector(queryset.model)}
+
+
+def update_search_vectors(queryset):
+    """Recompute the search vectors of the recipes in queryset."""
+    fields = search_vector_update(queryset)
+    if fields:
+        queryset.update(**fields)
+
+
+def search_recipes(queryset, terms):
+    """Filter recipes matching terms, annotated with search_rank."""
+    if search_supported(queryset.db):
+        query = SearchQuery(
+            terms,
+            search_type='websearch',
+            config=settings.RECIPE_SEARCH_CONFIG,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+        )
+
+    model = queryset.model
+    for term in terms.split():
+        matches = Q(title__icontains=term) | Q(description__icontains=term)
+        for field_name in ('tags', 'ingredients'):
+            relation = getattr(model, field_name)
+            target = relation.rel.model._meta.model_name
+            matches |= Exists(relation.through.objects.filter(
+                recipe_id=OuterRef('pk'),
+                **{f'{target}__name__icontains': term},
+            ))
+        queryset = queryset.filter(matches)
+
+    return queryset
+
+
+def autocomplete(queryset, term):
+    """Return the objects whose name matches term, best matches first.
+
+    Names starting with term come first, followed on PostgreSQL by names
+    containing a word similar to term and elsewhere by names containing
+    term.
+    """
+    term = term.upper()
+    queryset = queryset.alias(upper_name=Upper('name')).alias(
+        is_prefix=Case(
+            When(upper_name__startswith=term, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+    prefix = Q(upper_name__startswith=term)
+
+    if not search_supported(queryset.db):
+        return queryset.filter(
+            prefix | Q(upper_name__contains=term)
+        ).order_by('-is_prefix', 'name')
+
+    return queryset.filter(
+        prefix | Q(upper_name__trigram_word_similar=term)
+    ).alias(
+        similarity=TrigramWordSimilarity(term, 'upper_name'),
+    ).order_by('-is_prefix', '-similarity', 'name')
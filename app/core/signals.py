@@ -0,0 +1,178 @@
+"""
+Signal handlers keeping recipe modification times, search vectors and the
+recipe counts of tags and ingredients up to date.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.db import transaction
+from django.db.models import QuerySet
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.counts import stale_recipe_counts, update_recipe_counts
+from core.models import Recipe, Tag, Ingredient
+from core.search import search_vector_update, update_search_vectors
+
+
+def touch_recipes(**filters):
+    """Set updated_at to now and refresh the recipes matching filters."""
+    recipes = Recipe.objects.filter(**filters)
+    recipes.update(
+        updated_at=timezone.now(),
+        **search_vector_update(recipes),
+    )
+
+
+def _linked_recipe_ids(instance):
+    """Return the ids of the recipes linked to a tag or ingredient."""
+    return list(Recipe.objects.filter(
+        **{f'{instance._meta.model_name}s': instance}
+    ).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_saved_recipe(sender, instance, **kwargs):
+    """Refresh the search vector of a saved recipe."""
+    update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_relinked_recipes(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Mark recipes as modified when their tags or ingredients change."""
+    if reverse and action == 'pre_clear':
+        # The links are gone by post_clear, remember whom they pointed to.
+        instance._cleared_recipe_ids = _linked_recipe_ids(instance)
+    elif not action.startswith('post_'):
+        return
+    elif not reverse:
+        touch_recipes(pk=instance.pk)
+    elif action == 'post_clear':
+        touch_recipes(pk__in=instance.__dict__.pop('_cleared_recipe_ids', []))
+    elif pk_set:
+        touch_recipes(pk__in=pk_set)
+
+
+def _linked_ids(recipes, model):
+    """Return the ids of the tags or ingredients linked to recipes."""
+    field_name = model._meta.model_name
+    return set(model.recipe_set.through.objects.filter(
+        recipe__in=recipes,
+    ).values_list(f'{field_name}_id', flat=True))
+
+
+def recount(model, pks):
+    """Refresh the recipe counts of the given tags or ingredients."""
+    if pks:
+        update_recipe_counts(model.objects.filter(pk__in=pks))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def recount_relinked(sender, instance, action, reverse, model, pk_set,
+                     **kwargs):
+    """Refresh the recipe counts of tags or ingredients relinked."""
+    if reverse:
+        if action.startswith('post_'):
+            recount(type(instance), [instance.pk])
+        return
+
+    stash = f'_cleared_{model._meta.model_name}_ids'
+    if action == 'pre_clear':
+        setattr(instance, stash, _linked_ids([instance.pk], model))
+    elif action == 'post_clear':
+        recount(model, instance.__dict__.pop(stash, []))
+    elif action in ('post_add', 'post_remove'):
+        recount(model, pk_set)
+
+
+def recount_links(links):
+    """Refresh the recipe counts of the tags and ingredients in links."""
+    for model, pks in links.items():
+        recount(model, pks)
+
+
+def recount_users(user_ids):
+    """Refresh the wrong recipe counts of the users' tags and ingredients."""
+    for model in (Tag, Ingredient):
+        stale = stale_recipe_counts(model.objects.filter(
+            user_id__in=user_ids, recipe_count__gt=0))
+        recount(model, list(stale.values_list('pk', flat=True)))
+
+
+def _deleted_recipes(instance, origin):
+    """Return the recipes the ``delete()`` of origin removes, if known.
+
+    Recipes deleted along with another object, such as their user, are
+    only seen one at a time, and None is returned for them.
+    """
+    if origin is None or isinstance(origin, Recipe):
+        return [instance.pk]
+    if isinstance(origin, QuerySet) and origin.model is Recipe:
+        return origin
+
+    return None
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_links_of_deleted(sender, instance, using, origin=None,
+                              **kwargs):
+    """Remember the tags and ingredients of the recipes being deleted.
+
+    The links of all the recipes one ``delete()`` call removes are read
+    with one query per model, on the first recipe, and recounted once, when
+    the transaction commits. When the deleted recipes are not known up
+    front, the tags and ingredients of their users, which are the only ones
+    recipes link to, are recounted instead.
+    """
+    batch = instance if origin is None else origin
+    deleted = batch.__dict__.get('_deleted_links')
+    if deleted is None:
+        recipes = _deleted_recipes(instance, origin)
+        links = {
+            model: set() if recipes is None else _linked_ids(recipes, model)
+            for model in (Tag, Ingredient)
+        }
+        user_ids = None if recipes is not None else set()
+        deleted = batch._deleted_links = (links, user_ids)
+
+        def recount_deleted():
+            batch.__dict__.pop('_deleted_links', None)
+            recount_links(links)
+            if user_ids:
+                recount_users(user_ids)
+
+        transaction.on_commit(recount_deleted, using=using)
+
+    user_ids = deleted[1]
+    if user_ids is not None:
+        user_ids.add(instance.user_id)
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_of_deleted(sender, instance, **kwargs):
+    """Remember the recipes linked to a tag or ingredient being deleted."""
+    instance._deleted_recipe_ids = _linked_recipe_ids(instance)
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def touch_recipes_of_deleted(sender, instance, **kwargs):
+    """Mark recipes as modified when a linked tag or ingredient is deleted."""
+    recipe_ids = instance.__dict__.pop('_deleted_recipe_ids', None)
+    if recipe_ids:
+        touch_recipes(pk__in=recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_of_renamed(sender, instance, created, **kwargs):
+    """Mark recipes as modified when a linked tag or ingredient changes."""
+    if not created:
+        touch_recipes(**{f'{sender._meta.model_name}s': instance})
@@ -0,0 +1,67 @@
+"""
+Mixins for test cases.
+"""
+import tempfile
+
+from django.test import modify_settings, override_settings
+
+from core.db.detector import request_queries
+
+
+class QueryDetectorMixin:
+    """Fail tests whose requests run repeated or slow queries.
+
+    Every request made through the test client is watched by
+    ``QueryDetectorMiddleware``. Set ``query_budget`` to also fail requests
+    running more queries than that.
+    """
+    query_budget = None
+
+    def setUp(self):
+        self._query_failures = []
+        request_queries.connect(self._check_request_queries)
+        self.addCleanup(
+            request_queries.disconnect, self._check_request_queries)
+        middleware = modify_settings(MIDDLEWARE={
+            'append': 'core.db.detector.QueryDetectorMiddleware',
+        })
+        middleware.enable()
+        self.addCleanup(middleware.disable)
+        self.addCleanup(self._assert_queries_ok)
+        super().setUp()
+
+    def _check_request_queries(self, sender, request, detector, **kwargs):
+        request_name = f'{request.method} {request.get_full_path()}'
+        if detector.has_problems():
+            self._query_failures.append(
+                f'Suspicious queries in {request_name}:\n'
+                f'{detector.report()}')
+        if (self.query_budget is not None and
+                len(detector.queries) > self.query_budget):
+            self._query_failures.append(
+                f'{request_name} ran {len(detector.queries)} queries, '
+                f'over the budget of {self.query_budget}:\n' +
+                '\n'.join(query.sql for query in detector.queries))
+
+    def _assert_queries_ok(self):
+        if self._query_failures:
+            self.fail('\n\n'.join(self._query_failures))
+
+
+class SharedCacheMixin:
+    """Run tests with a default cache shared between processes.
+
+    Features only trusting caches every worker process sees stay off with
+    the process-local cache of the default settings.
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        caches = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory.name,
+        }})
+        caches.enable()
+        self.addCleanup(caches.disable)
+        super().setUp()
@@ -1,6 +1,7 @@
 """
 Test custom django management command.
 """
+from io import StringIO
 from unittest.mock import patch
 from psycopg2 import OperationalError as Psycopg2Error
 
@@ -31,3 +32,16 @@ class CommandTests(SimpleTestCase):
         call_command('wait_for_db')
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('core.management.commands.wait_for_db.connection')
+    def test_wait_for_db_pool(self, patched_connection, patched_check):
+        """Test waiting for the database checks the connection pool."""
+        patched_connection.connection_pool.stats.return_value = {
+            'idle': 1, 'max_size': 10}
+        out = StringIO()
+
+        call_command('wait_for_db', stdout=out)
+
+        patched_connection.ensure_connection.assert_called_once()
+        patched_connection.close.assert_called_once()
+        self.assertIn('Connection pool ready: 1 of 10', out.getvalue())
@@ -0,0 +1,149 @@
+"""
+Tests for the recipe counts of tags and ingredients.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Ingredient, Recipe, Tag
+from recipe.serializers import RecipeSerializer
+
+
+class RecipeCountTests(TestCase):
+    """Test keeping recipe counts up to date."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Breakfast', 'Dinner', 'Vegan')
+        ]
+
+    def _recipe(self, title='Soup'):
+        return Recipe.objects.create(
+            user=self.user, title=title, time_minutes=5,
+            price=Decimal('1.00'))
+
+    def assertCounts(self, model, expected):
+        """Assert the recipe counts of the user's objects by name."""
+        counts = dict(model.objects.filter(
+            user=self.user).values_list('name', 'recipe_count'))
+        self.assertEqual(counts, {**dict.fromkeys(counts, 0), **expected})
+
+    def test_add_remove_and_clear(self):
+        """Test linking and unlinking recipes updates the counts."""
+        breakfast, dinner, vegan = self.tags
+        first, second = self._recipe(), self._recipe('Salad')
+
+        first.tags.add(breakfast, dinner)
+        second.tags.add(dinner)
+        second.tags.add(dinner)
+        self.assertCounts(Tag, {'Breakfast': 1, 'Dinner': 2})
+
+        first.tags.remove(breakfast, vegan)
+        self.assertCounts(Tag, {'Dinner': 2})
+
+        first.tags.set([vegan])
+        second.tags.clear()
+        self.assertCounts(Tag, {'Vegan': 1})
+
+    def test_reverse_relation(self):
+        """Test changes made from the tag side update its count."""
+        vegan = self.tags[2]
+        vegan.recipe_set.add(self._recipe(), self._recipe('Salad'))
+        self.assertCounts(Tag, {'Vegan': 2})
+
+        vegan.recipe_set.clear()
+        self.assertCounts(Tag, {})
+
+    def test_delete_recipe(self):
+        """Test deleting recipes decrements the counts of their links."""
+        recipe = self._recipe()
+        recipe.tags.add(*self.tags)
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.ingredients.add(salt)
+        self._recipe('Salad').tags.add(self.tags[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Recipe.objects.filter(pk=recipe.pk).delete()
+
+        self.assertCounts(Tag, {'Breakfast': 1})
+        self.assertCounts(Ingredient, {})
+
+    def test_delete_recipes_recounted_once(self):
+        """Test deleting many recipes recounts their links once."""
+        for i in range(5):
+            self._recipe(f'Recipe {i}').tags.add(*self.tags[:2])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            Recipe.objects.filter(user=self.user).delete()
+        self.assertCounts(Tag, {'Breakfast': 5, 'Dinner': 5})
+
+        recounts = [callback for callback in callbacks
+                    if callback.__name__ == 'recount_deleted']
+        self.assertEqual(len(recounts), 1)
+        with self.assertNumQueries(1):
+            recounts[0]()
+        self.assertCounts(Tag, {})
+
+    def test_delete_recipes_reads_links_once(self):
+        """Test deleting recipes reads their links in fixed queries."""
+        def deletes(count):
+            for i in range(count):
+                self._recipe(f'Recipe {i}').tags.add(*self.tags)
+            with CaptureQueriesContext(connection) as queries:
+                Recipe.objects.filter(user=self.user).delete()
+            return len(queries)
+
+        self.assertEqual(deletes(5), deletes(1))
+
+    def test_delete_user(self):
+        """Test recipes deleted with their user leave others' counts."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        recipe = Recipe.objects.create(
+            user=other, title='Stew', time_minutes=5, price=Decimal('1.00'))
+        recipe.tags.add(Tag.objects.create(user=other, name='Stews'))
+        self._recipe().tags.add(self.tags[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+
+        self.assertEqual(Tag.objects.exclude(user=self.user).count(), 0)
+        self.assertCounts(Tag, {'Breakfast': 1})
+
+    def test_bulk_create(self):
+        """Test recipes created in bulk are counted."""
+        serializer = RecipeSerializer(data=[
+            {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00',
+             'tags': [{'name': 'Dinner'}],
+             'ingredients': [{'name': f'Item {i % 2}'}]}
+            for i in range(5)
+        ], many=True)
+        serializer.is_valid(raise_exception=True)
+
+        serializer.save(user=self.user)
+
+        self.assertCounts(Tag, {'Dinner': 5})
+        self.assertCounts(Ingredient, {'Item 0': 3, 'Item 1': 2})
+
+    def test_reconcile_command(self):
+        """Test the reconcile command repairs drifted counts."""
+        self._recipe().tags.add(self.tags[0])
+        Tag.objects.filter(user=self.user).update(recipe_count=7)
+        out = StringIO()
+
+        call_command('reconcile_recipe_counts', '--dry-run', stdout=out)
+        self.assertCounts(Tag, dict.fromkeys(
+            ('Breakfast', 'Dinner', 'Vegan'), 7))
+        call_command('reconcile_recipe_counts', stdout=out)
+
+        self.assertIn('3 stale tags.', out.getvalue())
+        self.assertIn('Fixed 3 tags.', out.getvalue())
+        self.assertCounts(Tag, {'Breakfast': 1})
@@ -0,0 +1,159 @@
+"""
+Tests for the N+1 and slow query detector.
+"""
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.detector import QueryDetector, fingerprint
+from core.models import Recipe
+from core.tests.mixins import QueryDetectorMixin
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def get_or_create_each(model, user, items):
+    """Look up nested objects one query at a time, the N+1 way."""
+    return {
+        item['name']: model.objects.get_or_create(
+            user=user, name=item['name'])[0]
+        for item in items
+    }
+
+
+class FingerprintTests(SimpleTestCase):
+    """Test reducing queries to their structure."""
+
+    def test_values_ignored(self):
+        """Test queries differing in values share a fingerprint."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a'"),
+            fingerprint("SELECT * FROM t WHERE id = 25 AND name = 'b''c'"),
+        )
+
+    def test_list_lengths_ignored(self):
+        """Test IN lists and VALUES rows of any length match."""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s)'),
+        )
+        self.assertEqual(
+            fingerprint('INSERT INTO t VALUES (%s, %s), (%s, %s)'),
+            fingerprint('INSERT INTO t VALUES (%s, %s)'),
+        )
+
+    def test_structure_kept(self):
+        """Test different columns and tables do not match."""
+        self.assertNotEqual(
+            fingerprint('SELECT * FROM core_tag WHERE id = %s'),
+            fingerprint('SELECT * FROM core_tag WHERE name = %s'),
+        )
+
+
+class QueryDetectorTests(TestCase):
+    """Test finding repeated and slow queries."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+
+    def test_repeated_queries(self):
+        """Test queries run once per row are reported with their line."""
+        with QueryDetector(repeat_threshold=3) as detector:
+            for i in range(3):
+                Recipe.objects.filter(user=self.user, id=i).exists()
+            Recipe.objects.count()
+
+        repeated = detector.repeated()
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(len(repeated[0]), 3)
+        report = detector.report()
+        self.assertIn('Repeated 3 times', report)
+        self.assertIn(f'{__file__}", line', report)
+        self.assertIn('Recipe.objects.filter(user=self.user, id=i)', report)
+
+    def test_stacks_captured_when_reported(self):
+        """Test only queries reaching a threshold capture their stack."""
+        with QueryDetector(repeat_threshold=3) as detector:
+            for i in range(4):
+                Recipe.objects.filter(user=self.user, id=i).exists()
+            Recipe.objects.count()
+
+        self.assertEqual(
+            [query.stack is not None for query in detector.queries],
+            [False, False, True, False, False],
+        )
+
+    def test_slow_queries(self):
+        """Test queries over the duration threshold are reported."""
+        with QueryDetector(slow_ms=0) as detector:
+            Recipe.objects.count()
+
+        self.assertEqual(len(detector.slow()), 1)
+        self.assertIn('Slow query', detector.report())
+
+    def test_nested_detectors(self):
+        """Test outer detectors see the queries of inner ones."""
+        with QueryDetector() as outer:
+            with QueryDetector() as inner:
+                Recipe.objects.count()
+            Recipe.objects.count()
+
+        self.assertEqual(len(inner.queries), 1)
+        self.assertEqual(len(outer.queries), 2)
+        self.assertFalse(outer.has_problems())
+
+
+class QueryDetectorMixinTests(QueryDetectorMixin, TestCase):
+    """Test the mixin fails tests running suspicious queries."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_per_row_queries_fail(self):
+        """Test a serializer creating tags one by one is caught."""
+        payload = {
+            'title': 'Soup', 'time_minutes': 5, 'price': Decimal('1.50'),
+            'tags': [{'name': f'Tag {i}'} for i in range(6)],
+        }
+        with mock.patch('recipe.serializers.get_or_create_by_name',
+                        get_or_create_each), \
+                self.assertLogs('core.db.detector', 'WARNING'):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self._query_failures), 1)
+        failure = self._query_failures.pop()
+        self.assertIn(f'Suspicious queries in POST {RECIPES_URL}', failure)
+        self.assertIn('recipe/serializers.py', failure)
+        self.assertIn('get_or_create_each', failure)
+
+    def test_query_budget(self):
+        """Test requests over the query budget fail."""
+        self.query_budget = 0
+
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(self._query_failures), 1)
+        self.assertIn('over the budget of 0', self._query_failures.pop())
+
+    def test_bulk_create_passes(self):
+        """Test creating nested objects in bulk is not reported."""
+        payload = {
+            'title': 'Soup', 'time_minutes': 5, 'price': Decimal('1.50'),
+            'tags': [{'name': f'Tag {i}'} for i in range(6)],
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._query_failures, [])
@@ -0,0 +1,236 @@
+"""
+Tests for the request instrumentation and metrics.
+"""
+import json
+import re
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+def server_timing(response):
+    """Return the Server-Timing durations and descriptions by metric."""
+    timings = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        timings[name] = dict(param.split('=', 1) for param in params)
+
+    return timings
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class InstrumentationTests(TestCase):
+    """Test measuring requests."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}', time_minutes=i,
+                price=Decimal('1.50'))
+
+    def test_server_timing(self):
+        """Test responses report the time of each phase and the SQL."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL)
+
+        timings = server_timing(res)
+        self.assertEqual(
+            list(timings),
+            ['auth', 'queryset', 'serializer', 'render', 'db', 'total'])
+        self.assertEqual(timings['db']['desc'], f'"{len(queries)} queries"')
+        for timing in timings.values():
+            self.assertGreaterEqual(float(timing['dur']), 0)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test the Server-Timing header can be turned off."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_logs_request(self):
+        """Test every request is logged as JSON."""
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['endpoint'], 'recipe:recipe-list')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['bytes'], len(res.content))
+        self.assertGreater(record['sql_count'], 0)
+        self.assertIn('serializer', record['phases_ms'])
+
+    def test_logs_streamed_request_once_sent(self):
+        """Test streamed responses are logged with their full size."""
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            res = self.client.get(RECIPES_URL, {'stream': 1})
+            self.assertEqual(logs.records, [])
+            body = b''.join(res.streaming_content)
+            self.assertEqual(len(logs.records), 1)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['bytes'], len(body))
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class MetricsTests(TestCase):
+    """Test aggregating metrics for Prometheus."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(
+            METRICS_DIR=directory.name, METRICS_TOKEN='secret')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        saved = dict(metrics._requests)
+        metrics._requests.clear()
+        self.addCleanup(metrics._requests.update, saved)
+        self.addCleanup(metrics._requests.clear)
+
+    def _sample(self, body, name, **labels):
+        """Return the value of a sample of the metrics body."""
+        pattern = re.escape(name) + r'\{([^}]*)\} (\S+)'
+        for match in re.finditer(pattern, body):
+            sample_labels = dict(re.findall(r'(\w+)="([^"]*)"', match[1]))
+            if sample_labels == labels:
+                return float(match[2])
+
+        return None
+
+    def _get_metrics(self, token='secret'):
+        return self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @override_settings(METRICS_DIR='')
+    def test_metrics_disabled(self):
+        """Test the metrics are not served without a directory."""
+        res = self._get_metrics()
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_without_token_disabled(self):
+        """Test the metrics are not served without a token to check."""
+        res = self._get_metrics('')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_metrics_token_required(self):
+        """Test requests without the metrics token are rejected."""
+        for headers in ({}, {'HTTP_AUTHORIZATION': 'Bearer wrong'}):
+            with self.subTest(headers=headers):
+                res = self.client.get(METRICS_URL, **headers)
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @mock.patch('core.metrics._start_writer')
+    def test_record_does_not_write(self, patched_start_writer):
+        """Test requests leave writing snapshots to the writer thread."""
+        self.client.get(RECIPES_URL)
+
+        patched_start_writer.assert_called_once()
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_metrics(self):
+        """Test requests are counted by endpoint, method and status."""
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        res = self._get_metrics()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        body = res.content.decode()
+        labels = {'endpoint': 'recipe:recipe-list', 'method': 'GET',
+                  'status': '200'}
+        self.assertEqual(self._sample(
+            body, 'app_http_request_duration_seconds_count', **labels), 2)
+        self.assertEqual(self._sample(
+            body, 'app_http_request_duration_seconds_bucket',
+            **labels, le='+Inf'), 2)
+        self.assertGreater(
+            self._sample(body, 'app_db_queries_total', **labels), 0)
+        self.assertGreater(
+            self._sample(body, 'app_http_response_bytes_total', **labels), 0)
+        self.assertIsNotNone(self._sample(
+            body, 'app_http_request_phase_seconds_total',
+            **labels, phase='serializer'))
+
+    def test_metrics_other_methods(self):
+        """Test non-standard methods share one method label."""
+        for method in ('BREW', 'PROPFIND'):
+            self.client.generic(method, RECIPES_URL)
+
+        body = self._get_metrics().content.decode()
+
+        self.assertEqual(self._sample(
+            body, 'app_http_request_duration_seconds_count',
+            endpoint='recipe:recipe-list', method='other', status='405'), 2)
+        self.assertNotIn('BREW', body)
+
+    @mock.patch('core.metrics._is_running', side_effect=lambda pid: pid != 1)
+    @mock.patch('core.metrics.pool_stats')
+    def test_merges_processes(self, patched_pool_stats, patched_running):
+        """Test the metrics of other workers are added up."""
+        pool = {'max_size': 10, 'size': 2, 'idle': 1, 'in_use': 1,
+                'checkouts': 7, 'waits': 1, 'wait_seconds': 0.5,
+                'timeouts': 0}
+        patched_pool_stats.return_value = {'default': pool}
+        labels = ['recipe:recipe-list', 'GET', '200']
+        other = {
+            'pid': 1,
+            'requests': [{
+                'labels': labels, 'count': 3, 'seconds': 0.3,
+                'buckets': [0, 0, 0, 0, 3, 3, 3, 3, 3, 3, 3],
+                'sql_count': 9, 'sql_seconds': 0.1, 'response_bytes': 30,
+                'phases': {'auth': 0.01},
+            }],
+            'pools': {'default': pool},
+        }
+        (self.directory / '1.json').write_text(json.dumps(other))
+        metrics.record(tuple(labels), 0.2, 2, 0.05, 10, {'auth': 0.02})
+
+        requests, pools = metrics.collect()
+
+        stats = requests[tuple(labels)]
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual(stats['sql_count'], 11)
+        self.assertEqual(stats['response_bytes'], 40)
+        self.assertEqual(stats['buckets'][4], 3)
+        self.assertEqual(stats['buckets'][5], 4)
+        self.assertAlmostEqual(stats['phases']['auth'], 0.03)
+        # Counters of exited workers stay, their connections do not.
+        self.assertEqual(pools['default']['checkouts'], 14)
+        self.assertEqual(pools['default']['size'], 2)
+
+        body = metrics.render(requests, pools)
+        self.assertIn(
+            'app_db_pool_checkouts_total{alias="default"} 14', body)
+        self.assertIn('app_db_pool_size{alias="default"} 2', body)
@@ -0,0 +1,97 @@
+"""
+Tests for the compression middleware.
+"""
+import gzip
+from unittest import mock, skipIf
+
+from asgiref.sync import iscoroutinefunction
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import middleware
+from core.middleware import CompressionMiddleware
+
+BODY = b'{"title": "Sample recipe"}' * 100
+
+
+def make_response(body=BODY, content_type='application/json'):
+    """Return a response with the given body."""
+    response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = '"abc"'
+    return response
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def _process(self, response, accept='gzip, deflate'):
+        """Run the middleware over response for a request."""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    @mock.patch.object(middleware, 'COMPRESSORS',
+                       [middleware.GzipCompressor])
+    def test_gzip_response(self):
+        """Test responses are gzipped when accepted."""
+        response = self._process(make_response())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'],
+                         str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @mock.patch.object(middleware, 'COMPRESSORS',
+                       [middleware.GzipCompressor])
+    async def test_async_response(self):
+        """Test the middleware runs natively in async chains."""
+        async def get_response(request):
+            return make_response()
+
+        compression = CompressionMiddleware(get_response)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = await compression(request)
+
+        self.assertTrue(iscoroutinefunction(compression))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_not_accepted(self):
+        """Test responses stay uncompressed without Accept-Encoding."""
+        for accept in ['', 'identity', 'gzip;q=0']:
+            response = self._process(make_response(), accept=accept)
+
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertEqual(response.content, BODY)
+
+    def test_small_or_binary_response(self):
+        """Test small and non text responses are left alone."""
+        small = self._process(make_response(b'{}'))
+        image = self._process(make_response(content_type='image/png'))
+
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertFalse(image.has_header('Content-Encoding'))
+
+    @mock.patch.object(middleware, 'COMPRESSORS',
+                       [middleware.GzipCompressor])
+    def test_streaming_response(self):
+        """Test streaming responses are compressed chunk by chunk."""
+        chunks = [b'[', BODY, b',', BODY, b']']
+        response = self._process(StreamingHttpResponse(
+            iter(chunks), content_type='application/json'))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            b''.join(chunks),
+        )
+
+    @skipIf(middleware.brotli is None, 'Requires brotli.')
+    def test_brotli_preferred(self):
+        """Test brotli is used when the client accepts it."""
+        response = self._process(make_response(), accept='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(middleware.brotli.decompress(response.content), BODY)
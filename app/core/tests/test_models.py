@@ -4,6 +4,7 @@ Tests for models.
 from unittest.mock import patch
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.test import TestCase
 
 from core import models
@@ -75,6 +76,28 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
+    def test_recipe_updated_when_tags_change(self):
+        """Test linking or renaming a tag updates the recipe timestamp."""
+        user = create_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Sample recipe',
+            time_minutes=5,
+            price=Decimal('5.50'),
+        )
+        tag = models.Tag.objects.create(user=user, name='Tag1')
+        created = recipe.updated_at
+
+        recipe.tags.add(tag)
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.updated_at, created)
+        linked = recipe.updated_at
+
+        tag.name = 'Tag2'
+        tag.save()
+        recipe.refresh_from_db()
+        self.assertGreater(recipe.updated_at, linked)
+
     def test_create_tag(self):
         """Test creating a new tag."""
         user = create_user()
@@ -82,6 +105,16 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name."""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Tag1')
+        models.Tag.objects.create(user=other_user, name='Tag1')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Tag1')
+
     def test_create_ingredient(self):
         """Test creating a new ingredient is successful."""
         user = create_user()
@@ -0,0 +1,173 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+from unittest import mock
+
+from psycopg2 import OperationalError as Psycopg2Error
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE,
+    TRANSACTION_STATUS_INERROR,
+)
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from core.db import pool as pool_module
+from core.db.backends.postgresql.base import DatabaseWrapper
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+def make_connection(status=TRANSACTION_STATUS_IDLE):
+    """Return a fake psycopg2 connection."""
+    connection = mock.Mock(closed=0)
+    connection.info.transaction_status = status
+    return connection
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checking connections out of and into the pool."""
+
+    def test_reuses_returned_connections(self):
+        """Test a returned connection is handed out again."""
+        pool = ConnectionPool(max_size=2, timeout=1)
+        connect = mock.Mock(side_effect=make_connection)
+
+        first = pool.checkout(connect)
+        pool.checkin(first)
+        second = pool.checkout(connect)
+
+        self.assertIs(second, first)
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(pool.stats(), {
+            'max_size': 2, 'size': 1, 'idle': 0, 'in_use': 1,
+            'checkouts': 2, 'waits': 0, 'wait_seconds': 0.0, 'timeouts': 0,
+        })
+
+    def test_full_pool_times_out(self):
+        """Test checking out of a full pool fails after the timeout."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.checkout(make_connection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(make_connection)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_waits_for_returned_connection(self):
+        """Test a checkout waits for a connection to be returned."""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        connection = pool.checkout(make_connection)
+        timer = threading.Timer(0.05, pool.checkin, [connection])
+        timer.start()
+
+        self.assertIs(pool.checkout(make_connection), connection)
+
+        timer.join()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_seconds'], 0)
+
+    def test_discards_unusable_connections(self):
+        """Test connections failing checks are closed and replaced."""
+        pool = ConnectionPool(max_size=1, timeout=1, check=lambda c: False)
+        broken = pool.checkout(make_connection)
+        pool.checkin(broken)
+
+        connection = pool.checkout(make_connection)
+
+        self.assertIsNot(connection, broken)
+        broken.close.assert_called_once()
+        pool.checkin(connection, reusable=False)
+        connection.close.assert_called_once()
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_recently_returned_connections_not_checked(self):
+        """Test only connections idle for a while are checked."""
+        check = mock.Mock(return_value=True)
+        pool = ConnectionPool(max_size=1, timeout=1, check=check,
+                              check_idle=60)
+        connection = pool.checkout(make_connection)
+        pool.checkin(connection)
+
+        self.assertIs(pool.checkout(make_connection), connection)
+        check.assert_not_called()
+
+        pool.checkin(connection)
+        with mock.patch('core.db.pool.time.monotonic',
+                        return_value=time.monotonic() + 60):
+            self.assertIs(pool.checkout(make_connection), connection)
+        check.assert_called_once_with(connection)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connection that fails to open does not use up the pool."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        with self.assertRaises(Psycopg2Error):
+            pool.checkout(mock.Mock(side_effect=Psycopg2Error))
+
+        self.assertIsNotNone(pool.checkout(make_connection))
+
+
+@mock.patch(
+    'django.db.backends.postgresql.base.DatabaseWrapper.get_new_connection')
+class PooledBackendTests(SimpleTestCase):
+    """Test the PostgreSQL backend using the pool."""
+
+    def setUp(self):
+        self.settings_dict = {
+            **connections['default'].settings_dict,
+            'CONN_HEALTH_CHECKS': False,
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.01},
+        }
+        self.addCleanup(pool_module._pools.clear)
+
+    def _wrapper(self):
+        return DatabaseWrapper(self.settings_dict, alias='pooled')
+
+    def test_close_returns_connection(self, patched_connect):
+        """Test closing returns the connection to the pool."""
+        patched_connect.side_effect = lambda params: make_connection()
+        first, second = self._wrapper(), self._wrapper()
+
+        connection = first.connection = first.get_new_connection({})
+        first.close()
+
+        self.assertIs(second.get_new_connection({}), connection)
+        patched_connect.assert_called_once()
+
+    def test_close_rolls_back_transaction(self, patched_connect):
+        """Test connections are returned outside of a transaction."""
+        connection = make_connection(TRANSACTION_STATUS_INERROR)
+        patched_connect.return_value = connection
+        wrapper = self._wrapper()
+
+        wrapper.connection = wrapper.get_new_connection({})
+        wrapper.close()
+
+        connection.rollback.assert_called_once()
+        self.assertEqual(wrapper.connection_pool.stats()['idle'], 1)
+
+    def test_closed_connection_discarded(self, patched_connect):
+        """Test connections closed by the server are not reused."""
+        connection = make_connection()
+        connection.closed = 1
+        patched_connect.return_value = connection
+        wrapper = self._wrapper()
+
+        wrapper.connection = wrapper.get_new_connection({})
+        wrapper.close()
+
+        self.assertEqual(wrapper.connection_pool.stats()['size'], 0)
+
+    def test_timeout_is_operational_error(self, patched_connect):
+        """Test a full pool raises a database operational error."""
+        patched_connect.side_effect = lambda params: make_connection()
+        first, second = self._wrapper(), self._wrapper()
+        first.get_new_connection({})
+
+        with self.assertRaises(Psycopg2Error):
+            second.get_new_connection({})
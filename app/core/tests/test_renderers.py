@@ -0,0 +1,113 @@
+"""
+Tests for the fast JSON renderer and parser.
+"""
+import datetime
+import uuid
+from decimal import Decimal
+from io import BytesIO
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """Test the fast renderer matches DRF's JSONRenderer."""
+
+    def assertSameRendering(self, data, media_type=None, context=None):
+        """Assert both renderers produce the same bytes."""
+        expected = JSONRenderer().render(data, media_type, context)
+        rendered = FastJSONRenderer().render(data, media_type, context)
+
+        self.assertEqual(rendered, expected)
+
+    def test_render_api_data(self):
+        """Test typical API payloads render identically."""
+        data = ReturnList([
+            ReturnDict({
+                'id': 1,
+                'title': 'Crème brûlée',
+                'price': '10.85',
+                'tags': [{'id': 2, 'name': 'Dessert'}],
+                'link': '',
+                'image': None,
+                'ratio': 0.1,
+                'ok': True,
+            }, serializer=None),
+        ], serializer=None)
+
+        self.assertSameRendering(data)
+
+    def test_render_special_values(self):
+        """Test values without a native orjson encoding."""
+        tz = datetime.timezone(datetime.timedelta(hours=2))
+        data = {
+            'decimal': Decimal('12.50'),
+            'utc': datetime.datetime(
+                2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            'offset': datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=tz),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+            'date': datetime.date(2024, 1, 2),
+            'time': datetime.time(3, 4, 5, 600),
+            'uuid': uuid.UUID('12345678123456781234567812345678'),
+            'lazy': gettext_lazy('This field is required.'),
+            'error': ErrorDetail('Invalid.', code='invalid'),
+            'separators': 'a\u2028b\u2029c',
+        }
+
+        self.assertSameRendering(data)
+        self.assertSameRendering({'big': 2 ** 70})
+
+    def test_render_floats(self):
+        """Test floats keep Python's exponent notation."""
+        self.assertSameRendering({'floats': [
+            1e20, 1e-07, 1e-05, 1e16, 9999999999999998.0, 0.0001, 9.99e-05,
+            0.1, 100.0, -0.0, 0.0, -1.5e300, 5e-324,
+        ]})
+
+    def test_render_non_finite_floats(self):
+        """Test NaN and infinity are rejected like by JSONRenderer."""
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'ratio': value})
+
+    def test_render_indent_and_none(self):
+        """Test indented output and empty data."""
+        self.assertSameRendering(
+            {'a': [1, 2]}, 'application/json; indent=4')
+        self.assertSameRendering(None)
+
+
+@skipIf(orjson is None, 'Requires orjson.')
+class FastJSONParserTests(SimpleTestCase):
+    """Test the fast parser matches DRF's JSONParser."""
+
+    def test_parse(self):
+        """Test parsing a UTF-8 body."""
+        body = '{"title": "Crème", "tags": [{"name": "x"}], "n": 1.5}'
+        parsed = FastJSONParser().parse(BytesIO(body.encode('utf-8')))
+
+        self.assertEqual(
+            parsed, JSONParser().parse(BytesIO(body.encode('utf-8'))))
+
+    def test_parse_error(self):
+        """Test invalid JSON raises a parse error."""
+        for body in [b'{"title": ', b'{"n": NaN}', b'\xff']:
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(body))
+
+    def test_parse_other_encoding(self):
+        """Test bodies in other encodings use the stdlib parser."""
+        body = '{"title": "Crème"}'.encode('latin-1')
+
+        parsed = FastJSONParser().parse(
+            BytesIO(body), parser_context={'encoding': 'latin-1'})
+
+        self.assertEqual(parsed, {'title': 'Crème'})
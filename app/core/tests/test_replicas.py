@@ -0,0 +1,193 @@
+"""
+Tests for routing reads to read replicas.
+"""
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.checks import check_replica_pin_cache
+from core.db import replicas
+from core.db.replicas import ReplicaRouter, read_from_replicas
+from core.models import Recipe
+
+# A second alias on the test database, standing in for a replica.
+connections.settings['replica'] = {
+    **connections['default'].settings_dict,
+    'TEST': {**connections['default'].settings_dict['TEST'],
+             'MIRROR': 'default'},
+}
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ReplicaTestMixin:
+    """Start every test on the primary with fresh lag checks and pins."""
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(read_from_replicas, False)
+        self.addCleanup(replicas._lags.clear)
+        caches[settings.REPLICA_PIN_CACHE_ALIAS].clear()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(ReplicaTestMixin, SimpleTestCase):
+    """Test choosing the database of queries."""
+    router = ReplicaRouter()
+
+    def test_reads_primary_by_default(self):
+        """Test reads go to the primary unless replicas are enabled."""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_reads_replica_when_enabled(self):
+        """Test reads go to a replica once enabled."""
+        read_from_replicas()
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+
+    def test_writes_primary(self):
+        """Test writes always go to the primary."""
+        read_from_replicas()
+        instance = Recipe()
+        instance._state.db = 'replica'
+
+        self.assertEqual(
+            self.router.db_for_write(Recipe, instance=instance), 'default')
+
+    @override_settings(REPLICA_MAX_LAG=2)
+    @mock.patch('core.db.replicas.replica_lag', return_value=5.0)
+    def test_lagging_replica_skipped(self, patched_lag):
+        """Test reads fall back to the primary when replicas lag."""
+        read_from_replicas()
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        patched_lag.assert_called_once_with('replica')
+
+    @mock.patch('core.db.replicas.replica_lag', return_value=0.0)
+    async def test_lag_not_checked_on_event_loop(self, patched_lag):
+        """Test routing from an event loop never queries the replica."""
+        read_from_replicas()
+
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+        patched_lag.assert_not_called()
+
+        await sync_to_async(self.router.db_for_read)(Recipe)
+        self.assertEqual(self.router.db_for_read(Recipe), 'replica')
+        patched_lag.assert_called_once_with('replica')
+
+    def test_replicas_not_migrated(self):
+        """Test migrations only run on the primary."""
+        self.assertFalse(self.router.allow_migrate('replica', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], RESPONSE_CACHE_TIMEOUT=0)
+class ReplicaRoutingApiTests(ReplicaTestMixin, TransactionTestCase):
+    """Test the recipe APIs read from the replicas."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Recipe.objects.create(
+            user=self.user, title='Soup', time_minutes=5,
+            price=Decimal('1.50'))
+
+    def _get(self, url=RECIPES_URL):
+        """GET url, return the response and the replica query count."""
+        with CaptureQueriesContext(connections['replica']) as queries:
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, len(queries)
+
+    def test_list_reads_replica(self):
+        """Test listing recipes queries the replica."""
+        res, replica_queries = self._get()
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertGreater(replica_queries, 0)
+
+    def test_read_after_write_uses_primary(self):
+        """Test reads right after a write go to the primary."""
+        payload = {'title': 'Salad', 'time_minutes': 3, 'price': '2.00'}
+        with CaptureQueriesContext(connections['replica']) as queries:
+            res = self.client.post(RECIPES_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res, replica_queries = self._get()
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(len(res.data['results']), 2)
+
+    @override_settings(REPLICA_STICKY_SECONDS=0)
+    def test_no_sticky_window(self):
+        """Test reads go back to the replica without a sticky window."""
+        self.client.delete(reverse(
+            'recipe:recipe-detail', args=[Recipe.objects.get().id]))
+
+        _, replica_queries = self._get()
+
+        self.assertGreater(replica_queries, 0)
+
+    @mock.patch('core.db.replicas.replica_lag', return_value=60.0)
+    def test_lagging_replica_uses_primary(self, patched_lag):
+        """Test reads fall back to the primary when the replica lags."""
+        _, replica_queries = self._get()
+
+        self.assertEqual(replica_queries, 0)
+
+    def test_transaction_uses_primary(self):
+        """Test reads inside a transaction stay on the primary."""
+        read_from_replicas()
+        with CaptureQueriesContext(connections['replica']) as queries:
+            with transaction.atomic():
+                self.assertEqual(Recipe.objects.count(), 1)
+
+        self.assertEqual(len(queries), 0)
+
+
+class ReplicaChecksTests(SimpleTestCase):
+    """Test the system checks of the replica settings."""
+
+    @override_settings(DATABASE_REPLICAS=['replica'], CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_process_local_pin_cache_rejected(self):
+        """Test replicas need pins every worker process sees."""
+        errors = check_replica_pin_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(DATABASE_REPLICAS=['replica'], CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.gettempdir(),
+    }})
+    def test_shared_pin_cache_accepted(self):
+        """Test replicas pass the checks with a shared pin cache."""
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test the pin cache is not checked without replicas."""
+        self.assertEqual(check_replica_pin_cache(None), [])
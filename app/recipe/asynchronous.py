@@ -0,0 +1,90 @@
+"""
+Async read paths for recipe APIs.
+
+With ``ASYNC_VIEWS`` on, which ``app.asgi`` does by default, the recipe,
+tag and ingredient viewsets are served as coroutines. List and retrieve
+requests query the database through the async ORM, so under ASGI a worker
+keeps serving other requests while they wait on the database or on slow
+clients. Authentication, cache lookups and every other action, including
+all writes, run the regular sync code with ``sync_to_async`` in the
+request's thread sensitive context, so transactions and connections behave
+as they do under WSGI.
+"""
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+
+class AsyncReadMixin:
+    """Dispatch viewset requests as coroutines when ``ASYNC_VIEWS`` is on.
+
+    Mixins wrapping ``list`` or ``retrieve`` provide ``alist`` and
+    ``aretrieve`` counterparts ending here, so this mixin goes right before
+    the viewset base class.
+    """
+    async_actions = ('list', 'retrieve')
+    async_dispatch = False
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        initkwargs.setdefault('async_dispatch', settings.ASYNC_VIEWS)
+        view = super().as_view(actions, **initkwargs)
+        if initkwargs['async_dispatch']:
+            markcoroutinefunction(view)
+
+        return view
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.async_dispatch:
+            return super().dispatch(request, *args, **kwargs)
+
+        return self._adispatch(request, *args, **kwargs)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        """Run read actions as coroutines and the others in a thread."""
+        action = self.action_map.get(request.method.lower())
+        if action not in self.async_actions:
+            return await sync_to_async(super().dispatch)(
+                request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f'a{action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        """Async counterpart of ``get_object``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError,
+                ValidationError):
+            raise Http404
+
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        """Render lists no mixin handles natively with the sync code."""
+        return await sync_to_async(super().list)(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
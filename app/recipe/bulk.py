@@ -0,0 +1,207 @@
+"""
+Bulk create, update and delete of recipes.
+"""
+from django.db import connections, router, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from rest_framework import status
+
+from core.counts import update_recipe_counts
+from core.models import Recipe
+from core.search import update_search_vectors
+from recipe.cache import invalidate_user
+from recipe.serializers import RecipeDetailSerializer, relink_recipes
+
+NESTED_FIELDS = ('tags', 'ingredients')
+
+
+class BulkRecipeOperations:
+    """
+    Validate a list of recipe operations and apply them atomically.
+
+    Creates are validated together with ``RecipeDetailSerializer(many=True)``
+    and written with bulk inserts. Updates and deletes target recipes of the
+    queryset, which are loaded with one query. Updates are written with one
+    ``bulk_update`` and one relink per nested field, deletes with one delete
+    per table. Neither sends model signals: the search vectors, recipe
+    counts and cached responses are refreshed once for all recipes. The
+    number of queries does not depend on the number of operations. If any
+    operation is invalid nothing is written.
+    """
+
+    def __init__(self, queryset, operations, context):
+        self.queryset = queryset
+        self.operations = operations
+        self.context = context
+        self.errors = None
+
+    def _validate_targets(self):
+        """Return the errors of the update and delete operations."""
+        ids = [op['id'] for op in self.operations if op['action'] != 'create']
+        self.instances = self.queryset.select_related('user').in_bulk(ids)
+        self.update_serializers = {}
+        seen = set()
+        errors = {}
+
+        for index, op in enumerate(self.operations):
+            if op['action'] == 'create':
+                continue
+            if op['id'] in seen:
+                errors[index] = {'id': [_('Duplicate recipe in request.')]}
+                continue
+            seen.add(op['id'])
+
+            instance = self.instances.get(op['id'])
+            if instance is None:
+                errors[index] = {'id': [_('Recipe not found.')]}
+            elif op['action'] == 'update':
+                serializer = RecipeDetailSerializer(
+                    instance,
+                    data=op['data'],
+                    partial=True,
+                    context=self.context,
+                )
+                if serializer.is_valid():
+                    self.update_serializers[index] = serializer
+                else:
+                    errors[index] = serializer.errors
+
+        return errors
+
+    def is_valid(self):
+        """Validate every operation, collecting errors per item."""
+        creates = [op['data'] for op in self.operations
+                   if op['action'] == 'create']
+        self.create_serializer = RecipeDetailSerializer(
+            data=creates, many=True, context=self.context)
+        create_errors = {}
+        if not self.create_serializer.is_valid():
+            create_errors = self.create_serializer.errors
+            # Depending on the DRF version the errors are a list with an
+            # entry per item or a dict of the invalid items only.
+            if isinstance(create_errors, list):
+                create_errors = dict(enumerate(create_errors))
+        errors = self._validate_targets()
+
+        self.errors = []
+        creates = 0
+        for index, op in enumerate(self.operations):
+            if op['action'] == 'create':
+                item_errors = create_errors.get(creates, {})
+                creates += 1
+            else:
+                item_errors = errors.get(index, {})
+            self.errors.append({
+                'action': op['action'],
+                'id': op.get('id'),
+                'errors': item_errors,
+            })
+
+        return not any(item['errors'] for item in self.errors)
+
+    def _update(self):
+        """Write every update and return the ids of the updated recipes."""
+        recipes = []
+        fields = {'updated_at'}
+        nested = {field_name: ([], []) for field_name in NESTED_FIELDS}
+        now = timezone.now()
+        for serializer in self.update_serializers.values():
+            recipe = serializer.instance
+            data = dict(serializer.validated_data)
+            for field_name, (linked, items) in nested.items():
+                if field_name in data:
+                    linked.append(recipe)
+                    items.append(data.pop(field_name))
+            for attr, value in data.items():
+                setattr(recipe, attr, value)
+                fields.add(attr)
+            recipe.updated_at = now
+            recipes.append(recipe)
+
+        if not recipes:
+            return []
+        Recipe.objects.bulk_update(recipes, sorted(fields))
+        for field_name, (linked, items) in nested.items():
+            if linked:
+                relink_recipes(linked, field_name, items)
+
+        ids = [recipe.pk for recipe in recipes]
+        update_search_vectors(Recipe.objects.filter(pk__in=ids))
+        return ids
+
+    def _delete(self, ids):
+        """Delete recipes and refresh the counts of their links."""
+        if not ids:
+            return
+
+        unlinked = {}
+        for field_name in NESTED_FIELDS:
+            relation = getattr(Recipe, field_name)
+            model = relation.rel.model
+            links = relation.through.objects.filter(recipe_id__in=ids)
+            unlinked[model] = list(links.values_list(
+                f'{model._meta.model_name}_id', flat=True).distinct())
+            links.delete()
+
+        # The links are gone and nothing else cascades from recipes, so a
+        # plain DELETE removes them without loading them for the collector
+        # or sending a delete signal per recipe.
+        connection = connections[router.db_for_write(Recipe)]
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM %s WHERE %s IN (%s)' % (
+                    quote_name(Recipe._meta.db_table),
+                    quote_name(Recipe._meta.pk.column),
+                    ', '.join(['%s'] * len(ids)),
+                ),
+                ids,
+            )
+        for model, pks in unlinked.items():
+            update_recipe_counts(model.objects.filter(pk__in=pks))
+
+    def save(self, **kwargs):
+        """Apply the operations and return the result of each one."""
+        delete_ids = [op['id'] for op in self.operations
+                      if op['action'] == 'delete']
+        with transaction.atomic():
+            created = iter(self.create_serializer.save(**kwargs))
+            created_ids = {}
+            for index, op in enumerate(self.operations):
+                if op['action'] == 'create':
+                    created_ids[index] = next(created).pk
+            updated_ids = self._update()
+            self._delete(delete_ids)
+            if updated_ids or delete_ids:
+                for user_id in {recipe.user_id
+                                for recipe in self.instances.values()}:
+                    invalidate_user(user_id)
+
+        changed_ids = list(created_ids.values()) + updated_ids
+        changed = {
+            recipe.pk: recipe
+            for recipe in self.queryset.filter(pk__in=changed_ids)
+        }
+        data = dict(zip(
+            changed,
+            RecipeDetailSerializer(
+                list(changed.values()), many=True, context=self.context,
+            ).data,
+        ))
+
+        results = []
+        for index, op in enumerate(self.operations):
+            if op['action'] == 'create':
+                recipe_id = created_ids[index]
+                results.append({'action': 'create', 'id': recipe_id,
+                                'status': status.HTTP_201_CREATED,
+                                'data': data[recipe_id]})
+            elif op['action'] == 'update':
+                results.append({'action': 'update', 'id': op['id'],
+                                'status': status.HTTP_200_OK,
+                                'data': data[op['id']]})
+            else:
+                results.append({'action': 'delete', 'id': op['id'],
+                                'status': status.HTTP_204_NO_CONTENT})
+
+        return results
@@ -0,0 +1,213 @@
+"""
+Versioned per-user cache for recipe API responses.
+
+Every user has a version number stored in the cache. Cached responses are
+keyed on that version, so bumping it on any write makes all of the user's
+cached responses unreachable at once without having to find and delete them.
+Writes served by one worker process must reach the others, so responses
+are only cached in a cache shared between processes.
+"""
+import hashlib
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from core.cache import is_shared_cache
+
+KEY_PREFIX = 'recipe-api'
+# Response headers kept with the cached data.
+CACHED_HEADERS = ('ETag', 'Last-Modified')
+STATS_KEYS = {
+    'hits': f'{KEY_PREFIX}:stats:hits',
+    'misses': f'{KEY_PREFIX}:stats:misses',
+}
+
+
+def get_cache():
+    """Return the cache backend used for API responses."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_cache_timeout():
+    """Return the seconds responses are cached, 0 if they are not."""
+    if not is_shared_cache(settings.RESPONSE_CACHE_ALIAS):
+        return 0
+
+    return settings.RESPONSE_CACHE_TIMEOUT
+
+
+def _version_key(user_id):
+    return f'{KEY_PREFIX}:version:{user_id}'
+
+
+def _incr(key):
+    """Atomically increment a counter, creating it if needed."""
+    cache = get_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_user_version(user_id):
+    """Return the current cache version of the user."""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a version evicted from the cache never
+        # comes back with a value that was used before.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+
+    return version
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached response of the user.
+
+    The version grows to at least the current time in nanoseconds, so it
+    also tells when the user's data last changed.
+    """
+    cache = get_cache()
+    key = _version_key(user_id)
+    try:
+        version = cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+        return
+
+    behind = time.time_ns() - version
+    if behind > 0:
+        cache.incr(key, behind)
+
+
+def invalidate_user(user_id):
+    """Bump the user's version now and again once the write commits.
+
+    The second bump discards responses cached by readers that ran between
+    the first bump and the commit and so still saw the old rows.
+    """
+    bump_user_version(user_id)
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+def response_cache_key(request):
+    """Return the cache key for a request made by an authenticated user."""
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    raw = '|'.join([
+        request.get_host(),
+        request.path,
+        repr(params),
+        request.accepted_renderer.format,
+    ])
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    version = get_user_version(request.user.pk)
+
+    return f'{KEY_PREFIX}:response:{request.user.pk}:{version}:{digest}'
+
+
+def get_cache_stats():
+    """Return the cache hit and miss counters."""
+    cache = get_cache()
+    return {name: cache.get(key, 0) for name, key in STATS_KEYS.items()}
+
+
+def _cache_entry(response):
+    """Return the data and validator headers of a response to cache."""
+    headers = {name: response[name] for name in CACHED_HEADERS
+               if name in response}
+    return response.data, headers
+
+
+class CachedResponseMixin:
+    """Serve list and retrieve responses from the per-user cache.
+
+    Cached responses keep their ETag and Last-Modified headers and answer
+    conditional requests with a 304 without running the view.
+    """
+
+    def _hit(self, request, entry):
+        """Return a response for an entry found in the cache."""
+        data, headers = entry
+        response = get_conditional_response(
+            request,
+            etag=headers.get('ETag'),
+            last_modified=parse_http_date_safe(
+                headers.get('Last-Modified', '')),
+        )
+        if response is None:
+            response = Response(data)
+        for name, value in headers.items():
+            response[name] = value
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        """Return the cached response data or render and cache it."""
+        timeout = get_cache_timeout()
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = response_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            _incr(STATS_KEYS['hits'])
+            return self._hit(request, entry)
+
+        _incr(STATS_KEYS['misses'])
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, _cache_entry(response), timeout)
+        response['X-Cache'] = 'MISS'
+
+        return response
+
+    async def _acached_response(self, handler, request, *args, **kwargs):
+        """Async counterpart of ``_cached_response``."""
+        timeout = get_cache_timeout()
+        if not timeout:
+            return await handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = await sync_to_async(response_cache_key)(request)
+        entry = await cache.aget(key)
+        if entry is not None:
+            await sync_to_async(_incr)(STATS_KEYS['hits'])
+            return self._hit(request, entry)
+
+        await sync_to_async(_incr)(STATS_KEYS['misses'])
+        response = await handler(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            await cache.aset(key, _cache_entry(response), timeout)
+        response['X-Cache'] = 'MISS'
+
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self._acached_response(
+            super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self._acached_response(
+            super().aretrieve, request, *args, **kwargs)
@@ -0,0 +1,191 @@
+"""
+Conditional GET support for recipe APIs.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core.cache import is_shared_cache
+from recipe.cache import get_user_version
+
+NS_PER_SECOND = 10 ** 9
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests with ETag and Last-Modified headers.
+
+    With ``RESPONSE_CACHE_ALIAS`` shared between worker processes, the
+    validators come from the user's cache version, which every write of the
+    user bumps to at least the current time. Checking them costs no query,
+    so a matching ``If-None-Match`` or ``If-Modified-Since`` returns 304
+    before anything is loaded or serialized, and ``CachedResponseMixin``
+    keeps them with cached responses.
+
+    Other workers do not see the versions of a process-local cache. The
+    ETag is then a digest of the body, taken once it is rendered, and
+    detail responses carry the recipe's ``updated_at`` as Last-Modified; an
+    ``If-Modified-Since`` alone is checked against that column before the
+    recipe is loaded.
+    """
+
+    def _uses_version(self):
+        return is_shared_cache(settings.RESPONSE_CACHE_ALIAS)
+
+    def _version_validators(self, request, version):
+        """Return the ETag and Last-Modified timestamp of a user version."""
+        params = sorted(
+            (name, value)
+            for name, values in request.query_params.lists()
+            for value in values
+        )
+        raw = '|'.join([
+            str(request.user.pk),
+            request.path,
+            repr(params),
+            request.accepted_renderer.format,
+            str(version),
+        ])
+        etag = '"%s"' % hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+        return etag, version // NS_PER_SECOND
+
+    def _set_validators(self, response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+
+        return response
+
+    def _versioned_response(self, handler, version, request, *args,
+                            **kwargs):
+        """Return 304 when the client's copy is current, else render."""
+        etag, timestamp = self._version_validators(request, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+
+        return self._set_validators(response, etag, timestamp)
+
+    async def _aversioned_response(self, handler, request, *args, **kwargs):
+        """Async counterpart of ``_versioned_response``."""
+        version = await sync_to_async(get_user_version)(request.user.pk)
+        etag, timestamp = self._version_validators(request, version)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+
+        return self._set_validators(response, etag, timestamp)
+
+    def _validate_rendered(self, request, response, timestamp=None):
+        """Add an ETag of the rendered body, or return 304 if it matches."""
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        def validate(rendered):
+            etag = '"%s"' % hashlib.sha1(rendered.content).hexdigest()
+            not_modified = get_conditional_response(
+                request, etag=etag, last_modified=timestamp)
+            return self._set_validators(
+                not_modified or rendered, etag, timestamp)
+
+        response.add_post_render_callback(validate)
+        return response
+
+    def _detail_state_query(self):
+        """Return the modification time of the requested object."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return self.get_queryset().order_by().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list('updated_at', flat=True)[:1]
+
+    def _checks_modified_since(self, request):
+        """Return whether only the modification time decides a 304.
+
+        ``If-None-Match`` takes precedence over ``If-Modified-Since``.
+        """
+        return ('HTTP_IF_MODIFIED_SINCE' in request.META and
+                'HTTP_IF_NONE_MATCH' not in request.META)
+
+    def _timestamp(self, last_modified):
+        return int(last_modified.timestamp()) if last_modified else None
+
+    def _remember_last_modified(self, instance):
+        """Keep the modification time of the retrieved object, if loaded."""
+        if 'updated_at' not in instance.get_deferred_fields():
+            self._last_modified = self._timestamp(instance.updated_at)
+
+        return instance
+
+    def get_object(self):
+        return self._remember_last_modified(super().get_object())
+
+    async def aget_object(self):
+        return self._remember_last_modified(await super().aget_object())
+
+    def _not_modified_since(self, request, found):
+        """Return a 304 response if the object did not change, else None."""
+        timestamp = self._timestamp(found[0]) if found else None
+        if timestamp is None:
+            return None
+
+        return get_conditional_response(request, last_modified=timestamp)
+
+    def list(self, request, *args, **kwargs):
+        if self._uses_version():
+            return self._versioned_response(
+                super().list, get_user_version(request.user.pk),
+                request, *args, **kwargs)
+
+        return self._validate_rendered(
+            request, super().list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self._uses_version():
+            return self._versioned_response(
+                super().retrieve, get_user_version(request.user.pk),
+                request, *args, **kwargs)
+
+        if self._checks_modified_since(request):
+            not_modified = self._not_modified_since(
+                request, list(self._detail_state_query()))
+            if not_modified is not None:
+                return not_modified
+
+        self._last_modified = None
+        response = super().retrieve(request, *args, **kwargs)
+        return self._validate_rendered(
+            request, response, self._last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        if self._uses_version():
+            return await self._aversioned_response(
+                super().alist, request, *args, **kwargs)
+
+        return self._validate_rendered(
+            request, await super().alist(request, *args, **kwargs))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        if self._uses_version():
+            return await self._aversioned_response(
+                super().aretrieve, request, *args, **kwargs)
+
+        if self._checks_modified_since(request):
+            found = [value async for value in self._detail_state_query()]
+            not_modified = self._not_modified_since(request, found)
+            if not_modified is not None:
+                return not_modified
+
+        self._last_modified = None
+        response = await super().aretrieve(request, *args, **kwargs)
+        return self._validate_rendered(
+            request, response, self._last_modified)
@@ -0,0 +1,194 @@
+"""
+Lightweight read path for list endpoints.
+
+Rendering a list through ``ModelSerializer`` builds a model instance per
+row and calls ``get_attribute`` and ``to_representation`` on every field.
+For serializers made only of plain model fields and nested many-to-many
+serializers, ``ValuesReader`` produces the same output from ``values()``
+rows and one query per relation, skipping model instances altogether.
+The serializer classes stay the same, so the OpenAPI schema does not
+change.
+"""
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Fields whose to_representation returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+# Fields that need model instances or more than their own column.
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.FileField,
+    serializers.ManyRelatedField,
+    serializers.RelatedField,
+    serializers.SerializerMethodField,
+)
+
+
+class ValuesReader:
+    """Build the output of a model serializer from values() rows."""
+
+    def __init__(self, serializer):
+        self.columns = []
+        self.relations = []
+        model = serializer.Meta.model
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.relations.append((
+                    name,
+                    model._meta.get_field(field.source),
+                    ValuesReader(field.child),
+                ))
+                continue
+
+            convert = None
+            if not isinstance(field, PASSTHROUGH_FIELDS):
+                convert = field.to_representation
+            self.columns.append((name, field.source, convert))
+
+    @classmethod
+    def supports(cls, serializer):
+        """Return whether the serializer only has fields the reader knows."""
+        model = serializer.Meta.model
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                child = field.child
+                supported = (
+                    isinstance(child, serializers.ModelSerializer) and
+                    model._meta.get_field(field.source).many_to_many and
+                    cls.supports(child)
+                )
+            else:
+                supported = not (
+                    isinstance(field, UNSUPPORTED_FIELDS) or
+                    field.source == '*' or
+                    '.' in field.source
+                )
+            if not supported:
+                return False
+
+        return True
+
+    def queryset(self, queryset):
+        """Return the values() queryset for the rendered and sort columns."""
+        names = ['pk'] + [source for _, source, _ in self.columns]
+        # Cursor pagination reads its position from the sort columns.
+        selectable = set(queryset.query.annotation_select).union(
+            field.name for field in queryset.model._meta.concrete_fields)
+        names += [
+            name.lstrip('-') for name in queryset.query.order_by
+            if name.lstrip('-') in selectable
+        ]
+
+        return queryset.prefetch_related(None).values(*dict.fromkeys(names))
+
+    def _related_rows(self, field, reader, pks):
+        """Return the link rows of the related objects of pks."""
+        owner = f'{field.m2m_field_name()}_id'
+        target = field.m2m_reverse_field_name()
+        sources = [source for _, source, _ in reader.columns]
+        return field.remote_field.through.objects.filter(
+            **{f'{owner}__in': pks}
+        ).order_by('pk').values_list(
+            owner, *[f'{target}__{source}' for source in sources])
+
+    def _group_related(self, reader, rows):
+        """Return the rendered related objects of each pk, in link order."""
+        sources = [source for _, source, _ in reader.columns]
+        related = {}
+        for owner_pk, *values in rows:
+            related.setdefault(owner_pk, []).append(
+                reader._represent(dict(zip(sources, values)), {}))
+
+        return related
+
+    def _related(self, field, reader, pks):
+        """Return the rendered related objects of each pk."""
+        return self._group_related(
+            reader, self._related_rows(field, reader, pks))
+
+    async def _arelated(self, field, reader, pks):
+        """Async counterpart of ``_related``."""
+        rows = self._related_rows(field, reader, pks)
+        return self._group_related(reader, [row async for row in rows])
+
+    def _represent(self, row, related):
+        """Return the output dict of one row."""
+        data = {}
+        for name, source, convert in self.columns:
+            value = row[source]
+            if value is not None and convert is not None:
+                value = convert(value)
+            data[name] = value
+        for name, _, _ in self.relations:
+            data[name] = related[name].get(row['pk'], [])
+
+        return data
+
+    def represent(self, rows):
+        """Return the output dicts of values() rows."""
+        rows = list(rows)
+        pks = [row['pk'] for row in rows]
+        related = {
+            name: self._related(field, reader, pks) if pks else {}
+            for name, field, reader in self.relations
+        }
+
+        return [self._represent(row, related) for row in rows]
+
+    async def arepresent(self, rows):
+        """Async counterpart of ``represent``, for a list of rows."""
+        pks = [row['pk'] for row in rows]
+        related = {}
+        for name, field, reader in self.relations:
+            related[name] = (
+                await self._arelated(field, reader, pks) if pks else {})
+
+        return [self._represent(row, related) for row in rows]
+
+
+class FastListMixin:
+    """Render list responses through ``ValuesReader`` when possible."""
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        if (not settings.FAST_LIST_SERIALIZATION or
+                not ValuesReader.supports(serializer)):
+            return super().list(request, *args, **kwargs)
+
+        reader = ValuesReader(serializer)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = reader.queryset(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+
+        return Response(reader.represent(rows))
+
+    async def alist(self, request, *args, **kwargs):
+        serializer = self.get_serializer()
+        paginator = self.paginator
+        if (not settings.FAST_LIST_SERIALIZATION or
+                not ValuesReader.supports(serializer) or
+                (paginator is not None and
+                 not hasattr(paginator, 'apaginate_queryset'))):
+            return await super().alist(request, *args, **kwargs)
+
+        reader = ValuesReader(serializer)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = reader.queryset(queryset)
+        page = None
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(rows, request, self)
+        if page is not None:
+            return self.get_paginated_response(await reader.arepresent(page))
+
+        return Response(await reader.arepresent([row async for row in rows]))
@@ -0,0 +1,106 @@
+"""
+Sparse fieldsets for recipe APIs.
+
+GET requests can pick the rendered fields with ``?fields=id,title`` or drop
+some with ``?omit=tags,ingredients``. Besides pruning the output, the views
+load only the needed columns and skip prefetching omitted relations.
+"""
+from django.utils.translation import gettext as _
+from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        'fields',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to return',
+    ),
+    OpenApiParameter(
+        'omit',
+        OpenApiTypes.STR,
+        description='Comma separated list of fields to leave out',
+    ),
+]
+
+
+def select_fields(names, fields=None, omit=None):
+    """Return the names kept by the fields and omit selections."""
+    unknown = set(fields or []).union(omit or []).difference(names)
+    if unknown:
+        raise ValidationError({'fields': [
+            _('Unknown fields: %(unknown)s. Choose from: %(names)s.') % {
+                'unknown': ', '.join(sorted(unknown)),
+                'names': ', '.join(names),
+            }
+        ]})
+
+    return [
+        name for name in names
+        if (fields is None or name in fields) and name not in (omit or [])
+    ]
+
+
+class DynamicFieldsMixin:
+    """Serializer accepting ``fields`` and ``omit`` keyword arguments."""
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and omit is None:
+            return
+
+        keep = select_fields(list(self.fields), fields, omit)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Pass the requested fieldset to serializers and trim the queryset."""
+    related_fields = []
+
+    def _fieldset_param(self, name):
+        """Return the field names listed in a query param, if any."""
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None
+        value = request.query_params.get(name)
+        if not value:
+            return None
+
+        return [field.strip() for field in value.split(',') if field.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        for name in ('fields', 'omit'):
+            value = self._fieldset_param(name)
+            if value is not None:
+                kwargs.setdefault(name, value)
+
+        return super().get_serializer(*args, **kwargs)
+
+    def get_rendered_fields(self):
+        """Return the names of the serializer fields to render."""
+        names = list(self.get_serializer_class().Meta.fields)
+        return select_fields(
+            names,
+            self._fieldset_param('fields'),
+            self._fieldset_param('omit'),
+        )
+
+    def sparse_queryset(self, queryset):
+        """Prefetch the rendered relations and load only needed columns."""
+        rendered = self.get_rendered_fields()
+        queryset = queryset.prefetch_related(
+            *[name for name in self.related_fields if name in rendered])
+
+        if self._fieldset_param('fields') or self._fieldset_param('omit'):
+            concrete = {
+                field.name for field in queryset.model._meta.concrete_fields}
+            ordering = [name.lstrip('-') for name in queryset.query.order_by]
+            columns = ['pk'] + [
+                name for name in dict.fromkeys(rendered + ordering)
+                if name in concrete
+            ]
+            queryset = queryset.only(*columns)
+
+        return queryset
@@ -0,0 +1,153 @@
+"""
+Background generation of resized recipe image variants.
+
+Uploads are stored as they are and the request returns right away. The
+resizing happens on a small in-process thread pool once the upload has been
+committed. The ``image_status`` column doubles as a database backed queue:
+``manage.py process_recipe_images`` picks up anything still pending, for
+example after a restart, and queues again images left processing longer
+than ``IMAGE_PROCESSING_TIMEOUT`` by a worker that crashed.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.models import Recipe
+from recipe.cache import invalidate_user
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {
+    'webp': 'WEBP',
+    'jpeg': 'JPEG',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_file_path(image_name, variant, extension):
+    """Generate filepath for a resized variant of an image."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return os.path.join(
+        'uploads', 'recipe', 'variants', f'{stem}_{variant}.{extension}')
+
+
+def render_variants(image_file):
+    """Yield (variant, extension, bytes) for every configured variant."""
+    with Image.open(image_file) as original:
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((size, size))
+        for extension, image_format in IMAGE_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(
+                buffer,
+                format=image_format,
+                quality=settings.RECIPE_IMAGE_QUALITY,
+            )
+            yield variant, extension, buffer.getvalue()
+
+
+def delete_variants(variants):
+    """Remove the files of previously generated variants."""
+    for formats in variants.values():
+        for path in formats.values():
+            default_storage.delete(path)
+
+
+def generate_variants(recipe_id):
+    """Generate the variants of a pending recipe image.
+
+    Returns True if the recipe was claimed and processed.
+    """
+    claimed = Recipe.objects.filter(
+        pk=recipe_id,
+        image_status=Recipe.ImageStatus.PENDING,
+    ).update(
+        image_status=Recipe.ImageStatus.PROCESSING,
+        updated_at=timezone.now(),
+    )
+    if not claimed:
+        return False
+
+    recipe = Recipe.objects.get(pk=recipe_id)
+    variants = {}
+    try:
+        with recipe.image.open('rb') as image_file:
+            for variant, extension, content in render_variants(image_file):
+                path = default_storage.save(
+                    variant_file_path(recipe.image.name, variant, extension),
+                    ContentFile(content),
+                )
+                variants.setdefault(variant, {})[extension] = path
+        status = Recipe.ImageStatus.READY
+    except Exception:
+        logger.exception('Failed to process image of recipe %s', recipe_id)
+        delete_variants(variants)
+        variants = {}
+        status = Recipe.ImageStatus.FAILED
+
+    # Only record the result if the image was not replaced meanwhile.
+    updated = Recipe.objects.filter(
+        pk=recipe_id,
+        image=recipe.image.name,
+        image_status=Recipe.ImageStatus.PROCESSING,
+    ).update(
+        image_status=status,
+        image_variants=variants,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        invalidate_user(recipe.user_id)
+    else:
+        delete_variants(variants)
+
+    return True
+
+
+def _run_job(recipe_id):
+    """Run a job on a worker thread with its own database connection."""
+    close_old_connections()
+    try:
+        generate_variants(recipe_id)
+    except Exception:
+        logger.exception('Image job for recipe %s crashed', recipe_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    """Return the shared worker pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='recipe-images',
+            )
+    return _executor
+
+
+def submit(recipe_id):
+    """Process an image on the worker pool, or inline without workers."""
+    if settings.IMAGE_PROCESSING_WORKERS:
+        get_executor().submit(_run_job, recipe_id)
+    else:
+        generate_variants(recipe_id)
+
+
+def enqueue_variants(recipe):
+    """Queue the recipe image for processing once the upload commits."""
+    transaction.on_commit(lambda: submit(recipe.pk))
@@ -0,0 +1,169 @@
+"""
+Export and import of a user's whole recipe library as NDJSON or CSV.
+
+Exports read recipes in chunks of ``STREAM_CHUNK_SIZE`` and stream them
+out, imports validate and bulk insert ``RECIPE_IMPORT_BATCH_SIZE`` records
+at a time, so memory use does not depend on the size of the library. Both
+formats hold the fields of ``RecipeLibrarySerializer``. In CSV, tag and
+ingredient names are joined with ``|``.
+"""
+import codecs
+import csv
+import json
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+from core.models import Recipe
+from core.renderers import FastJSONRenderer
+from recipe.fastpath import ValuesReader
+from recipe.serializers import RecipeLibrarySerializer
+from recipe.streaming import chunked
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+NAME_SEPARATOR = '|'
+NESTED_FIELDS = ('tags', 'ingredients')
+
+
+def export_chunks(user, chunk_size=None):
+    """Yield lists of the user's recipe records, oldest first."""
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    reader = ValuesReader(RecipeLibrarySerializer())
+    queryset = reader.queryset(
+        Recipe.objects.filter(user=user).order_by('pk'))
+    for chunk in chunked(queryset.iterator(chunk_size=chunk_size),
+                         chunk_size):
+        yield reader.represent(chunk)
+
+
+class _Echo:
+    """File-like object returning what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def export_ndjson(user):
+    """Yield the user's library as NDJSON."""
+    renderer = FastJSONRenderer()
+    for chunk in export_chunks(user):
+        yield b''.join(renderer.render(record) + b'\n' for record in chunk)
+
+
+def export_csv(user):
+    """Yield the user's library as CSV."""
+    writer = csv.DictWriter(_Echo(), RecipeLibrarySerializer.Meta.fields)
+    yield writer.writeheader().encode('utf-8')
+    for chunk in export_chunks(user):
+        lines = []
+        for record in chunk:
+            for field in NESTED_FIELDS:
+                record[field] = NAME_SEPARATOR.join(
+                    item['name'] for item in record[field])
+            lines.append(writer.writerow(record))
+        yield ''.join(lines).encode('utf-8')
+
+
+EXPORTERS = {
+    'ndjson': export_ndjson,
+    'csv': export_csv,
+}
+
+
+class NDJSONParser(BaseParser):
+    """Lazily parse newline delimited JSON into records."""
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._records(stream)
+
+    def _records(self, stream):
+        lines = codecs.iterdecode(stream, 'utf-8-sig')
+        try:
+            yield from self._decode(lines)
+        except UnicodeDecodeError as exc:
+            raise ParseError(_('Invalid NDJSON - %(error)s') % {'error': exc})
+
+    def _decode(self, lines):
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise ParseError(
+                    _('Line %(number)d: invalid JSON - %(error)s')
+                    % {'number': number, 'error': exc})
+            if not isinstance(record, dict):
+                raise ParseError(
+                    _('Line %(number)d: expected an object.')
+                    % {'number': number})
+            yield record
+
+
+class CSVParser(BaseParser):
+    """Lazily parse CSV with a header row into records."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return self._records(stream)
+
+    def _records(self, stream):
+        lines = codecs.iterdecode(stream, 'utf-8-sig')
+        try:
+            for row in csv.DictReader(lines):
+                record = {
+                    name: value for name, value in row.items()
+                    if name is not None and value is not None
+                }
+                for field in NESTED_FIELDS:
+                    names = record.get(field) or ''
+                    record[field] = [
+                        {'name': name.strip()}
+                        for name in names.split(NAME_SEPARATOR)
+                        if name.strip()
+                    ]
+                yield record
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ParseError(_('Invalid CSV - %(error)s') % {'error': exc})
+
+
+def _batch_errors(errors, offset):
+    """Return the errors of a batch keyed by record number."""
+    if isinstance(errors, dict):
+        errors = errors.items()
+    else:
+        errors = enumerate(errors)
+
+    return {
+        offset + index + 1: error for index, error in errors if error
+    }
+
+
+def import_records(user, records, batch_size=None):
+    """Create recipes for user from records, all or nothing.
+
+    Records are validated and bulk inserted batch by batch inside a single
+    transaction. Returns the number of created recipes and the seconds it
+    took.
+    """
+    batch_size = batch_size or settings.RECIPE_IMPORT_BATCH_SIZE
+    start = time.perf_counter()
+    imported = 0
+    with transaction.atomic():
+        for batch in chunked(records, batch_size):
+            serializer = RecipeLibrarySerializer(data=batch, many=True)
+            if not serializer.is_valid():
+                raise ValidationError(
+                    {'records': _batch_errors(serializer.errors, imported)})
+            serializer.save(user=user)
+            imported += len(batch)
+
+    return imported, time.perf_counter() - start
@@ -0,0 +1,70 @@
+"""
+Command to import a recipe library export for a user.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import APIException
+
+from recipe.library import EXPORT_FORMATS, CSVParser, NDJSONParser
+from recipe.library import import_records
+
+PARSERS = {
+    'ndjson': NDJSONParser,
+    'csv': CSVParser,
+}
+
+
+class Command(BaseCommand):
+    """
+    Django command creating recipes from an NDJSON or CSV export.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'email',
+            help='Email of the user owning the imported recipes.',
+        )
+        parser.add_argument(
+            'path',
+            help='Path of the NDJSON or CSV file to import.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=list(EXPORT_FORMATS),
+            help='Format of the file, guessed from its extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Records to validate and insert together.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        path = options['path']
+        export_format = options['format']
+        if export_format is None:
+            export_format = os.path.splitext(path)[1].lstrip('.').lower()
+            if export_format not in PARSERS:
+                raise CommandError(
+                    'Cannot guess the format of the file, use --format.')
+
+        with open(path, 'rb') as stream:
+            records = PARSERS[export_format]().parse(stream)
+            try:
+                imported, seconds = import_records(
+                    user, records, options['batch_size'])
+            except APIException as exc:
+                raise CommandError(f'Import failed: {exc.detail}')
+
+        rate = imported / seconds if seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} recipes in {seconds:.2f} s '
+            f'({rate:.0f} rows/sec).'))
@@ -0,0 +1,75 @@
+"""
+Command to generate the variants of pending recipe images.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Recipe
+from recipe.images import generate_variants
+
+
+class Command(BaseCommand):
+    """
+    Django command processing recipe images queued in the database.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new images instead of exiting.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls with --loop.',
+        )
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Queue images that failed before for another attempt.',
+        )
+
+    def requeue_stale(self):
+        """Queue images abandoned while processing and return how many."""
+        cutoff = timezone.now() - timedelta(
+            seconds=settings.IMAGE_PROCESSING_TIMEOUT)
+
+        return Recipe.objects.filter(
+            image_status=Recipe.ImageStatus.PROCESSING,
+            updated_at__lt=cutoff,
+        ).update(image_status=Recipe.ImageStatus.PENDING)
+
+    def process_pending(self):
+        """Process every pending image and return how many were done."""
+        pending = Recipe.objects.filter(
+            image_status=Recipe.ImageStatus.PENDING,
+        ).values_list('id', flat=True)
+
+        return sum(generate_variants(recipe_id) for recipe_id in pending)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['retry_failed']:
+            Recipe.objects.filter(
+                image_status=Recipe.ImageStatus.FAILED,
+            ).update(image_status=Recipe.ImageStatus.PENDING)
+
+        while True:
+            requeued = self.requeue_stale()
+            if requeued:
+                self.stdout.write(
+                    f'Queued {requeued} stale image(s) again.')
+            processed = self.process_pending()
+            if processed:
+                self.stdout.write(f'Processed {processed} image(s).')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS('Image processing done.'))
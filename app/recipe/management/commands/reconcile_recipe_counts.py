@@ -0,0 +1,38 @@
+"""
+Command to repair the recipe counts of tags and ingredients.
+"""
+from django.core.management.base import BaseCommand
+
+from core.counts import stale_recipe_counts, update_recipe_counts
+from core.models import Ingredient, Tag
+from recipe.cache import invalidate_user
+
+
+class Command(BaseCommand):
+    """
+    Django command recounting tags and ingredients whose count drifted.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many counts are wrong.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        for model in (Tag, Ingredient):
+            stale = stale_recipe_counts(model.objects.all())
+            found = dict(stale.values_list('pk', 'user_id'))
+            label = model._meta.verbose_name_plural
+            if options['dry_run'] or not found:
+                self.stdout.write(f'{len(found)} stale {label}.')
+                continue
+
+            update_recipe_counts(model.objects.filter(pk__in=found))
+            for user_id in set(found.values()):
+                invalidate_user(user_id)
+            self.stdout.write(f'Fixed {len(found)} {label}.')
+
+        self.stdout.write(self.style.SUCCESS('Recipe counts reconciled.'))
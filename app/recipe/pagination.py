@@ -0,0 +1,109 @@
+"""
+Pagination for recipe APIs.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+class RecipeCursorPagination(CursorPagination):
+    """Keyset pagination following the view's ordering."""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        """Order pages the same way as the view's queryset."""
+        if hasattr(view, 'get_ordering'):
+            return tuple(view.get_ordering())
+
+        return tuple(getattr(view, 'ordering', self.ordering))
+
+
+class RecipeLimitOffsetPagination(LimitOffsetPagination):
+    """Limit/offset pagination for clients that need random access."""
+    max_limit = 1000
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of ``paginate_queryset``."""
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return [
+            item async for item in
+            queryset[self.offset:self.offset + self.limit]
+        ]
+
+
+class RecipePagination(BasePagination):
+    """
+    Paginate lists with keyset pagination unless asked for offsets.
+
+    Lists come in pages of ``PAGE_SIZE`` objects, or ``page_size`` when
+    sent, linked by cursors. Sending ``limit`` or ``offset`` selects
+    limit/offset pagination instead, for clients needing random access.
+    """
+    offset_query_params = ('limit', 'offset')
+
+    def __init__(self):
+        self.cursor_paginator = RecipeCursorPagination()
+        self.offset_paginator = RecipeLimitOffsetPagination()
+        self.paginator = self.cursor_paginator
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def _select_paginator(self, request):
+        """Return the paginator matching the request's query params."""
+        params = request.query_params
+        if any(param in params for param in self.offset_query_params):
+            return self.offset_paginator
+        return self.cursor_paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self._select_paginator(request)
+
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of ``paginate_queryset``.
+
+        Keyset pages run the sync paginator in a thread.
+        """
+        self.paginator = self._select_paginator(request)
+        if hasattr(self.paginator, 'apaginate_queryset'):
+            return await self.paginator.apaginate_queryset(
+                queryset, request, view)
+
+        return await sync_to_async(self.paginator.paginate_queryset)(
+            queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.cursor_paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.cursor_paginator.get_schema_operation_parameters(view) +
+            self.offset_paginator.get_schema_operation_parameters(view)
+        )
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
@@ -2,64 +2,202 @@
 Serializers for recipes APIs.
 """
 
+from django.core.files.storage import default_storage
+from django.utils.translation import gettext as _
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from core.counts import update_recipe_counts
 from core.models import Recipe, Tag, Ingredient
+from core.search import update_search_vectors
+from recipe.cache import invalidate_user
+from recipe.fieldsets import DynamicFieldsMixin
+from recipe.images import delete_variants, enqueue_variants
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """Reject renaming an object to a name its owner already uses."""
+
+    def validate_name(self, value):
+        """Check the name is unique for the object's owner."""
+        instance = self.instance
+        if instance is not None and getattr(instance, 'pk', None):
+            duplicate = type(instance).objects.filter(
+                user_id=instance.user_id,
+                name=value,
+            ).exclude(pk=instance.pk).exists()
+            if duplicate:
+                raise serializers.ValidationError(
+                    _('An item with this name already exists.'),
+                    code='unique',
+                )
+
+        return value
+
+
+class TagSerializer(DynamicFieldsMixin, UniqueNameMixin,
+                    serializers.ModelSerializer):
     """Serializer for the tag model."""
     class Meta:
         model = Tag
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        fields = ['id', 'name', 'recipe_count']
+        read_only_fields = ['id', 'recipe_count']
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(DynamicFieldsMixin, UniqueNameMixin,
+                           serializers.ModelSerializer):
     """Serializer for the Ingredient model."""
     class Meta:
         model = Ingredient
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        fields = ['id', 'name', 'recipe_count']
+        read_only_fields = ['id', 'recipe_count']
+
+
+def get_or_create_by_name(model, user, items):
+    """Return the user's objects named in items, creating missing ones.
+
+    Existing objects are looked up with a single query and the missing
+    ones are created with a single bulk insert. Names inserted by a
+    concurrent request are skipped by the unique constraint and picked
+    up by the second lookup. The result maps names to objects in the
+    order they first appear in items.
+    """
+    names = list(dict.fromkeys(item['name'] for item in items))
+    if not names:
+        return {}
+
+    objs = {
+        obj.name: obj
+        for obj in model.objects.filter(user=user, name__in=names)
+    }
+    missing = [model(user=user, name=name)
+               for name in names if name not in objs]
+    if missing:
+        model.objects.bulk_create(missing, ignore_conflicts=True)
+        invalidate_user(user.pk)
+        created = model.objects.filter(
+            user=user,
+            name__in=[obj.name for obj in missing],
+        )
+        objs.update((obj.name, obj) for obj in created)
+
+    return {name: objs[name] for name in names}
+
+
+def link_recipes(recipes, field_name, nested_items):
+    """Attach nested tags or ingredients to many recipes at once.
+
+    All names are resolved together and the links are written with one
+    bulk insert into the through table. ``m2m_changed`` is not sent: the
+    recipes are new, so there is no ``updated_at`` to touch, the recipe
+    counts are refreshed here in one statement and the caller invalidates
+    the owners' cached responses once.
+    """
+    relation = getattr(Recipe, field_name)
+    model = relation.rel.model
+    through = relation.through
+    column = f'{model._meta.model_name}_id'
+    links = {}
+
+    for user in {recipe.user for recipe in recipes}:
+        items = [
+            item
+            for recipe, recipe_items in zip(recipes, nested_items)
+            if recipe.user == user
+            for item in recipe_items
+        ]
+        objs = get_or_create_by_name(model, user, items)
+        for recipe, recipe_items in zip(recipes, nested_items):
+            if recipe.user != user:
+                continue
+            for name in dict.fromkeys(item['name'] for item in recipe_items):
+                links.setdefault(objs[name], set()).add(recipe.pk)
+
+    through.objects.bulk_create(
+        through(recipe_id=recipe_id, **{column: obj.pk})
+        for obj, recipe_ids in links.items()
+        for recipe_id in recipe_ids
+    )
+    update_recipe_counts(
+        model.objects.filter(pk__in=[obj.pk for obj in links]))
+
+
+def relink_recipes(recipes, field_name, nested_items):
+    """Replace the nested tags or ingredients of many recipes at once.
+
+    The old links are removed with one delete and the new ones written by
+    ``link_recipes``. The recipe counts of the objects losing recipes are
+    refreshed in one statement too.
+    """
+    relation = getattr(Recipe, field_name)
+    model = relation.rel.model
+    column = f'{model._meta.model_name}_id'
+    links = relation.through.objects.filter(
+        recipe_id__in=[recipe.pk for recipe in recipes])
+    unlinked = list(links.values_list(column, flat=True).distinct())
+    links.delete()
+
+    link_recipes(recipes, field_name, nested_items)
+    update_recipe_counts(model.objects.filter(pk__in=unlinked))
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Create many recipes with bulk inserts."""
+
+    def create(self, validated_data):
+        """Create the recipes and their links in a few queries."""
+        nested = {
+            field_name: [item.pop(field_name, []) for item in validated_data]
+            for field_name in ('tags', 'ingredients')
+        }
+        recipes = Recipe.objects.bulk_create(
+            Recipe(**item) for item in validated_data)
 
+        for field_name, nested_items in nested.items():
+            link_recipes(recipes, field_name, nested_items)
+        update_search_vectors(
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]))
+        for user_id in {recipe.user_id for recipe in recipes}:
+            invalidate_user(user_id)
 
-class RecipeSerializer(serializers.ModelSerializer):
+        return recipes
+
+
+class RecipeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for recipes."""
-    tags = TagSerializer(many=True, required=False)
-    ingredients = IngredientSerializer(many=True, required=False)
+    # Recipes embed only the names, counts belong to the tag and
+    # ingredient endpoints.
+    tags = TagSerializer(many=True, required=False, fields=['id', 'name'])
+    ingredients = IngredientSerializer(
+        many=True, required=False, fields=['id', 'name'])
 
     class Meta:
         model = Recipe
         fields = ['id', 'title', 'time_minutes', 'price',
                   'link', 'tags', 'ingredients']
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags):
         """Gets or creates tags."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
-
-    def _get_or_create_ingredients(self, ingredients, recipe):
+        return list(get_or_create_by_name(Tag, auth_user, tags).values())
+
+    def _get_or_create_ingredients(self, ingredients):
         """Handling creating ingredients as needed."""
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient
-            )
-            recipe.ingredients.add(ingredient_obj)
+        return list(
+            get_or_create_by_name(Ingredient, auth_user, ingredients).values())
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
         recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        if tags:
+            recipe.tags.add(*self._get_or_create_tags(tags))
+        if ingredients:
+            recipe.ingredients.add(
+                *self._get_or_create_ingredients(ingredients))
 
         return recipe
 
@@ -68,12 +206,11 @@ class RecipeSerializer(serializers.ModelSerializer):
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            instance.tags.set(self._get_or_create_tags(tags))
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            instance.ingredients.set(
+                self._get_or_create_ingredients(ingredients))
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -84,9 +221,54 @@ class RecipeSerializer(serializers.ModelSerializer):
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for detailed recipes."""
+    image_variants = serializers.SerializerMethodField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'image_status', 'image_variants',
+        ]
+        read_only_fields = RecipeSerializer.Meta.read_only_fields + [
+            'image_status',
+        ]
+
+    @extend_schema_field({
+        'type': 'object',
+        'additionalProperties': {
+            'type': 'object',
+            'additionalProperties': {'type': 'string', 'format': 'uri'},
+        },
+    })
+    def get_image_variants(self, recipe):
+        """Return the URLs of the resized images by size and format."""
+        request = self.context.get('request')
+        urls = {}
+        for variant, formats in recipe.image_variants.items():
+            urls[variant] = {}
+            for extension, path in formats.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[variant][extension] = url
+
+        return urls
+
+
+class RecipeLibrarySerializer(RecipeSerializer):
+    """Serializer for recipes in library exports and imports."""
+    tags = TagSerializer(many=True, required=False, fields=['name'])
+    ingredients = IngredientSerializer(
+        many=True, required=False, fields=['name'])
 
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = ['title', 'description', 'time_minutes', 'price',
+                  'link', 'tags', 'ingredients']
+
+
+class RecipeLibraryImportSerializer(serializers.Serializer):
+    """Serializer for the result of a library import."""
+    imported = serializers.IntegerField()
+    seconds = serializers.FloatField()
+    rows_per_second = serializers.FloatField()
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
@@ -94,6 +276,43 @@ class RecipeImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ['id', 'image']
-        read_only_fields = ['id']
+        fields = ['id', 'image', 'image_status']
+        read_only_fields = ['id', 'image_status']
         extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Store the image and queue its resized variants."""
+        delete_variants(instance.image_variants)
+        instance.image_status = Recipe.ImageStatus.PENDING
+        instance.image_variants = {}
+        recipe = super().update(instance, validated_data)
+        enqueue_variants(recipe)
+
+        return recipe
+
+
+class RecipeBulkOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a bulk recipe request."""
+    action = serializers.ChoiceField(choices=['create', 'update', 'delete'])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        """Check the operation has the fields its action needs."""
+        if attrs['action'] != 'create' and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': _('This field is required to update or delete.')})
+        if attrs['action'] != 'delete' and 'data' not in attrs:
+            raise serializers.ValidationError(
+                {'data': _('This field is required to create or update.')})
+
+        return attrs
+
+
+class RecipeBulkResultSerializer(serializers.Serializer):
+    """Serializer for the result of one bulk recipe operation."""
+    action = serializers.CharField()
+    id = serializers.IntegerField(allow_null=True)
+    status = serializers.IntegerField(required=False)
+    data = RecipeDetailSerializer(required=False)
+    errors = serializers.DictField(required=False)
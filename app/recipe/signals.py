@@ -0,0 +1,34 @@
+"""
+Signal handlers for recipe APIs.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.cache import invalidate_user
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Invalidate cached responses of the object's owner."""
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidate cached responses when the user changes."""
+    invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_links_cache(sender, instance, action, **kwargs):
+    """Invalidate cached responses when recipe links change."""
+    if action.startswith('post_'):
+        invalidate_user(instance.user_id)
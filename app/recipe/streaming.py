@@ -0,0 +1,96 @@
+"""
+Streamed JSON list responses.
+
+With ``?stream=1`` list endpoints write the JSON array incrementally while
+iterating the queryset in chunks of ``STREAM_CHUNK_SIZE`` rows, using a
+server-side cursor on PostgreSQL. Worker memory stays bounded by the chunk
+size rather than growing with the number of listed objects.
+"""
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from core.renderers import FastJSONRenderer
+from recipe.fastpath import ValuesReader
+
+STREAM_VALUES = ('1', 'true')
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def aiterate(iterable):
+    """Yield the items of a sync iterable, each read in a thread.
+
+    ``StreamingHttpResponse`` buffers sync iterators entirely when served
+    over ASGI. Every item is read the same way ``QuerySet.aiterator()``
+    does, so a server-side cursor stays on one connection.
+    """
+    iterator = iter(iterable)
+    done = object()
+    while True:
+        item = await sync_to_async(next)(iterator, done)
+        if item is done:
+            return
+        yield item
+
+
+class StreamingListMixin:
+    """Stream list responses when the request asks for it."""
+
+    def _wants_stream(self):
+        return self.request.query_params.get('stream') in STREAM_VALUES
+
+    def _stream_chunks(self, queryset):
+        """Yield the rendered data of the listed objects chunk by chunk."""
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        serializer = self.get_serializer()
+        if (settings.FAST_LIST_SERIALIZATION and
+                ValuesReader.supports(serializer)):
+            reader = ValuesReader(serializer)
+            rows = reader.queryset(queryset).iterator(chunk_size=chunk_size)
+            for chunk in chunked(rows, chunk_size):
+                yield reader.represent(chunk)
+        else:
+            objs = queryset.iterator(chunk_size=chunk_size)
+            for chunk in chunked(objs, chunk_size):
+                yield self.get_serializer(chunk, many=True).data
+
+    def _stream_json(self, queryset):
+        """Yield the bytes of a JSON array of the listed objects."""
+        renderer = FastJSONRenderer()
+        separator = b'['
+        for data in self._stream_chunks(queryset):
+            # Render the chunk as an array and drop its brackets.
+            yield separator + renderer.render(data)[1:-1]
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+    def list(self, request, *args, **kwargs):
+        if not self._wants_stream():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            self._stream_json(queryset),
+            content_type='application/json',
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        if not self._wants_stream():
+            return await super().alist(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(
+            aiterate(self._stream_json(queryset)),
+            content_type='application/json',
+        )
@@ -0,0 +1,189 @@
+"""
+Tests for the async read paths of the recipe APIs.
+"""
+import json
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import include, path, resolve
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+from core.tests.mixins import SharedCacheMixin
+from recipe import views
+
+with override_settings(ASYNC_VIEWS=True):
+    router = DefaultRouter()
+    router.register('recipes', views.RecipeViewSet)
+    router.register('tags', views.TagViewSet)
+    router.register('ingredients', views.IngredientViewSet)
+    async_urls = router.urls
+
+urlpatterns = [
+    path('', include('app.urls')),
+    path('async/api/recipe/', include((async_urls, 'async'))),
+]
+
+RECIPES_PATH = 'api/recipe/recipes/'
+TAGS_PATH = 'api/recipe/tags/'
+ASYNC_RECIPES_URL = f'/async/{RECIPES_PATH}'
+ASYNC_TAGS_URL = f'/async/{TAGS_PATH}'
+
+
+@override_settings(ROOT_URLCONF=__name__, RESPONSE_CACHE_TIMEOUT=0)
+class AsyncReadTests(SharedCacheMixin, TestCase):
+    """Test the async views answer like the sync ones."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.sync_client = APIClient()
+        self.sync_client.force_authenticate(self.user)
+        token = Token.objects.create(user=self.user)
+        self.async_client = AsyncClient()
+        self.auth = {'Authorization': f'Token {token.key}'}
+
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Breakfast', 'Dinner', 'Dessert')]
+        salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.recipes = []
+        for i in range(6):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {i}', time_minutes=i,
+                price=Decimal(f'{i}.50'), description='Tasty',
+            )
+            recipe.tags.add(*tags[:i % 3 + 1])
+            if i % 2:
+                recipe.ingredients.add(salt)
+            self.recipes.append(recipe)
+
+    async def _compare(self, url, params=None):
+        """Assert the async endpoint answers like the sync one."""
+        expected = await sync_to_async(self.sync_client.get)(
+            f'/{url}', params)
+        res = await self.async_client.get(
+            f'/async/{url}', params, headers=self.auth)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(
+            res.content.replace(b'/async/', b'/'), expected.content)
+        return res
+
+    def test_views_are_async(self):
+        """Test only views built with ASYNC_VIEWS on are coroutines."""
+        self.assertTrue(iscoroutinefunction(resolve(ASYNC_RECIPES_URL).func))
+        self.assertTrue(iscoroutinefunction(resolve(ASYNC_TAGS_URL).func))
+        self.assertFalse(
+            iscoroutinefunction(resolve(f'/{RECIPES_PATH}').func))
+
+    async def test_list_matches_sync(self):
+        """Test async lists render the same bodies as sync ones."""
+        cases = [
+            {},
+            {'fields': 'id,title,tags'},
+            {'ordering': 'price', 'max_time': 4},
+            {'limit': 2, 'offset': 1},
+            {'page_size': 2},
+            {'tags': self.recipes[0].id},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                res = await self._compare(RECIPES_PATH, params)
+                self.assertIn('ETag', res)
+
+    async def test_retrieve_matches_sync(self):
+        """Test async detail responses match the sync ones."""
+        recipe = self.recipes[2]
+        await self._compare(f'{RECIPES_PATH}{recipe.id}/')
+        await self._compare(f'{RECIPES_PATH}{recipe.id}/', {'omit': 'tags'})
+
+    async def test_retrieve_other_users_recipe(self):
+        """Test other users' recipes are not found."""
+        other = await get_user_model().objects.acreate(email='o@example.com')
+        recipe = await Recipe.objects.acreate(
+            user=other, title='Secret', time_minutes=1, price=Decimal('1'))
+
+        res = await self.async_client.get(
+            f'{ASYNC_RECIPES_URL}{recipe.id}/', headers=self.auth)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_not_modified(self):
+        """Test a current ETag gets a 304 without a body."""
+        res = await self.async_client.get(ASYNC_RECIPES_URL, headers=self.auth)
+
+        res = await self.async_client.get(ASYNC_RECIPES_URL, headers={
+            'If-None-Match': res['ETag'], **self.auth})
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=60)
+    async def test_cached_response(self):
+        """Test repeated async reads are served from the cache."""
+        first = await self.async_client.get(ASYNC_TAGS_URL, headers=self.auth)
+        second = await self.async_client.get(ASYNC_TAGS_URL, headers=self.auth)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    @override_settings(STREAM_CHUNK_SIZE=4)
+    async def test_stream(self):
+        """Test streamed async lists match the regular page."""
+        expected = await sync_to_async(self.sync_client.get)(
+            f'/{RECIPES_PATH}')
+
+        res = await self.async_client.get(
+            ASYNC_RECIPES_URL, {'stream': 1}, headers=self.auth)
+
+        self.assertTrue(res.is_async)
+        body = b''.join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(json.loads(body), expected.json()['results'])
+
+    @override_settings(STREAM_CHUNK_SIZE=4)
+    async def test_export(self):
+        """Test async exports are streamed and match the sync ones."""
+        expected = await sync_to_async(lambda: b''.join(self.sync_client.get(
+            f'/{RECIPES_PATH}export/', {'export_format': 'csv'},
+        ).streaming_content))()
+
+        res = await self.async_client.get(
+            f'{ASYNC_RECIPES_URL}export/', {'export_format': 'csv'},
+            headers=self.auth)
+
+        self.assertTrue(res.is_async)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        body = b''.join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(body, expected)
+
+    async def test_tags(self):
+        """Test tag lists and autocomplete match the sync ones."""
+        await self._compare(TAGS_PATH)
+        await self._compare(TAGS_PATH, {'assigned_only': 1})
+        await self._compare(TAGS_PATH, {'q': 'des'})
+
+    async def test_write_runs_sync_code(self):
+        """Test writes through the async views still work."""
+        res = await self.async_client.post(
+            ASYNC_RECIPES_URL,
+            {'title': 'Soup', 'time_minutes': 5, 'price': '2.00',
+             'tags': [{'name': 'Dinner'}]},
+            content_type='application/json',
+            headers=self.auth,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = await Recipe.objects.aget(pk=res.json()['id'])
+        self.assertEqual(recipe.title, 'Soup')
+
+    async def test_auth_required(self):
+        """Test anonymous async reads are rejected."""
+        res = await AsyncClient().get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
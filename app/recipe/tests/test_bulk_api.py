@@ -0,0 +1,215 @@
+"""
+Tests for the bulk recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.mixins import QueryDetectorMixin
+
+BULK_URL = reverse('recipe:recipe-bulk')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 25,
+        'price': Decimal('10.85'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(title, **params):
+    """Return the data of a recipe to create."""
+    payload = {'title': title, 'time_minutes': 10, 'price': '2.50'}
+    payload.update(params)
+    return payload
+
+
+class BulkRecipeAPITests(QueryDetectorMixin, TestCase):
+    """Test the bulk recipe endpoint."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_update_delete(self):
+        """Test applying mixed operations returns per-item results."""
+        to_update = create_recipe(self.user, title='Old')
+        to_delete = create_recipe(self.user, title='Gone')
+        payload = [
+            {'action': 'create', 'data': recipe_payload(
+                'Soup', tags=[{'name': 'Dinner'}, {'name': 'Hot'}])},
+            {'action': 'update', 'id': to_update.id,
+             'data': {'title': 'New', 'tags': [{'name': 'Dinner'}]}},
+            {'action': 'delete', 'id': to_delete.id},
+            {'action': 'create', 'data': recipe_payload(
+                'Salad', ingredients=[{'name': 'Lettuce'}])},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['status'] for item in res.data], [201, 200, 204, 201])
+        soup = Recipe.objects.get(id=res.data[0]['id'])
+        self.assertEqual(soup.user, self.user)
+        self.assertEqual(
+            sorted(tag.name for tag in soup.tags.all()), ['Dinner', 'Hot'])
+        self.assertEqual(res.data[0]['data']['title'], 'Soup')
+        to_update.refresh_from_db()
+        self.assertEqual(to_update.title, 'New')
+        self.assertEqual(res.data[1]['data']['tags'][0]['name'], 'Dinner')
+        self.assertFalse(Recipe.objects.filter(id=to_delete.id).exists())
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        salad = Recipe.objects.get(id=res.data[3]['id'])
+        self.assertEqual(salad.ingredients.get().name, 'Lettuce')
+
+    def test_bulk_invalid_item_applies_nothing(self):
+        """Test one invalid operation rejects the whole request."""
+        recipe = create_recipe(self.user)
+        payload = [
+            {'action': 'create', 'data': recipe_payload('Soup')},
+            {'action': 'create', 'data': {'title': 'No price'}},
+            {'action': 'delete', 'id': recipe.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0]['errors'], {})
+        self.assertIn('price', res.data[1]['errors'])
+        self.assertEqual(res.data[2]['errors'], {})
+        self.assertEqual(Recipe.objects.count(), 1)
+
+    def test_bulk_other_users_recipe_not_found(self):
+        """Test operations on another user's recipe are rejected."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        recipe = create_recipe(other)
+        payload = [
+            {'action': 'update', 'id': recipe.id, 'data': {'title': 'X'}},
+            {'action': 'delete', 'id': recipe.id},
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data[0]['errors'])
+        self.assertIn('id', res.data[1]['errors'])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Sample Title')
+
+    def test_bulk_operation_requires_id(self):
+        """Test update and delete operations need an id."""
+        payload = [{'action': 'delete'}]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_BULK_MAX_OPERATIONS=2)
+    def test_bulk_operation_limit(self):
+        """Test requests with too many operations are rejected."""
+        payload = [
+            {'action': 'create', 'data': recipe_payload(f'Recipe {i}')}
+            for i in range(3)
+        ]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    @override_settings(RECIPE_BULK_MAX_OPERATIONS=2)
+    def test_bulk_operation_limit_before_validation(self):
+        """Test the operations are counted before they are validated."""
+        payload = [{'action': 'rename'} for _ in range(3)]
+
+        res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(res.data), ['non_field_errors'])
+
+    def test_bulk_create_query_count(self):
+        """Test the number of queries does not grow with the recipes."""
+        payload = [
+            {'action': 'create', 'data': recipe_payload(
+                f'Recipe {i}', tags=[{'name': 'Shared'}, {'name': f'T{i}'}])}
+            for i in range(20)
+        ]
+
+        with self.assertNumQueries(11):
+            res = self.client.post(BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Recipe.objects.count(), 20)
+        self.assertEqual(Tag.objects.count(), 21)
+
+    def _count_queries(self, payload):
+        """Return the number of queries a bulk request runs."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        return len(queries)
+
+    def _update_payload(self, count):
+        """Return updates of count new recipes, retagging each one."""
+        old = Tag.objects.create(user=self.user, name='Old')
+        recipes = [create_recipe(self.user) for _ in range(count)]
+        for recipe in recipes:
+            recipe.tags.add(old)
+
+        return [
+            {'action': 'update', 'id': recipe.id, 'data': {
+                'title': f'Updated {i}',
+                'tags': [{'name': 'Shared'}, {'name': f'T{i}'}],
+            }}
+            for i, recipe in enumerate(recipes)
+        ]
+
+    def test_bulk_update_query_count(self):
+        """Test updates run the same number of queries for any count."""
+        few = self._count_queries(self._update_payload(5))
+        Recipe.objects.all().delete()
+        Tag.objects.all().delete()
+
+        many = self._count_queries(self._update_payload(50))
+
+        self.assertEqual(few, many)
+        self.assertEqual(Tag.objects.get(name='Old').recipe_count, 0)
+        self.assertEqual(Tag.objects.get(name='Shared').recipe_count, 50)
+        self.assertEqual(
+            Recipe.objects.filter(title__startswith='Updated').count(), 50)
+
+    def _delete_payload(self, count):
+        """Return deletes of count new tagged recipes."""
+        tag = Tag.objects.create(user=self.user, name=f'Tag {count}')
+        recipes = [create_recipe(self.user) for _ in range(count)]
+        for recipe in recipes:
+            recipe.tags.add(tag)
+
+        return [{'action': 'delete', 'id': recipe.id} for recipe in recipes]
+
+    def test_bulk_delete_query_count(self):
+        """Test deletes run the same number of queries for any count."""
+        few = self._count_queries(self._delete_payload(5))
+        many = self._count_queries(self._delete_payload(50))
+
+        self.assertEqual(few, many)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertEqual(
+            list(Tag.objects.values_list('recipe_count', flat=True)), [0, 0])
@@ -0,0 +1,134 @@
+"""
+Tests for the recipe API response cache.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.mixins import SharedCacheMixin
+from recipe.cache import get_cache, get_cache_stats
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ResponseCacheTests(SharedCacheMixin, TestCase):
+    """Tests for cached list and detail responses."""
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_second_request_served_from_cache(self):
+        """Test repeated requests hit the cache without queries."""
+        create_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached['X-Cache'], 'HIT')
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_query_params_normalized(self):
+        """Test query params order does not change the cache key."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        self.client.get(RECIPES_URL + f'?tags={tag.id}&tags_mode=all')
+        res = self.client.get(RECIPES_URL + f'?tags_mode=all&tags={tag.id}')
+
+        self.assertEqual(res['X-Cache'], 'HIT')
+
+    def test_write_through_api_invalidates(self):
+        """Test creating a recipe through the API invalidates the list."""
+        self.client.get(RECIPES_URL)
+        payload = {
+            'title': 'New recipe',
+            'time_minutes': 5,
+            'price': Decimal('1.00'),
+            'tags': [{'name': 'Quick'}],
+        }
+        self.client.post(RECIPES_URL, payload, format='json')
+
+        res = self.client.get(RECIPES_URL)
+        tags = self.client.get(TAGS_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual([t['name'] for t in tags.data['results']], ['Quick'])
+
+    def test_tag_change_invalidates_recipe_detail(self):
+        """Test renaming a tag invalidates cached recipes."""
+        recipe = create_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        url = reverse('recipe:recipe-detail', args=[recipe.id])
+        self.client.get(url)
+
+        tag_url = reverse('recipe:tag-detail', args=[tag.id])
+        self.client.patch(tag_url, {'name': 'Vegetarian'})
+        res = self.client.get(url)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['tags'][0]['name'], 'Vegetarian')
+
+    def test_cache_limited_to_user(self):
+        """Test cached responses are not shared between users."""
+        create_recipe(user=self.user)
+        self.client.get(RECIPES_URL)
+
+        other_client = APIClient()
+        other_client.force_authenticate(create_user(email='other@example.com'))
+        res = other_client.get(RECIPES_URL)
+
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'], [])
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """Test a zero timeout disables the response cache."""
+        self.client.get(RECIPES_URL)
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('X-Cache', res)
+
+    def test_process_local_cache_not_used(self):
+        """Test responses are not cached where other workers miss writes."""
+        locmem = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with override_settings(CACHES=locmem):
+            self.client.get(RECIPES_URL)
+            res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('X-Cache', res)
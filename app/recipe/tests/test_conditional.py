@@ -0,0 +1,202 @@
+"""
+Tests for conditional GET requests to the recipe API.
+"""
+import hashlib
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.tests.mixins import SharedCacheMixin
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': Decimal('5.00'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetTests(SharedCacheMixin, TestCase):
+    """Tests for ETag and Last-Modified handling."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_not_modified(self):
+        """Test a matching If-None-Match returns 304 from the cache."""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertIn('ETag', res)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_list_not_modified_uncached(self):
+        """Test unchanged lists get a 304 without the response cache."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_list_not_modified_since(self):
+        """Test lists answer If-Modified-Since until the user writes."""
+        recipe = create_recipe(user=self.user)
+        last_modified = self.client.get(RECIPES_URL)['Last-Modified']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with mock.patch('recipe.cache.time.time_ns',
+                        return_value=time.time_ns() + 10 ** 9):
+            recipe.delete()
+        res = self.client.get(
+            RECIPES_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], [])
+
+    def test_list_etag_changes_on_delete(self):
+        """Test deleting a recipe changes the list ETag."""
+        create_recipe(user=self.user)
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_etag_depends_on_query_params(self):
+        """Test filtered lists get their own ETag."""
+        create_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        res = self.client.get(RECIPES_URL, {'limit': 1})
+
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_detail_etag_changes_on_tag_change(self):
+        """Test adding a tag changes the recipe ETag."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 1)
+
+    def test_detail_not_modified_since(self):
+        """Test If-Modified-Since returns 304 for an unchanged recipe."""
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(detail_url(recipe.id))
+        self.assertIn('Last-Modified', res)
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            HTTP_IF_MODIFIED_SINCE=res['Last-Modified'],
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_detail_not_modified_without_queries(self):
+        """Test revalidating a recipe does not query the database."""
+        recipe = create_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_missing_recipe(self):
+        """Test other users' recipes still return 404."""
+        other = get_user_model().objects.create_user(
+            'other@example.com',
+            'testpass123',
+        )
+        recipe = create_recipe(user=other)
+
+        res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
+
+
+class ProcessLocalConditionalGetTests(TestCase):
+    """Tests for validators with a cache other workers do not see."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'user@example.com',
+            'testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_etag_of_body(self):
+        """Test the list ETag is a digest of the rendered body."""
+        recipe = create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(
+            res['ETag'], '"%s"' % hashlib.sha1(res.content).hexdigest())
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        recipe.delete()
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_detail_not_modified_since_before_loading(self):
+        """Test If-Modified-Since only reads the recipe's updated_at."""
+        recipe = create_recipe(user=self.user)
+        last_modified = self.client.get(
+            detail_url(recipe.id))['Last-Modified']
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                detail_url(recipe.id), HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,92 @@
+"""
+Tests for the fast list read path.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.fastpath import ValuesReader
+from recipe.serializers import (
+    RecipeDetailSerializer,
+    RecipeSerializer,
+    TagSerializer,
+)
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0)
+class FastListTests(TestCase):
+    """Test the fast path renders the same output as the serializers."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(3)]
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10 + i,
+                price=Decimal('1.5') * i,
+                link='' if i % 2 else 'https://example.com',
+            )
+            recipe.tags.add(*tags[:i % 4])
+            if i % 2:
+                recipe.ingredients.add(ingredient)
+
+    def _get_both(self, url, params=None):
+        """Return the content of a GET with and without the fast path."""
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            fast = self.client.get(url, params).content
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = self.client.get(url, params).content
+
+        return fast, slow
+
+    def test_recipe_list_identical(self):
+        """Test recipe lists are byte for byte identical."""
+        fast, slow = self._get_both(RECIPES_URL)
+
+        self.assertEqual(fast, slow)
+
+    def test_paginated_filtered_list_identical(self):
+        """Test pages of filtered, sorted recipes are identical."""
+        params = {'ordering': '-price', 'max_time': 13, 'page_size': 2}
+
+        fast, slow = self._get_both(RECIPES_URL, params)
+
+        self.assertEqual(fast, slow)
+
+    def test_fieldset_list_identical(self):
+        """Test lists with a fieldset are identical."""
+        fast, slow = self._get_both(RECIPES_URL, {'fields': 'title,tags'})
+
+        self.assertEqual(fast, slow)
+
+    def test_tag_list_identical(self):
+        """Test tag lists are identical."""
+        fast, slow = self._get_both(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(fast, slow)
+
+    def test_recipe_list_queries(self):
+        """Test the fast path runs one query per relation."""
+        with self.assertNumQueries(3):
+            self.client.get(RECIPES_URL)
+
+    def test_supports(self):
+        """Test serializers needing model instances are not supported."""
+        self.assertTrue(ValuesReader.supports(RecipeSerializer()))
+        self.assertTrue(ValuesReader.supports(TagSerializer()))
+        self.assertFalse(ValuesReader.supports(RecipeDetailSerializer()))
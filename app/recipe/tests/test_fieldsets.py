@@ -0,0 +1,109 @@
+"""
+Tests for sparse fieldsets on the recipe APIs.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return the recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 25,
+        'price': Decimal('10.85'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class SparseFieldsetTests(TestCase):
+    """Test selecting the fields returned by the APIs."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_list_fields(self):
+        """Test only the requested fields are returned and queried."""
+        recipe = create_recipe(self.user, title='Soup')
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Dinner'))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'], [{'id': recipe.id, 'title': 'Soup'}])
+        sql = [query['sql'] for query in queries]
+        self.assertFalse(any('core_recipe_tags' in query for query in sql))
+        self.assertFalse(any('"description"' in query for query in sql))
+
+    def test_list_omit(self):
+        """Test omitted fields and their relations are skipped."""
+        recipe = create_recipe(self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Dinner'))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                RECIPES_URL, {'omit': 'tags,ingredients'})
+
+        self.assertEqual(
+            set(res.data['results'][0]),
+            {'id', 'title', 'time_minutes', 'price', 'link'},
+        )
+        self.assertFalse(any(
+            'core_recipe_tags' in query['sql'] for query in queries))
+
+    def test_detail_fields(self):
+        """Test selecting fields of a recipe's details."""
+        recipe = create_recipe(self.user, description='Hot')
+
+        res = self.client.get(
+            detail_url(recipe.id), {'fields': 'description,tags'})
+
+        self.assertEqual(res.data, {'description': 'Hot', 'tags': []})
+
+    def test_unknown_field_error(self):
+        """Test asking for an unknown field is rejected."""
+        res = self.client.get(RECIPES_URL, {'fields': 'id,user'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_tags_fields(self):
+        """Test selecting the fields of tags."""
+        Tag.objects.create(user=self.user, name='Dinner')
+
+        res = self.client.get(TAGS_URL, {'fields': 'name'})
+
+        self.assertEqual(res.data['results'], [{'name': 'Dinner'}])
+
+    def test_write_ignores_fields(self):
+        """Test fieldsets do not restrict the fields written."""
+        payload = {'title': 'Soup', 'time_minutes': 10, 'price': '2.00'}
+
+        res = self.client.post(
+            RECIPES_URL + '?fields=id', payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['title'], 'Soup')
@@ -2,7 +2,10 @@
 Test for ingredients APIs.
 """
 from decimal import Decimal
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
 
@@ -10,6 +13,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Ingredient, Recipe
+from core.tests.mixins import QueryDetectorMixin
 
 from recipe.serializers import IngredientSerializer
 
@@ -40,7 +44,7 @@ class PublicIngredientTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateIngredientTests(TestCase):
+class PrivateIngredientTests(QueryDetectorMixin, TestCase):
     """Tests for authorized API requests."""
 
     def setUp(self):
@@ -59,7 +63,7 @@ class PrivateIngredientTests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test list of ingredients is limited to authenticated user."""
@@ -70,9 +74,9 @@ class PrivateIngredientTests(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
-        self.assertEqual(res.data[0]['id'], ingredient.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+        self.assertEqual(res.data['results'][0]['id'], ingredient.id)
 
     def test_ingredient_update(self):
         """Test updating ingredient successful."""
@@ -120,11 +124,12 @@ class PrivateIngredientTests(TestCase):
 
         res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
 
+        in1.refresh_from_db()
         s1 = IngredientSerializer(in1)
         s2 = IngredientSerializer(in2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_ingredients_unique(self):
         """Test filtered ingredients return unique list."""
@@ -147,4 +152,34 @@ class PrivateIngredientTests(TestCase):
 
         res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_ingredients_autocomplete(self):
+        """Test q returns the user's ingredients matching the term."""
+        Ingredient.objects.create(user=self.user, name='Garlic')
+        Ingredient.objects.create(user=self.user, name='Gar masala')
+        Ingredient.objects.create(user=self.user, name='Salt')
+        other = create_user(email='other@example.com')
+        Ingredient.objects.create(user=other, name='Garam')
+
+        res = self.client.get(INGREDIENT_URL, {'q': 'gar'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [i['name'] for i in res.data],
+            ['Gar masala', 'Garlic'],
+        )
+
+    @skipUnless(connection.vendor != 'postgresql',
+                'PostgreSQL matches similar words instead.')
+    def test_ingredients_autocomplete_contains(self):
+        """Test q falls back to names containing the term without trigrams."""
+        Ingredient.objects.create(user=self.user, name='Sugar')
+        Ingredient.objects.create(user=self.user, name='Garlic')
+
+        res = self.client.get(INGREDIENT_URL, {'q': 'gar'})
+
+        self.assertEqual(
+            [i['name'] for i in res.data],
+            ['Garlic', 'Sugar'],
+        )
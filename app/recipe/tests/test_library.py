@@ -0,0 +1,171 @@
+"""
+Tests for exporting and importing recipe libraries.
+"""
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, Tag
+
+EXPORT_URL = reverse('recipe:recipe-export')
+IMPORT_URL = reverse('recipe:recipe-import')
+
+
+@override_settings(STREAM_CHUNK_SIZE=7, RECIPE_IMPORT_BATCH_SIZE=5)
+class RecipeLibraryTests(TestCase):
+    """Test exporting and importing a recipe library."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, user, count):
+        """Create count recipes for user with tags and ingredients."""
+        dinner = Tag.objects.create(user=user, name='Dinner')
+        salt = Ingredient.objects.create(user=user, name='Salt')
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                user=user, title=f'Recipe, "{i}"', time_minutes=i,
+                price=Decimal('2.50'), description=f'Line 1\nLine {i}',
+            )
+            recipe.tags.add(dinner)
+            if i % 2:
+                recipe.ingredients.add(salt)
+
+    def _export(self, export_format):
+        """Return the body of an export."""
+        res = self.client.get(EXPORT_URL, {'export_format': export_format})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content)
+
+    def _library(self, user):
+        """Return the recipes of user as comparable tuples."""
+        return sorted(
+            (recipe.title, recipe.description, recipe.time_minutes,
+             recipe.price, recipe.link,
+             tuple(tag.name for tag in recipe.tags.all()),
+             tuple(item.name for item in recipe.ingredients.all()))
+            for recipe in Recipe.objects.filter(user=user)
+        )
+
+    def test_export_ndjson(self):
+        """Test every recipe is exported as a JSON line."""
+        self._create_recipes(self.user, 15)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        self._create_recipes(other, 3)
+
+        lines = self._export('ndjson').splitlines()
+
+        self.assertEqual(len(lines), 15)
+        record = json.loads(lines[1])
+        self.assertEqual(record, {
+            'title': 'Recipe, "1"',
+            'description': 'Line 1\nLine 1',
+            'time_minutes': 1,
+            'price': '2.50',
+            'link': '',
+            'tags': [{'name': 'Dinner'}],
+            'ingredients': [{'name': 'Salt'}],
+        })
+
+    def test_export_headers(self):
+        """Test the export is served as a downloadable file."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'csv'})
+
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        self.assertIn('recipes.csv', res['Content-Disposition'])
+
+    def test_export_invalid_format(self):
+        """Test unknown export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {'export_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_round_trip(self):
+        """Test importing an export recreates the library."""
+        self._create_recipes(self.user, 12)
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        Tag.objects.create(user=other, name='Dinner')
+
+        for export_format, media_type in (('ndjson', 'application/x-ndjson'),
+                                          ('csv', 'text/csv')):
+            with self.subTest(export_format=export_format):
+                body = self._export(export_format)
+                self.client.force_authenticate(other)
+                Recipe.objects.filter(user=other).delete()
+
+                res = self.client.post(
+                    IMPORT_URL, body, content_type=media_type)
+
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(res.data['imported'], 12)
+                self.assertIn('rows_per_second', res.data)
+                self.assertEqual(
+                    self._library(other), self._library(self.user))
+                self.assertEqual(
+                    Tag.objects.filter(user=other, name='Dinner').count(), 1)
+                self.client.force_authenticate(self.user)
+
+    def test_import_invalid_rows_rolls_back(self):
+        """Test one invalid record cancels the whole import."""
+        lines = [
+            {'title': f'Recipe {i}', 'time_minutes': 5, 'price': '1.00'}
+            for i in range(8)
+        ]
+        lines[6]['time_minutes'] = 'slow'
+        body = '\n'.join(json.dumps(line) for line in lines)
+
+        res = self.client.post(
+            IMPORT_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(7, res.data['records'])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_import_malformed_ndjson(self):
+        """Test malformed lines are reported with their number."""
+        body = '{"title": "Soup", "time_minutes": 5, "price": "1.00"}\n{'
+
+        res = self.client.post(
+            IMPORT_URL, body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 2', res.data['detail'])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+
+    def test_import_command(self):
+        """Test the import command loads an export file."""
+        self._create_recipes(self.user, 4)
+        body = self._export('csv')
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recipes.csv')
+            with open(path, 'wb') as export:
+                export.write(body)
+            out = StringIO()
+
+            call_command('import_recipes', other.email, path, stdout=out)
+
+            with self.assertRaises(CommandError):
+                call_command('import_recipes', 'missing@example.com', path)
+
+        self.assertIn('Imported 4 recipes', out.getvalue())
+        self.assertIn('rows/sec', out.getvalue())
+        self.assertEqual(self._library(other), self._library(self.user))
@@ -2,14 +2,21 @@
 Tests for recipe app.
 """
 
+from datetime import timedelta
 from decimal import Decimal
+from io import StringIO
 import tempfile
 import os
 from PIL import Image
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -18,7 +25,9 @@ from core.models import (Recipe,
                          Tag,
                          Ingredient,
                          )
+from core.tests.mixins import QueryDetectorMixin
 
+from recipe.images import delete_variants
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 
@@ -69,7 +78,7 @@ class PublicRecipeAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateRecipeAPITests(TestCase):
+class PrivateRecipeAPITests(QueryDetectorMixin, TestCase):
     """Authorized request for the recipe API."""
 
     def setUp(self):
@@ -87,7 +96,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_list_limited_to_user(self):
         """Test recipe list is limited to the authenticated user."""
@@ -102,7 +111,7 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_recipe_detail(self):
         """Test getting detail recipe."""
@@ -418,9 +427,9 @@ class PrivateRecipeAPITests(TestCase):
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
 
     def test_filter_by_ingredients(self):
         """Test filtering by ingredients."""
@@ -439,9 +448,261 @@ class PrivateRecipeAPITests(TestCase):
         s2 = RecipeSerializer(r2)
         s3 = RecipeSerializer(r3)
 
-        self.assertIn(s1.data, res.data)
-        self.assertIn(s2.data, res.data)
-        self.assertNotIn(s3.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertIn(s2.data, res.data['results'])
+        self.assertNotIn(s3.data, res.data['results'])
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes having all of the given tags."""
+        r1 = create_recipe(user=self.user, title='Vegan Curry')
+        r2 = create_recipe(user=self.user, title='Vegan Salad')
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        spicy = Tag.objects.create(user=self.user, name='Spicy')
+        r1.tags.add(vegan, spicy)
+        r2.tags.add(vegan)
+
+        params = {'tags': f'{vegan.id},{spicy.id}', 'tags_mode': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['results']], [r1.id])
+
+    def test_filter_by_tags_invalid_mode(self):
+        """Test an unknown tags_mode returns an error."""
+        res = self.client.get(RECIPES_URL, {'tags_mode': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_tags_and_ingredients_without_distinct(self):
+        """Test filters use semi-joins and return each recipe once."""
+        recipe = create_recipe(user=self.user)
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(3)]
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        recipe.tags.add(*tags)
+        recipe.ingredients.add(ingredient)
+
+        params = {
+            'tags': ','.join(str(tag.id) for tag in tags),
+            'ingredients': str(ingredient.id),
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, params)
+
+        self.assertEqual([r['id'] for r in res.data['results']], [recipe.id])
+        self.assertFalse(
+            any('DISTINCT' in query['sql'] for query in queries))
+
+    def test_cursor_pagination(self):
+        """Test walking the recipe list with cursor pagination."""
+        recipes = [create_recipe(user=self.user, title=f'Recipe {i}')
+                   for i in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[4].id, recipes[3].id],
+        )
+        self.assertIsNone(res.data['previous'])
+
+        seen = []
+        url = RECIPES_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            seen.extend(r['id'] for r in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(seen, [r.id for r in reversed(recipes)])
+
+    def test_limit_offset_pagination(self):
+        """Test opting in to limit/offset pagination."""
+        recipes = [create_recipe(user=self.user, title=f'Recipe {i}')
+                   for i in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'limit': 2, 'offset': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[3].id, recipes[2].id],
+        )
+
+    def test_filter_by_time_and_price_range(self):
+        """Test filtering recipes by time and price ranges."""
+        quick = create_recipe(user=self.user, time_minutes=15,
+                              price=Decimal('8.00'))
+        create_recipe(user=self.user, time_minutes=15, price=Decimal('12.00'))
+        create_recipe(user=self.user, time_minutes=45, price=Decimal('5.00'))
+        slow = create_recipe(user=self.user, time_minutes=90,
+                             price=Decimal('20.00'))
+
+        res = self.client.get(RECIPES_URL, {'max_time': 30,
+                                            'max_price': '10'})
+        self.assertEqual([r['id'] for r in res.data['results']], [quick.id])
+
+        res = self.client.get(RECIPES_URL, {'min_time': 60,
+                                            'min_price': '15.50'})
+        self.assertEqual([r['id'] for r in res.data['results']], [slow.id])
+
+    def test_invalid_range_filter_error(self):
+        """Test invalid range values are rejected."""
+        res = self.client.get(RECIPES_URL, {'max_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_price', res.data)
+
+    def test_ordering(self):
+        """Test sorting recipes by time and by price."""
+        r1 = create_recipe(user=self.user, time_minutes=30,
+                           price=Decimal('3.00'))
+        r2 = create_recipe(user=self.user, time_minutes=10,
+                           price=Decimal('9.00'))
+        r3 = create_recipe(user=self.user, time_minutes=30,
+                           price=Decimal('1.00'))
+
+        res = self.client.get(RECIPES_URL, {'ordering': 'time_minutes'})
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [r2.id, r1.id, r3.id])
+
+        res = self.client.get(RECIPES_URL, {'ordering': '-price'})
+        self.assertEqual(
+            [r['id'] for r in res.data['results']], [r2.id, r1.id, r3.id])
+
+    def test_invalid_ordering_error(self):
+        """Test unsupported orderings are rejected."""
+        res = self.client.get(RECIPES_URL, {'ordering': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_cursor_pagination(self):
+        """Test cursor pages follow the requested ordering and filters."""
+        recipes = [
+            create_recipe(user=self.user, price=Decimal(price))
+            for price in ['4.00', '2.00', '4.00', '1.00', '3.00', '12.00']
+        ]
+        expected = [recipes[i].id for i in [3, 1, 4, 0, 2]]
+
+        seen = []
+        url = RECIPES_URL + '?ordering=price&max_price=5&page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(r['id'] for r in res.data['results'])
+            url = res.data['next']
+
+        self.assertEqual(seen, expected)
+
+
+class RecipeQueryCountTests(QueryDetectorMixin, TestCase):
+    """Tests the number of queries run by the recipe API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, count):
+        """Create recipes with tags and ingredients attached."""
+        for i in range(count):
+            recipe = create_recipe(user=self.user, title=f'Recipe {i}')
+            recipe.tags.add(
+                Tag.objects.create(user=self.user, name=f'Tag {recipe.id}'))
+            recipe.ingredients.add(Ingredient.objects.create(
+                user=self.user, name=f'Ing {recipe.id}'))
+
+    def test_list_query_count_independent_of_size(self):
+        """Test listing recipes runs a fixed number of queries."""
+        self._create_recipes(1)
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(len(res.data['results']), 1)
+
+        self._create_recipes(10)
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL)
+        self.assertEqual(len(res.data['results']), 11)
+
+    def test_filtered_list_query_count(self):
+        """Test filtering recipes does not add per-recipe queries."""
+        self._create_recipes(5)
+        tag_ids = ','.join(
+            str(tag.id) for tag in Tag.objects.filter(user=self.user))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'tags': tag_ids})
+        self.assertEqual(len(res.data['results']), 5)
+
+    def test_detail_query_count(self):
+        """Test retrieving a recipe prefetches tags and ingredients."""
+        self._create_recipes(1)
+        recipe = Recipe.objects.get(user=self.user)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Extra'))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(get_detail_url(recipe.id))
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def _recipe_payload(self, count):
+        """Return a recipe payload with count tags and ingredients."""
+        return {
+            'title': 'Sample recipe',
+            'time_minutes': 30,
+            'price': Decimal('5.50'),
+            'tags': [{'name': f'Tag {i}'} for i in range(count)],
+            'ingredients': [{'name': f'Ing {i}'} for i in range(count)],
+        }
+
+    def test_create_query_count_independent_of_nested_items(self):
+        """Test nested tags and ingredients are created in bulk."""
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.post(
+                RECIPES_URL, self._recipe_payload(1), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.post(
+                RECIPES_URL, self._recipe_payload(30), format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(res.data['ingredients']), 30)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 30)
+
+    def test_create_reuses_existing_names(self):
+        """Test existing tags are reused and duplicates are ignored."""
+        tag = Tag.objects.create(user=self.user, name='Tag 0')
+        payload = self._recipe_payload(3)
+        payload['tags'].append({'name': 'Tag 1'})
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        self.assertIn(tag, recipe.tags.all())
+        self.assertEqual(recipe.tags.count(), 3)
+
+    def test_update_keeps_unchanged_tags(self):
+        """Test updating tags only touches the changed rows."""
+        res = self.client.post(
+            RECIPES_URL, self._recipe_payload(3), format='json')
+        recipe = Recipe.objects.get(id=res.data['id'])
+        through = Recipe.tags.through
+        kept = through.objects.get(recipe=recipe, tag__name='Tag 0')
+
+        payload = {'tags': [{'name': 'Tag 0'}, {'name': 'Tag 9'}]}
+        res = self.client.patch(
+            get_detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Tag 0', 'Tag 9'],
+        )
+        self.assertTrue(through.objects.filter(id=kept.id).exists())
 
 
 class ImageUploadTests(TestCase):
@@ -456,8 +717,20 @@ class ImageUploadTests(TestCase):
         self.recipe = create_recipe(user=self.user)
 
     def tearDown(self):
+        self.recipe.refresh_from_db()
+        delete_variants(self.recipe.image_variants)
         self.recipe.image.delete()
 
+    def _upload_image(self, size=(10, 10)):
+        """Upload a JPEG of the given size to the recipe."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            img = Image.new('RGB', size)
+            img.save(image_file, format='JPEG')
+            image_file.seek(0)
+            return self.client.post(
+                url, {'image': image_file}, format='multipart')
+
     def test_upload_image(self):
         """Test uploading an image to the recipe."""
         url = image_upload_url(self.recipe.id)
@@ -473,6 +746,98 @@ class ImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_queues_variants(self):
+        """Test uploading an image is acknowledged before processing."""
+        res = self._upload_image()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], 'pending')
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+
+    @override_settings(IMAGE_PROCESSING_WORKERS=0)
+    def test_upload_image_generates_variants(self):
+        """Test resized variants are generated after the upload commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload_image(size=(800, 400))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'ready')
+        thumbnail = self.recipe.image_variants['thumbnail']
+        self.assertEqual(set(thumbnail), {'webp', 'jpeg'})
+        with Image.open(default_storage.path(thumbnail['webp'])) as img:
+            self.assertEqual(img.format, 'WEBP')
+            self.assertEqual(img.size, (320, 160))
+
+        res = self.client.get(get_detail_url(self.recipe.id))
+
+        self.assertEqual(res.data['image_status'], 'ready')
+        self.assertTrue(
+            res.data['image_variants']['medium']['jpeg'].startswith('http'))
+
+    def test_process_pending_images_command(self):
+        """Test the command processes images left in the queue."""
+        self._upload_image()
+
+        call_command('process_recipe_images', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'ready')
+        self.assertIn('medium', self.recipe.image_variants)
+
+    def test_process_stale_images_command(self):
+        """Test the command retries images a crashed worker left behind."""
+        self._upload_image()
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image_status='processing',
+            updated_at=timezone.now() - timedelta(hours=1),
+        )
+
+        call_command('process_recipe_images', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'ready')
+
+    def test_process_images_command_skips_current_jobs(self):
+        """Test images another worker is processing are left alone."""
+        self._upload_image()
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            image_status='processing', updated_at=timezone.now())
+
+        call_command('process_recipe_images', stdout=StringIO())
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, 'processing')
+
+    def test_upload_file_not_an_image(self):
+        """Test uploading a file that is not an image is rejected."""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+            image_file.write(b'not an image' * 100)
+            image_file.seek(0)
+            res = self.client.post(
+                url, {'image': image_file}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=50)
+    def test_upload_image_dimensions_too_large(self):
+        """Test images with too many pixels are rejected from the header."""
+        res = self._upload_image(size=(10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=100)
+    def test_upload_image_too_large(self):
+        """Test uploads over the size limit are rejected."""
+        res = self._upload_image(size=(100, 100))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image."""
         url = image_upload_url(self.recipe.id)
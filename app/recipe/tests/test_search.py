@@ -0,0 +1,136 @@
+"""
+Tests for the recipe full-text search.
+"""
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = {
+        'title': 'Sample Title',
+        'time_minutes': 25,
+        'price': Decimal('10.85'),
+    }
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class RecipeSearchAPITests(TestCase):
+    """Test searching recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _search(self, terms, **params):
+        """Return the ids of the recipes found for terms."""
+        res = self.client.get(RECIPES_URL, {'search': terms, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['id'] for recipe in res.data['results']]
+
+    def test_search_title_and_description(self):
+        """Test searching matches titles and descriptions."""
+        soup = create_recipe(self.user, title='Tomato soup')
+        stew = create_recipe(self.user, title='Stew',
+                             description='Slow cooked with tomato')
+        create_recipe(self.user, title='Pancakes')
+
+        self.assertCountEqual(self._search('tomato'), [soup.id, stew.id])
+
+    def test_search_tags_and_ingredients(self):
+        """Test searching matches tag and ingredient names."""
+        curry = create_recipe(self.user, title='Curry')
+        curry.tags.add(Tag.objects.create(user=self.user, name='Spicy'))
+        dal = create_recipe(self.user, title='Dal')
+        dal.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Lentils'))
+
+        self.assertEqual(self._search('spicy'), [curry.id])
+        self.assertEqual(self._search('lentils'), [dal.id])
+
+    def test_search_all_terms(self):
+        """Test every search term has to match."""
+        soup = create_recipe(self.user, title='Tomato soup')
+        create_recipe(self.user, title='Tomato salad')
+
+        self.assertEqual(self._search('tomato soup'), [soup.id])
+
+    def test_search_combines_with_filters(self):
+        """Test search results are narrowed by the tag filter."""
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        soup = create_recipe(self.user, title='Tomato soup')
+        soup.tags.add(tag)
+        create_recipe(self.user, title='Tomato salad')
+
+        self.assertEqual(
+            self._search('tomato', tags=str(tag.id)), [soup.id])
+
+    def test_search_limited_to_user(self):
+        """Test other users' recipes are not found."""
+        other = get_user_model().objects.create_user(
+            email='other@example.com', password='testpass123')
+        create_recipe(other, title='Tomato soup')
+
+        self.assertEqual(self._search('tomato'), [])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+class RecipeSearchVectorTests(TestCase):
+    """Test the stored search vectors on PostgreSQL."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def test_search_ranks_title_first(self):
+        """Test recipes matching in the title rank above others."""
+        described = create_recipe(self.user, title='Stew',
+                                  description='With tomato')
+        titled = create_recipe(self.user, title='Tomato soup')
+
+        res = self.client.get(RECIPES_URL, {'search': 'tomato'})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [titled.id, described.id],
+        )
+
+    def test_vector_follows_renamed_tag(self):
+        """Test renaming a tag updates the recipes' search vectors."""
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag)
+        tag.name = 'Mild'
+        tag.save()
+
+        found = Recipe.objects.filter(search_vector='mild')
+
+        self.assertEqual(list(found), [recipe])
+
+    def test_vector_drops_deleted_ingredient(self):
+        """Test deleting an ingredient updates the search vectors."""
+        ingredient = Ingredient.objects.create(user=self.user, name='Lentils')
+        recipe = create_recipe(self.user)
+        recipe.ingredients.add(ingredient)
+        ingredient.delete()
+
+        self.assertFalse(
+            Recipe.objects.filter(pk=recipe.pk, search_vector='lentils')
+            .exists())
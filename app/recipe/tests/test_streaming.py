@@ -0,0 +1,94 @@
+"""
+Tests for streamed recipe lists.
+"""
+import json
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=0, STREAM_CHUNK_SIZE=50)
+class StreamingListTests(TestCase):
+    """Test streaming the recipe list."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123')
+        self.client.force_authenticate(self.user)
+
+    def _create_recipes(self, count):
+        """Create count recipes sharing a tag."""
+        tag = Tag.objects.get_or_create(user=self.user, name='Dinner')[0]
+        recipes = Recipe.objects.bulk_create(
+            Recipe(user=self.user, title=f'Recipe {i}', time_minutes=i,
+                   price=Decimal('1.25'), description='x' * 200)
+            for i in range(count)
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+            for recipe in recipes
+        )
+
+    def _stream(self, params=None):
+        """Return the body of a streamed list request."""
+        res = self.client.get(RECIPES_URL, {'stream': 1, **(params or {})})
+        self.assertTrue(res.streaming)
+        return b''.join(res.streaming_content)
+
+    def test_stream_matches_list(self):
+        """Test the streamed body holds the regular results."""
+        self._create_recipes(120)
+        params = {'ordering': 'time_minutes', 'fields': 'id,title,tags'}
+
+        regular = self.client.get(RECIPES_URL, {**params, 'page_size': 200})
+
+        self.assertEqual(
+            json.loads(self._stream(params)), regular.json()['results'])
+
+    @override_settings(FAST_LIST_SERIALIZATION=False)
+    def test_stream_with_serializers(self):
+        """Test streaming through the serializers matches too."""
+        self._create_recipes(60)
+
+        regular = self.client.get(RECIPES_URL)
+
+        self.assertEqual(json.loads(self._stream()), regular.json()['results'])
+
+    def test_stream_empty(self):
+        """Test streaming an empty list."""
+        self.assertEqual(self._stream(), b'[]')
+
+    def _peak_memory(self, stream):
+        """Return the peak traced memory while reading the list."""
+        tracemalloc.start()
+        if stream:
+            res = self.client.get(RECIPES_URL, {'stream': 1})
+            for _ in res.streaming_content:
+                pass
+        else:
+            self.client.get(RECIPES_URL, {'page_size': 1000})
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return peak
+
+    def test_stream_memory_flat(self):
+        """Test peak memory does not grow with the list when streaming."""
+        self._create_recipes(200)
+        small = {stream: self._peak_memory(stream) for stream in (0, 1)}
+        self._create_recipes(800)
+        large = {stream: self._peak_memory(stream) for stream in (0, 1)}
+
+        self.assertLess(large[1], small[1] * 2)
+        self.assertGreater(large[0], small[0] * 3)
+        self.assertLess(large[1], large[0] / 3)
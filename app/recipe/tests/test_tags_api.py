@@ -2,14 +2,18 @@
 Tests for Tags APIs.
 """
 from decimal import Decimal
+from unittest import skipUnless
+
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Tag, Recipe
+from core.tests.mixins import QueryDetectorMixin
 from recipe.serializers import TagSerializer
 
 
@@ -39,7 +43,7 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagsApiTests(TestCase):
+class PrivateTagsApiTests(QueryDetectorMixin, TestCase):
     """Tests for authorized requests."""
 
     def setUp(self):
@@ -58,7 +62,7 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_list_limited_to_user(self):
         """Test tags are limited to their owner."""
@@ -69,9 +73,9 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAG_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
-        self.assertEqual(res.data[0]['id'], tag.id)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+        self.assertEqual(res.data['results'][0]['id'], tag.id)
 
     def test_updated_tag(self):
         """Test updating tag successful."""
@@ -86,6 +90,17 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_rename_tag_to_existing_name_error(self):
+        """Test renaming a tag to a name already in use fails."""
+        Tag.objects.create(user=self.user, name='Lunch')
+        tag = Tag.objects.create(user=self.user, name='After dinner')
+
+        res = self.client.patch(detail_url(tag.id), {'name': 'Lunch'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After dinner')
+
     def test_delete_tag(self):
         """Test deleting tag is successful."""
         tag = Tag.objects.create(user=self.user, name='After dinner')
@@ -110,11 +125,12 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
 
+        tag1.refresh_from_db()
         s1 = TagSerializer(tag1)
         s2 = TagSerializer(tag2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data['results'])
+        self.assertNotIn(s2.data, res.data['results'])
 
     def test_filtered_tags_unique(self):
         """Test tag filtering return a list of unique values."""
@@ -138,4 +154,60 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAG_URL, {'assigned_only': 1})
 
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_tags_cursor_pagination(self):
+        """Test paginating tags follows the name ordering."""
+        for name in ['Apple', 'Banana', 'Cherry']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAG_URL, {'page_size': 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Cherry', 'Banana'],
+        )
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(
+            [t['name'] for t in res.data['results']],
+            ['Apple'],
+        )
+        self.assertIsNone(res.data['next'])
+
+    def test_tags_autocomplete(self):
+        """Test q returns matching tags with prefix matches first."""
+        for name in ['Breakfast', 'Fast food', 'Dessert', 'Fasting']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAG_URL, {'q': 'fast'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [t['name'] for t in res.data],
+            ['Fast food', 'Fasting', 'Breakfast'],
+        )
+
+    @override_settings(AUTOCOMPLETE_MAX_RESULTS=2)
+    def test_tags_autocomplete_limit(self):
+        """Test autocomplete results are capped."""
+        for name in ['Tea', 'Teriyaki', 'Tex-Mex']:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAG_URL, {'q': 'te', 'limit': 10})
+        self.assertEqual(len(res.data), 2)
+
+        res = self.client.get(TAG_URL, {'q': 'te', 'limit': 1})
+        self.assertEqual([t['name'] for t in res.data], ['Tea'])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL.')
+    def test_tags_autocomplete_fuzzy(self):
+        """Test misspelled terms match similar tags."""
+        Tag.objects.create(user=self.user, name='Vegetarian')
+        Tag.objects.create(user=self.user, name='Dessert')
+
+        res = self.client.get(TAG_URL, {'q': 'vegatarian'})
+
+        self.assertEqual([t['name'] for t in res.data], ['Vegetarian'])
@@ -0,0 +1,112 @@
+"""
+Streaming, memory bounded handling of recipe image uploads.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.translation import gettext as _
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+
+ALLOWED_IMAGE_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+# Enough for JPEGs carrying large EXIF blocks before the frame header.
+HEADER_MAX_BYTES = 256 * 1024
+# Room for the multipart boundaries and the other form fields.
+BODY_OVERHEAD_BYTES = 64 * 1024
+
+
+class StreamingImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream an image upload to a temporary file, validating it on the fly.
+
+    Only the first chunks are kept in memory, until Pillow can read the
+    image header. Uploads that are too large, are not images or have too
+    many pixels are rejected as soon as that is known, without reading the
+    rest of the body.
+    """
+
+    def __init__(self, request=None, field_name='image'):
+        super().__init__(request)
+        self.field_name = field_name
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+
+    def _reject(self, message):
+        """Discard the partial upload and report the error."""
+        if getattr(self, 'file', None) is not None:
+            path = self.file.temporary_file_path()
+            self.file.close()
+            if os.path.exists(path):
+                os.remove(path)
+            self.file = None
+        raise ValidationError({self.field_name: [message]})
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + BODY_OVERHEAD_BYTES:
+            self._reject(_('Upload exceeds the maximum size.'))
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.header = BytesIO()
+        self.image_format = None
+        self.image_size = None
+
+    def _check_header(self, final=False):
+        """Validate the image header once enough bytes have arrived."""
+        self.header.seek(0)
+        try:
+            with Image.open(self.header) as image:
+                self.image_format = image.format
+                self.image_size = image.size
+        except Image.DecompressionBombError:
+            self._reject(_('Image dimensions are too large.'))
+        except Exception:
+            # Pillow raises a variety of errors on truncated headers, wait
+            # for more data unless there is no more to come.
+            if final or self.header.getbuffer().nbytes >= HEADER_MAX_BYTES:
+                self._reject(_('Upload a valid image.'))
+            self.header.seek(0, os.SEEK_END)
+            return
+
+        self.header = None
+        width, height = self.image_size
+        if self.image_format not in ALLOWED_IMAGE_FORMATS:
+            self._reject(_('Unsupported image format.'))
+        if width * height > self.max_pixels:
+            self._reject(_('Image dimensions are too large.'))
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._reject(_('Upload exceeds the maximum size.'))
+
+        if self.header is not None:
+            self.header.seek(0, os.SEEK_END)
+            self.header.write(raw_data[:HEADER_MAX_BYTES])
+            self._check_header()
+
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.header is not None:
+            self._check_header(final=True)
+
+        upload = super().file_complete(file_size)
+        upload.image_format = self.image_format
+        upload.image_size = self.image_size
+        return upload
+
+
+class StreamingImageParser(MultiPartParser):
+    """Multipart parser streaming image uploads through the handler."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request.upload_handlers = [StreamingImageUploadHandler(request)]
+
+        return super().parse(stream, media_type, parser_context)
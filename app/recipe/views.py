@@ -1,6 +1,10 @@
 """
 Views for recipe APIs.
 """
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -11,14 +15,33 @@ from rest_framework import (
     viewsets,
     mixins
 )
-from rest_framework import status
+from rest_framework import fields, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from core.db.replicas import ReplicaReadMixin
+from core.instrumentation import InstrumentedViewMixin
 from core.models import Recipe, Tag, Ingredient
+from core.search import autocomplete, search_recipes, search_supported
 from recipe import serializers
+from recipe.asynchronous import AsyncReadMixin
+from recipe.bulk import BulkRecipeOperations
+from recipe.cache import CachedResponseMixin
+from recipe.conditional import ConditionalGetMixin
+from recipe.fastpath import FastListMixin
+from recipe.fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
+from recipe.library import (
+    EXPORT_FORMATS,
+    EXPORTERS,
+    CSVParser,
+    NDJSONParser,
+    import_records,
+)
+from recipe.streaming import StreamingListMixin, aiterate
+from recipe.uploads import StreamingImageParser
+from user.authentication import CachedTokenAuthentication
 
 
 @extend_schema_view(
@@ -34,37 +57,174 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredients IDs '
                             'to filter',
-            )
+            ),
+            OpenApiParameter(
+                'tags_mode',
+                OpenApiTypes.STR, enum=['any', 'all'],
+                description='Match recipes having any (default) or all '
+                            'of the given tags',
+            ),
+            OpenApiParameter(
+                'min_time',
+                OpenApiTypes.INT,
+                description='Only recipes taking at least this many minutes',
+            ),
+            OpenApiParameter(
+                'max_time',
+                OpenApiTypes.INT,
+                description='Only recipes taking at most this many minutes',
+            ),
+            OpenApiParameter(
+                'min_price',
+                OpenApiTypes.DECIMAL,
+                description='Only recipes costing at least this much',
+            ),
+            OpenApiParameter(
+                'max_price',
+                OpenApiTypes.DECIMAL,
+                description='Only recipes costing at most this much',
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                enum=['-id', 'id', 'time_minutes', '-time_minutes',
+                      'price', '-price'],
+                description='Sort order, newest first by default',
+            ),
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Full-text search over titles, descriptions, '
+                            'tags and ingredients, best matches first',
+            ),
+            OpenApiParameter(
+                'stream',
+                OpenApiTypes.INT, enum=[0, 1],
+                description='Stream the full, unpaginated list as it is '
+                            'read from the database',
+            ),
+            *FIELDSET_PARAMETERS,
         ]
-    )
+    ),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(InstrumentedViewMixin,
+                    CachedResponseMixin,
+                    ConditionalGetMixin,
+                    SparseFieldsetMixin,
+                    StreamingListMixin,
+                    FastListMixin,
+                    ReplicaReadMixin,
+                    AsyncReadMixin,
+                    viewsets.ModelViewSet):
     """View for managing recipe APIs."""
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    queryset = Recipe.objects.defer('search_vector')
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    related_fields = ['tags', 'ingredients']
+    async_actions = AsyncReadMixin.async_actions + ('export',)
+    ordering = ['-id']
+    # Every ordering ends on the id and is served by an index on the user.
+    orderings = {
+        '-id': ['-id'],
+        'id': ['id'],
+        'time_minutes': ['time_minutes', 'id'],
+        '-time_minutes': ['-time_minutes', '-id'],
+        'price': ['price', 'id'],
+        '-price': ['-price', '-id'],
+    }
+    range_filters = {
+        'min_time': ('time_minutes__gte', fields.IntegerField(min_value=0)),
+        'max_time': ('time_minutes__lte', fields.IntegerField(min_value=0)),
+        'min_price': ('price__gte', fields.DecimalField(
+            max_digits=5, decimal_places=2)),
+        'max_price': ('price__lte', fields.DecimalField(
+            max_digits=5, decimal_places=2)),
+    }
 
     def _params_to_ints(self, qs):
         """Convert a string into a list of integers."""
         return [int(str_id) for str_id in qs.split(',')]
 
+    def _filter_linked(self, queryset, through, field, ids, match_all=False):
+        """Filter recipes linked to ids with an EXISTS semi-join."""
+        links = through.objects.filter(
+            recipe_id=OuterRef('pk'),
+            **{f'{field}__in': ids},
+        )
+        if not match_all:
+            return queryset.filter(Exists(links))
+
+        matched = links.values('recipe_id').annotate(
+            total=Count('*')
+        ).values('total')
+        return queryset.alias(
+            matched_links=Subquery(matched)
+        ).filter(matched_links=len(set(ids)))
+
     def get_queryset(self):
         """Retrieve recipe for authenticated user."""
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
+        tags_mode = self.request.query_params.get('tags_mode', 'any')
+        if tags_mode not in ('any', 'all'):
+            raise ValidationError(
+                {'tags_mode': _('Must be either "any" or "all".')})
+        queryset = self.queryset.filter(user=self.request.user)
 
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = self._filter_linked(
+                queryset, Recipe.tags.through, 'tag_id', tag_ids,
+                match_all=tags_mode == 'all',
+            )
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = self._filter_linked(
+                queryset, Recipe.ingredients.through, 'ingredient_id',
+                ingredient_ids,
+            )
+
+        for param, (lookup, field) in self.range_filters.items():
+            value = self._get_param(param, field)
+            if value is not None:
+                queryset = queryset.filter(**{lookup: value})
+        if self._search_terms():
+            queryset = search_recipes(queryset, self._search_terms())
+
+        queryset = queryset.order_by(*self.get_ordering())
+
+        return self.sparse_queryset(queryset)
+
+    def _search_terms(self):
+        """Return the full-text search terms of the request."""
+        return self.request.query_params.get('search', '').strip()
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-id').distinct()
+    def _get_param(self, name, field):
+        """Return a query param validated by a serializer field."""
+        value = self.request.query_params.get(name)
+        if value in (None, ''):
+            return None
+        try:
+            return field.run_validation(value)
+        except ValidationError as exc:
+            raise ValidationError({name: exc.detail})
+
+    def get_ordering(self):
+        """Return the requested ordering, else best matches first."""
+        ordering = self.request.query_params.get('ordering')
+        if ordering:
+            if ordering not in self.orderings:
+                raise ValidationError({'ordering': [
+                    _('Must be one of: %(choices)s.')
+                    % {'choices': ', '.join(self.orderings)}
+                ]})
+            return self.orderings[ordering]
+        if self._search_terms() and search_supported(self.queryset.db):
+            return ['-search_rank', *self.ordering]
+
+        return self.ordering
 
     def get_serializer_class(self):
         """Return serializer class on request."""
@@ -78,7 +238,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """Create a new recipe."""
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            parser_classes=[StreamingImageParser])
     def upload_image(self, request, pk=None):
         """Upload an image to recipe."""
         recipe = self.get_object()
@@ -90,6 +251,89 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        request=serializers.RecipeBulkOperationSerializer(many=True),
+        responses=serializers.RecipeBulkResultSerializer(many=True),
+    )
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        """Create, update and delete many recipes in one transaction."""
+        # The list is rejected by its length before any item is validated.
+        serializer = serializers.RecipeBulkOperationSerializer(
+            data=request.data, many=True,
+            max_length=settings.RECIPE_BULK_MAX_OPERATIONS)
+        serializer.is_valid(raise_exception=True)
+
+        operations = BulkRecipeOperations(
+            self.get_queryset(),
+            serializer.validated_data,
+            self.get_serializer_context(),
+        )
+        if not operations.is_valid():
+            return Response(
+                operations.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        results = operations.save(user=request.user)
+        return Response(results, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                'export_format',
+                OpenApiTypes.STR, enum=list(EXPORT_FORMATS),
+                description='Export as NDJSON (default) or CSV',
+            ),
+        ],
+        responses={(200, media_type): OpenApiTypes.STR
+                   for media_type in EXPORT_FORMATS.values()},
+    )
+    @action(methods=['GET'], detail=False, url_path='export')
+    def export(self, request):
+        """Stream every recipe of the user as NDJSON or CSV."""
+        return self._export_response(request, iter)
+
+    async def aexport(self, request):
+        """Async counterpart of ``export``."""
+        return self._export_response(request, aiterate)
+
+    def _export_response(self, request, wrap):
+        """Return the streamed export of the user's recipes.
+
+        ``wrap`` turns the sync generator of exported chunks into the
+        iterator the response streams.
+        """
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'export_format': [
+                _('Must be one of: %(choices)s.')
+                % {'choices': ', '.join(EXPORT_FORMATS)}
+            ]})
+
+        response = StreamingHttpResponse(
+            wrap(EXPORTERS[export_format](request.user)),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{export_format}"')
+        return response
+
+    @extend_schema(
+        request={media_type: OpenApiTypes.STR
+                 for media_type in EXPORT_FORMATS.values()},
+        responses={201: serializers.RecipeLibraryImportSerializer},
+    )
+    @action(methods=['POST'], detail=False, url_path='import',
+            url_name='import', parser_classes=[NDJSONParser, CSVParser])
+    def import_library(self, request):
+        """Create recipes from an NDJSON or CSV export."""
+        imported, seconds = import_records(request.user, request.data)
+        result = serializers.RecipeLibraryImportSerializer({
+            'imported': imported,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(imported / seconds, 1) if seconds else 0,
+        })
+        return Response(result.data, status=status.HTTP_201_CREATED)
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -98,17 +342,37 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 'assigned_only',
                 OpenApiTypes.INT, enum=[0, 1],
                 description='Filter by items assigned to recipes.'
-            )
+            ),
+            OpenApiParameter(
+                'q',
+                OpenApiTypes.STR,
+                description='Autocomplete names by prefix or similarity. '
+                            'Returns the best matches, unpaginated.',
+            ),
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Number of autocomplete matches to return.',
+            ),
+            *FIELDSET_PARAMETERS,
         ]
     )
 )
-class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
+class BaseRecipeAttrViewSet(InstrumentedViewMixin,
+                            CachedResponseMixin,
+                            SparseFieldsetMixin,
+                            FastListMixin,
+                            ReplicaReadMixin,
+                            AsyncReadMixin,
+                            mixins.DestroyModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.ListModelMixin,
                             viewsets.GenericViewSet):
     """Base class for Recipe's attributes."""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # Names are unique per user, so the unique index on them serves pages.
+    ordering = ['-name']
 
     def get_queryset(self):
         """Filtering queryset to authenticated users."""
@@ -117,11 +381,40 @@ class BaseRecipeAttrViewSet(mixins.DestroyModelMixin,
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(recipe_count__gt=0)
+
+        queryset = queryset.filter(user=self.request.user)
+        term = self._autocomplete_term()
+        if term:
+            queryset = self.sparse_queryset(autocomplete(queryset, term))
+            return queryset[:self._autocomplete_limit()]
+
+        return self.sparse_queryset(queryset.order_by(*self.ordering))
+
+    def _autocomplete_term(self):
+        """Return the autocomplete term of a list request."""
+        if self.action != 'list':
+            return ''
+
+        return self.request.query_params.get('q', '').strip()
+
+    def _autocomplete_limit(self):
+        """Return how many autocomplete matches to return."""
+        max_results = settings.AUTOCOMPLETE_MAX_RESULTS
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return max_results
+
+        return max(1, min(limit, max_results))
+
+    @property
+    def paginator(self):
+        """Leave autocomplete results, which are already limited, unpaged."""
+        if self._autocomplete_term():
+            return None
 
-        return queryset.filter(
-            user=self.request.user
-        ).order_by('-name').distinct()
+        return super().paginator
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -0,0 +1,171 @@
+"""
+Cached token authentication for the APIs.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from core.cache import is_shared_cache
+
+KEY_PREFIX = 'auth-token'
+
+
+class LocalTokenCache:
+    """Thread safe, process local LRU of recently seen tokens."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached entry for key, or None if missing or expired."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires, entry = item
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        """Store entry for key, evicting the least recently used one."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        """Forget the entry for key."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Forget every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalTokenCache(
+    max_size=settings.AUTH_TOKEN_LOCAL_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_LOCAL_CACHE_TTL,
+)
+
+
+def get_shared_cache():
+    """Return the cache of token lookups, ``AUTH_TOKEN_CACHE_ALIAS``.
+
+    Only caches shared between worker processes keep lookups, see
+    ``is_shared_cache``.
+    """
+    return caches[settings.AUTH_TOKEN_CACHE_ALIAS]
+
+
+def _version_key(key):
+    return f'{KEY_PREFIX}:version:{key}'
+
+
+def _shared_key(key, version):
+    return f'{KEY_PREFIX}:{key}:{version}'
+
+
+def get_token_version(key):
+    """Return the current cache version of a token."""
+    shared_cache = get_shared_cache()
+    version_key = _version_key(key)
+    version = shared_cache.get(version_key)
+    if version is None:
+        # Start from the clock so an evicted version is never reused.
+        shared_cache.add(version_key, time.time_ns(), timeout=None)
+        version = shared_cache.get(version_key)
+
+    return version
+
+
+def invalidate_token(key):
+    """Drop a token from the local cache and bump its shared version.
+
+    Bumping the version rather than deleting the entry also discards what
+    lookups that started before the change are about to write.
+    """
+    local_cache.discard(key)
+    shared_cache = get_shared_cache()
+    try:
+        shared_cache.incr(_version_key(key))
+    except ValueError:
+        shared_cache.set(_version_key(key), time.time_ns(), timeout=None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that caches the token and user lookup.
+
+    Tokens are looked up in a process local LRU of users first. When
+    ``AUTH_TOKEN_CACHE_ALIAS`` is shared between worker processes, it keeps
+    the user's pk and ``is_active`` flag, never the user itself, so a token
+    found there costs a primary key lookup of the user instead of the token
+    lookup. Shared entries are keyed on a per-token version that deleting
+    the token or saving its user bumps, which invalidates them in every
+    process right away. A process-local cache would only see the bumps of
+    its own process, so it is not used for shared entries. Other processes
+    drop their local copy within ``AUTH_TOKEN_LOCAL_CACHE_TTL`` seconds.
+    """
+
+    def _load_user(self, key, user_id, is_active):
+        """Return the user and token of a shared cache entry."""
+        if not is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+        try:
+            user = get_user_model().objects.get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        return user, Token(key=key, user=user)
+
+    def authenticate_credentials(self, key):
+        entry = local_cache.get(key)
+        if entry is None:
+            shared_cache = get_shared_cache()
+            version = get_token_version(key)
+            shared_key = _shared_key(key, version)
+            shared = is_shared_cache(settings.AUTH_TOKEN_CACHE_ALIAS)
+            cached = shared_cache.get(shared_key) if shared else None
+            if cached is not None:
+                entry = self._load_user(key, *cached)
+            else:
+                entry = super().authenticate_credentials(key)
+
+            # Do not cache what the user or token changed under meanwhile.
+            if get_token_version(key) == version:
+                if shared and cached is None:
+                    user = entry[0]
+                    shared_cache.set(
+                        shared_key,
+                        (user.pk, user.is_active),
+                        settings.AUTH_TOKEN_CACHE_TIMEOUT,
+                    )
+                local_cache.set(key, entry)
+
+        user, token = entry
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'))
+
+        # Hand every request its own copy so changes made while handling
+        # one request never leak into another through the cache.
+        return copy.copy(user), token
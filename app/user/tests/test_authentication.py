@@ -0,0 +1,157 @@
+"""
+Tests for cached token authentication.
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.tests.mixins import SharedCacheMixin
+from user.authentication import (
+    LocalTokenCache,
+    _shared_key,
+    get_shared_cache,
+    get_token_version,
+    local_cache,
+)
+
+
+ME_URL = reverse('user:me')
+
+
+class CachedTokenAuthenticationTests(SharedCacheMixin, TestCase):
+    """Tests for authenticating with a cached token."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_cached(self):
+        """Test the token is only looked up once."""
+        res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_shared_cache_keeps_user_pk(self):
+        """Test the shared cache holds the user's pk, not the user."""
+        self.client.get(ME_URL)
+        local_cache.clear()
+
+        entry = get_shared_cache().get(
+            _shared_key(self.token.key, get_token_version(self.token.key)))
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(entry, (self.user.pk, True))
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_process_local_cache_not_shared(self):
+        """Test lookups are not kept where other workers miss revocations."""
+        locmem = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        with override_settings(CACHES=locmem):
+            self.client.get(ME_URL)
+            local_cache.clear()
+
+            entry = get_shared_cache().get(
+                _shared_key(self.token.key, get_token_version(self.token.key)))
+            with self.assertNumQueries(1):
+                res = self.client.get(ME_URL)
+
+        self.assertIsNone(entry)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_lookup_racing_deactivation_not_cached(self):
+        """Test a user deactivated during the lookup is not cached active."""
+        lookup = TokenAuthentication.authenticate_credentials
+
+        def deactivate_after_lookup(auth, key):
+            entry = lookup(auth, key)
+            self.user.is_active = False
+            self.user.save()
+            return entry
+
+        with mock.patch.object(TokenAuthentication,
+                               'authenticate_credentials',
+                               deactivate_after_lookup):
+            self.client.get(ME_URL)
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token is still rejected."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops working right away."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user is rejected right away."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_reloads_user(self):
+        """Test changes made through the API are seen by later requests."""
+        self.client.get(ME_URL)
+
+        self.client.patch(ME_URL, {'name': 'New Name'})
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+
+class LocalTokenCacheTests(SimpleTestCase):
+    """Tests for the process local token cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest entry is evicted when the cache is full."""
+        cache = LocalTokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """Test entries are dropped after their time to live."""
+        cache = LocalTokenCache(max_size=2, ttl=-1)
+        cache.set('a', 1)
+
+        self.assertIsNone(cache.get('a'))
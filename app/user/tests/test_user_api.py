@@ -8,6 +8,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.tests.mixins import QueryDetectorMixin
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -19,7 +21,7 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicUserApiTests(TestCase):
+class PublicUserApiTests(QueryDetectorMixin, TestCase):
     """Tests for public user APIs."""
     def setUp(self):
         self.client = APIClient()
@@ -121,7 +123,7 @@ class PublicUserApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateUserApiTests(TestCase):
+class PrivateUserApiTests(QueryDetectorMixin, TestCase):
     """Tests for authenticated users."""
 
     def setUp(self):
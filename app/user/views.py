@@ -1,27 +1,32 @@
 """
 Views for the User API.
 """
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+from core.db.replicas import ReplicaReadMixin
+from core.instrumentation import InstrumentedViewMixin
+from .authentication import CachedTokenAuthentication
 from .serializers import (UserSerializer, AuthTokenSerializer)
 
 
-class CreateUserView(generics.CreateAPIView):
+class CreateUserView(InstrumentedViewMixin, generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(InstrumentedViewMixin, ObtainAuthToken):
     """Create auth token for user."""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
 
 
-class UserManagerView(generics.RetrieveUpdateAPIView):
+class UserManagerView(InstrumentedViewMixin, ReplicaReadMixin,
+                      generics.RetrieveUpdateAPIView):
     """Manage authenticated users."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
@@ -6,4 +6,17 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+if [ -n "$METRICS_DIR" ]; then
+    # Start the metrics over, the workers of a previous run are gone.
+    rm -rf "$METRICS_DIR"
+    mkdir -p "$METRICS_DIR"
+fi
+
+if [ "$APP_SERVER" = "asgi" ]; then
+    # Event loop workers speaking HTTP to the proxy, see proxy/asgi.conf.tpl.
+    uvicorn app.asgi:application --host 0.0.0.0 --port 9000 \
+        --workers "${WEB_CONCURRENCY:-4}" --proxy-headers \
+        --forwarded-allow-ips '*' --no-access-log
+else
+    uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
+fi